@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Browser Pool - Uzun ömürlü, ısıtılmış sayfa havuzu
+Her istekte Chromium başlatmak yerine paylaşılan browser üzerinde
+önceden hazırlanmış sayfaları tekrar kullanır
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from browser_service import BrowserService, browser_service as default_browser_service
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledPage:
+    """
+    Havuzdaki tek bir context + page çifti
+    """
+
+    def __init__(self, context, page, proxy_server: Optional[str]):
+        self.context = context
+        self.page = page
+        self.proxy_server = proxy_server
+        self.headers: Optional[Dict[str, str]] = None
+        self.uses = 0
+        self.broken = False
+
+        # Sayfa çökerse bir sonraki teslimde yenisi açılsın
+        page.on("crash", lambda _: self._mark_broken())
+        page.on("close", lambda _: self._mark_broken())
+
+    def _mark_broken(self):
+        self.broken = True
+
+
+class BrowserPool:
+    """
+    Paylaşılan browser üzerinde çalışan sayfa havuzu
+    - Browser BrowserService'ten alınır, sayfalar kendi context'lerinde hazırlanır
+    - Init script ve route filtresi sayfa açılırken bir kez kurulur
+    - Sayfalar N kullanımdan sonra veya çökünce yenilenir
+    - Boştaki sayfalar rota (proxy) bazında tutulur; sadece max_idle aşılınca
+      en uzun süredir kullanılmayan rotanın sayfası kapatılır
+    - close() ile tüm kaynaklar temiz şekilde kapatılır
+    """
+
+    def __init__(
+        self,
+        browser_type: Optional[str] = None,
+        size: int = 2,
+        max_uses: int = 50,
+        max_idle: Optional[int] = None,
+        context_options: Optional[Dict[str, Any]] = None,
+        page_setup: Optional[Callable[[Any], Awaitable[None]]] = None,
+        service: Optional[BrowserService] = None,
+    ):
+        self.browser_type = browser_type
+        self.service = service or default_browser_service
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self.max_idle = max(self.size, max_idle or self.size)
+        self.context_options = context_options or {}
+        self.page_setup = page_setup
+
+        self._browser = None
+        # Rota (proxy_server) → boştaki sayfalar; sıra = rotanın son kullanımı (LRU)
+        self._idle: "OrderedDict[Optional[str], List[_PooledPage]]" = OrderedDict()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._closed = False
+
+        # İstatistikler
+        self.stats = {
+            "browser_attaches": 0,
+            "pages_created": 0,
+            "pages_recycled": 0,
+            "checkouts": 0,
+        }
+
+    @property
+    def is_running(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    async def start(self, warm: bool = True):
+        """
+        Paylaşılan browser'a bağlan ve (isteğe bağlı) havuzu ısıt
+        """
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+            self._slots = asyncio.Semaphore(self.size)
+
+        async with self._start_lock:
+            if self.is_running:
+                return
+            self._closed = False
+            await self._attach()
+
+        if warm:
+            for _ in range(self.size - self.idle_count):
+                try:
+                    self._idle.setdefault(None, []).append(await self._new_page(None))
+                except Exception as e:
+                    logger.warning(f"⚠️ Havuz ısıtma hatası: {e}")
+                    break
+
+    @property
+    def idle_count(self) -> int:
+        return sum(len(pages) for pages in self._idle.values())
+
+    async def _attach(self):
+        """
+        Paylaşılan browser'ı servisten al
+        """
+        self._browser = await self.service.get_browser(self.browser_type)
+
+        # Browser çökerse boştaki sayfalar geçersiz olur
+        self._browser.on("disconnected", lambda _: self._on_disconnected())
+        self.stats["browser_attaches"] += 1
+        logger.info(f"🌐 Browser havuzu hazır ({self.size} sayfa)")
+
+    def _on_disconnected(self):
+        logger.warning("⚠️ Havuz browser'ı bağlantıyı kaybetti, sonraki istekte yeniden bağlanılacak")
+        self._browser = None
+        self._idle.clear()
+
+    async def _new_page(self, proxy_server: Optional[str]) -> _PooledPage:
+        """
+        Yeni context + page aç ve hazırlık adımlarını uygula
+        """
+        options = dict(self.context_options)
+        if proxy_server:
+            options["proxy"] = {"server": proxy_server}
+
+        context = await self._browser.new_context(**options)
+        try:
+            page = await context.new_page()
+            if self.page_setup:
+                await self.page_setup(page)
+        except Exception:
+            await context.close()
+            raise
+
+        self.stats["pages_created"] += 1
+        return _PooledPage(context, page, proxy_server)
+
+    async def _discard(self, pooled: _PooledPage):
+        """
+        Sayfayı ve context'ini kapat
+        """
+        self.stats["pages_recycled"] += 1
+        try:
+            await pooled.context.close()
+        except Exception:
+            pass
+
+    async def _checkout(self, proxy_server: Optional[str]) -> _PooledPage:
+        """
+        Rotanın boştaki sayfasını seç; yoksa yeni context aç
+        (diğer rotaların sıcak sayfaları korunur, kapasite checkin'de denetlenir)
+        """
+        if not self.is_running:
+            await self.start(warm=False)
+
+        pages = self._idle.get(proxy_server)
+        while pages:
+            pooled = pages.pop()
+            if not pooled.broken:
+                break
+            await self._discard(pooled)
+        else:
+            pooled = None
+        if pages is not None and not pages:
+            del self._idle[proxy_server]
+
+        return pooled or await self._new_page(proxy_server)
+
+    async def _checkin(self, pooled: _PooledPage):
+        """
+        Sayfayı havuza geri koy veya ömrü dolduysa kapat
+        """
+        if self._closed or pooled.broken or pooled.uses >= self.max_uses or not self.is_running:
+            await self._discard(pooled)
+            return
+        self._idle.setdefault(pooled.proxy_server, []).append(pooled)
+        self._idle.move_to_end(pooled.proxy_server)
+
+        # Kapasite baskısı: en uzun süredir kullanılmayan rotanın en eski sayfası kapatılır
+        while self.idle_count > self.max_idle:
+            route, pages = next(iter(self._idle.items()))
+            await self._discard(pages.pop(0))
+            if not pages:
+                del self._idle[route]
+
+    @asynccontextmanager
+    async def page(self, proxy_server: Optional[str] = None, headers: Optional[Dict[str, str]] = None):
+        """
+        Havuzdan hazır bir sayfa ödünç al
+
+        Kullanım:
+            async with pool.page(proxy_server, headers) as page:
+                await page.goto(url)
+        """
+        if self._closed:
+            raise RuntimeError("Browser havuzu kapatıldı")
+        if self._slots is None:
+            await self.start(warm=False)
+
+        async with self._slots:
+            pooled = await self._checkout(proxy_server)
+            pooled.uses += 1
+            self.stats["checkouts"] += 1
+            try:
+                if headers and headers != pooled.headers:
+                    await pooled.page.set_extra_http_headers(headers)
+                    pooled.headers = dict(headers)
+                yield pooled.page
+            except BaseException:
+                # Hata veya iptal (ör. kaybeden hedge isteği) sonrası sayfa durumu
+                # belirsiz, yenisiyle değiştir
+                pooled.broken = True
+                raise
+            finally:
+                await self._checkin(pooled)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Havuz istatistiklerini döner
+        """
+        return {
+            **self.stats,
+            "idle": self.idle_count,
+            "idle_routes": len(self._idle),
+            "running": self.is_running,
+        }
+
+    async def close(self):
+        """
+        Havuzun tüm context'lerini kapat (paylaşılan browser açık kalır)
+        """
+        self._closed = True
+        idle, self._idle = self._idle, OrderedDict()
+        for pages in idle.values():
+            for pooled in pages:
+                await self._discard(pooled)
+        self._browser = None
+
+        logger.info("🌐 Browser havuzu kapatıldı")
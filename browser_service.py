@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Browser Service - Süreç genelinde tek Playwright sürücüsü ve tek browser
+ProFinance ve TradingView fetcher'ları buradan izole context'ler alır
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from playwright.async_api import async_playwright
+
+from config import BROWSER_TYPE
+
+logger = logging.getLogger(__name__)
+
+
+# Tüm fetcher'ların ortak kullandığı browser argümanları
+# (JavaScript, user agent, viewport ve proxy gibi ayarlar context seviyesindedir)
+SHARED_BROWSER_ARGS = [
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-blink-features=AutomationControlled",
+    "--disable-web-security",
+    "--disable-extensions",
+    "--disable-plugins",
+    "--disable-images",
+    "--disable-javascript-harmony-shipping",
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+    "--disable-ipc-flooding-protection",
+    "--no-default-browser-check",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--metrics-recording-only",
+    "--disable-background-networking",
+    "--disable-component-extensions-with-background-pages",
+    "--disable-background-mode",
+    "--disable-client-side-phishing-detection",
+    "--disable-hang-monitor",
+    "--disable-prompt-on-repost",
+    "--disable-domain-reliability",
+    "--disable-component-update",
+    "--disable-features=VizDisplayCompositor,TranslateUI,InterestBasedFeatureSuggestions,"
+    "AutofillServerCommunication,OptimizationHints",
+]
+
+
+class BrowserService:
+    """
+    Süreç genelinde paylaşılan Playwright runtime'ı
+    - Playwright sürücüsü ve browser ilk ihtiyaçta bir kez başlatılır
+    - Browser çökerse bir sonraki istekte yeniden başlatılır
+    - Her fetcher kendi ayarlarıyla izole context açar
+    """
+
+    def __init__(self, default_browser_type: str = BROWSER_TYPE):
+        self.default_browser_type = default_browser_type
+        self._playwright = None
+        self._browsers: Dict[str, Any] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self.launch_count = 0
+
+    def is_running(self, browser_type: Optional[str] = None) -> bool:
+        browser = self._browsers.get(browser_type or self.default_browser_type)
+        return browser is not None and browser.is_connected()
+
+    async def get_browser(self, browser_type: Optional[str] = None):
+        """
+        Paylaşılan browser'ı döndür (gerekirse başlat)
+        """
+        browser_type = browser_type or self.default_browser_type
+        if self.is_running(browser_type):
+            return self._browsers[browser_type]
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if self.is_running(browser_type):
+                return self._browsers[browser_type]
+
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+
+            launcher = getattr(self._playwright, browser_type, self._playwright.chromium)
+            if browser_type == "chromium":
+                browser = await launcher.launch(headless=True, args=SHARED_BROWSER_ARGS)
+            else:
+                browser = await launcher.launch(headless=True)
+
+            browser.on("disconnected", lambda _: self._on_disconnected(browser_type))
+            self._browsers[browser_type] = browser
+            self.launch_count += 1
+            logger.info(f"🌐 Paylaşılan browser başlatıldı ({browser_type})")
+            return browser
+
+    def _on_disconnected(self, browser_type: str):
+        logger.warning(f"⚠️ Paylaşılan browser bağlantıyı kaybetti ({browser_type})")
+        self._browsers.pop(browser_type, None)
+
+    async def new_context(self, browser_type: Optional[str] = None, **options):
+        """
+        Paylaşılan browser üzerinde izole bir context aç
+
+        options: Playwright new_context parametreleri
+        (user_agent, viewport, proxy, java_script_enabled, ...)
+        """
+        browser = await self.get_browser(browser_type)
+        return await browser.new_context(**options)
+
+    async def close(self):
+        """
+        Tüm browser'ları ve Playwright sürücüsünü kapat
+        """
+        browsers, self._browsers = self._browsers, {}
+        for browser in browsers.values():
+            try:
+                await browser.close()
+            except Exception as e:
+                logger.error(f"❌ Browser kapatma hatası: {e}")
+
+        try:
+            if self._playwright:
+                await self._playwright.stop()
+        except Exception as e:
+            logger.error(f"❌ Playwright durdurma hatası: {e}")
+        finally:
+            self._playwright = None
+
+        logger.info("🌐 Paylaşılan browser servisi kapatıldı")
+
+
+# Global browser servisi
+browser_service = BrowserService()
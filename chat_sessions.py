@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Chat Sessions - Chat bazında son fiyat hafızası
+Her chat kendi son XAURUB / XAUUSD fiyatını görür; bellek LRU + TTL ile sınırlı
+"""
+
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class ChatSession:
+    """
+    Tek bir chat'in son fiyat sorgusu
+    """
+
+    __slots__ = (
+        "chat_id", "last_xaurub_price", "last_xauusd_price", "last_increment",
+        "xaurub_at", "xauusd_at", "last_seen",
+    )
+
+    def __init__(self, chat_id: int):
+        self.chat_id = chat_id
+        self.last_xaurub_price: Optional[float] = None  # Son XAURUB fiyatı (artış uygulanmış)
+        self.last_xauusd_price: Optional[float] = None  # Son XAUUSD fiyatı
+        self.last_increment: Optional[float] = None     # Son yüzde artış/azalış
+        self.xaurub_at: Optional[datetime] = None
+        self.xauusd_at: Optional[datetime] = None
+        self.last_seen = time.monotonic()
+
+    def record_prices(self, xaurub_price: float, xauusd_price: Optional[float], increment: float):
+        """Fiyat sorgusunun sonucunu kaydet"""
+        now = datetime.now()
+        self.last_xaurub_price = xaurub_price
+        self.last_increment = increment
+        self.xaurub_at = now
+        if xauusd_price:
+            self.last_xauusd_price = xauusd_price
+            self.xauusd_at = now
+
+
+class ChatSessionStore:
+    """
+    chat_id → ChatSession, O(1) erişim
+    - OrderedDict son erişim sırasını tutar (en eski başta)
+    - Kapasite dolunca en uzun süredir erişilmeyen chat atılır (LRU)
+    - TTL'i geçen oturumlar erişimde ve eklemede temizlenir
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl: float = 86400):
+        self.max_sessions = max(1, max_sessions)
+        self.ttl = ttl
+        self._sessions: "OrderedDict[int, ChatSession]" = OrderedDict()
+
+        # İstatistikler
+        self.stats = {"created": 0, "evicted_lru": 0, "evicted_ttl": 0}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _expired(self, session: ChatSession, now: float) -> bool:
+        return now - session.last_seen > self.ttl
+
+    def _purge_expired(self, now: float):
+        # En eski oturumlar baştadır; ilk taze oturumda durulur
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if not self._expired(session, now):
+                break
+            self._sessions.popitem(last=False)
+            self.stats["evicted_ttl"] += 1
+
+    def get(self, chat_id: int) -> Optional[ChatSession]:
+        """Chat oturumunu döndür (yoksa veya süresi dolduysa None)"""
+        session = self._sessions.get(chat_id)
+        if session is None:
+            return None
+        now = time.monotonic()
+        if self._expired(session, now):
+            del self._sessions[chat_id]
+            self.stats["evicted_ttl"] += 1
+            return None
+        session.last_seen = now
+        self._sessions.move_to_end(chat_id)
+        return session
+
+    def get_or_create(self, chat_id: int) -> ChatSession:
+        """Chat oturumunu döndür, yoksa oluştur"""
+        session = self.get(chat_id)
+        if session is not None:
+            return session
+
+        self._purge_expired(time.monotonic())
+        while len(self._sessions) >= self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.stats["evicted_lru"] += 1
+
+        session = ChatSession(chat_id)
+        self._sessions[chat_id] = session
+        self.stats["created"] += 1
+        return session
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "active": len(self._sessions), "max": self.max_sessions}
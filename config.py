@@ -9,14 +9,83 @@ BOT_TOKEN = os.getenv("BOT_TOKEN_DIFFERENT", "YENİ_TOKEN_BURAYA")
 # Örnek token formatı:
 # BOT_TOKEN = "123456789:ABCdefGHIjklMNOpqrsTUVwxyz"
 
+# Çalışma Modu
+BOT_MODE = os.getenv("BOT_MODE", "polling")       # "polling" veya "webhook"
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")        # Telegram'ın eriştiği dış adres (ör. https://bot.example.com)
+WEBHOOK_PATH = "/telegram"                         # Update'lerin POST edildiği yol
+WEBHOOK_LISTEN = "0.0.0.0"                         # Yerel aiohttp sunucusunun dinlediği adres
+WEBHOOK_PORT = int(os.getenv("PORT", "8080"))      # Railway PORT'u environment'tan verir
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")   # Boşsa her başlangıçta rastgele üretilir
+
 # Diğer ayarlar
 PRICE_UPDATE_TIMEOUT = 8  # Saniye cinsinden timeout süresi (15s → 8s)
 DEFAULT_INCREMENT = 0.01   # Varsayılan artış miktarı
 
 # Browser ve Hız Optimizasyon Ayarları
 BROWSER_TYPE = "chromium"  # "chromium", "firefox", "webkit" - chromium daha stabil
-PAGE_LOAD_WAIT = 1.5       # Sayfa yükleme bekleme süresi (3s → 1.5s)
+PAGE_READY_TIMEOUT_MIN = 2.0     # Uyarlanabilir sayfa hazır olma bütçesinin alt sınırı (saniye)
+PAGE_READY_TIMEOUT_MAX = 8.0     # Üst sınır; yeterli ölçüm yokken bu kullanılır
+PAGE_READY_TIMEOUT_FACTOR = 2.0  # Bütçe = gözlemlenen p95 hazır olma süresi × bu çarpan
+
+# ProFinance History Feed Ayarları (birincil XAURUB kaynağı)
+ENABLE_HISTORY_FEED = True     # charts.profinance.ru history endpoint'ini önce dene
+PROFINANCE_SID_MAX_AGE = 600   # SID bu kadar saniye tekrar kullanılır, sonra yenilenir
+HISTORY_MAX_TICKS = 1000       # Bellekte tutulacak maksimum tick sayısı
+HISTORY_FEED_TIMEOUT = 5.0     # History feed yanıtı için en fazla bekleme (saniye)
+HISTORY_TICK_MAX_AGE = 120     # Bundan eski (yeni tick gelmemiş) history kotasyonu güncel sayılmaz (saniye)
+
+# ProFinance HTML Engine Ayarları (browser'sız hızlı yol)
+ENABLE_HTML_ENGINE = True   # Önce aiohttp + HTML parse dene, olmazsa Playwright'a geç
+HTML_ENGINE_TIMEOUT = 5.0   # HTML engine istek timeout süresi (saniye)
 ENABLE_BROWSER_OPTIMIZATION = True  # Browser optimizasyonlarını etkinleştir
+BROWSER_POOL_SIZE = 2      # Havuzda aynı anda açık tutulacak sayfa sayısı
+BROWSER_POOL_MAX_IDLE = 6  # Rota (proxy) bazında sıcak tutulan boş sayfa üst sınırı (rotasyon top-k + direct)
+BROWSER_PAGE_MAX_USES = 50  # Bir sayfa bu kadar kullanımdan sonra yenilenir
+
+# TradingView Resident Sayfa Ayarları
+ENABLE_RESIDENT_XAUUSD_PAGE = True  # XAUUSD sayfasını açık tut, fiyatı push ile al
+RESIDENT_PAGE_STALE_TIMEOUT = 30    # Bu kadar saniye heartbeat gelmezse sayfa bayat sayılır
+RESIDENT_PAGE_MAX_QUIET = 300       # Fiyat bu kadar saniye değişmezse sayfa yeniden yüklenir
+
+# XAUUSD Aggregator Ayarları
+ENABLE_XAUUSD_AGGREGATOR = True  # XAUUSD'yi birden fazla kaynaktan konsensüsle al
+XAUUSD_AGG_SOURCES = [           # Kullanılacak kaynaklar (kütüphanesi olmayanlar atlanır)
+    "tradingview_chart", "tradingview_simple", "tradingview_ws", "tvdatafeed",
+]                                # yfinance GC=F vadeli fiyat: konsensüse değil güvenlik kontrolüne girer
+XAUUSD_AGG_DEADLINE = 4.0        # Kaynaklar için toplam bekleme süresi (saniye)
+XAUUSD_AGG_TOLERANCE = 0.5       # Konsensüsle uyum toleransı (%)
+XAUUSD_AGG_TRUST_WEIGHT = 0.7    # Bu ağırlığın üstündeki kaynağın ilk fiyatı beklemeden kabul edilir
+XAUUSD_AGG_LEARNING_RATE = 0.1   # Ağırlık öğrenme hızı (EWMA)
+TVDATAFEED_MAX_WORKERS = 1       # tvDatafeed (senkron) çağrıları için ayrı thread havuzu boyutu
+
+# ProFinance Watcher Ayarları
+ENABLE_PROFINANCE_WATCHER = False       # Tablo sayfasını açık tut, her yeni tick'i push ile al
+PROFINANCE_WATCHER_STALE_TIMEOUT = 30   # Bu kadar saniye heartbeat gelmezse watcher bayat sayılır
+PROFINANCE_WATCHER_MAX_QUIET = 60       # Tablo bu kadar saniye değişmezse sayfa yeniden yüklenir
+
+# Arka Plan Fiyat Tazeleyici Ayarları
+ENABLE_BACKGROUND_POLLER = True  # Fiyatları arka planda tazele, istekler hafızadan cevaplansın
+PRICE_POLL_INTERVAL = 10         # XAURUB / XAUUSD tazeleme aralığı (saniye)
+PRICE_FRESHNESS_SECONDS = 15     # Bundan yaşlı XAURUB / XAUUSD değeri istekte yeniden çekilir
+
+# yfinance Ayarları
+YF_MAX_WORKERS = 2          # yfinance çağrıları için thread havuzu boyutu (event loop bloklanmaz)
+YF_DOWNLOAD_TIMEOUT = 15.0  # Toplu indirme (GC=F + USDRUB=X) timeout süresi (saniye)
+YF_CACHE_TTL = {            # Ticker başına taze sayılma süresi (saniye)
+    "GC=F": 60,             # Altın vadeli daha hızlı değişir
+    "USDRUB=X": 300,        # Kur doğrulama için daha uzun süre yeterli
+}
+YF_CACHE_MAX_STALE = 1800   # Bayat değer arka planda yenilenirken en fazla bu yaşa kadar verilir
+YF_NEGATIVE_CACHE_TTL = 30  # Başarısız indirmeden sonra bu süre yeniden denenmez (saniye)
+
+# Update İşleme Ayarları
+MAX_CONCURRENT_UPDATES = 32  # Aynı anda işlenen fiyat çeken update sayısı (aynı chat'in mesajları yine sırayla)
+FAST_LANE_CONCURRENCY = 8    # Ağ gerektirmeyen update'ler (bölme, /start, /help) için ayrı slot sayısı
+MAX_PENDING_UPDATES = 1024   # İşlenen + sırada bekleyen toplam update sınırı
+
+# Chat Oturum Ayarları
+CHAT_SESSION_MAX = 10000  # Hafızada tutulacak maksimum chat sayısı (en eskisi atılır)
+CHAT_SESSION_TTL = 86400  # Bu kadar saniye işlem yapmayan chat'in oturumu silinir
 
 # Instance Kontrol Ayarları
 ENABLE_INSTANCE_CONTROL = False  # Railway'de geçici olarak kapatıldı
@@ -27,13 +96,45 @@ TIMEZONE = "Europe/Istanbul"  # Türkiye saati
 
 # Fiyat Doğrulama Ayarları
 PRICE_VALIDATION_TOLERANCE = 5.0  # %5 tolerans (anormallik tespiti için)
+VALIDATION_DEADLINE = 6.0  # yfinance doğrulaması istek başından itibaren en fazla bu kadar beklenir (saniye)
+
+# İstek Süre Bütçesi
+REQUEST_DEADLINE = 3.0        # İlk cevap en geç bu sürede gider; eksikler son bilinen değerle gösterilir (saniye)
+REQUEST_LATE_DEADLINE = 15.0  # Geç gelen sonuçlar bu süreye kadar mesaja işlenir, fetcher'lara da bu deadline iletilir (saniye)
+PROGRESSIVE_PLACEHOLDER_DELAY = 0.3  # Cevap bu sürede hazırsa "çekiliyor" mesajı hiç gönderilmez (saniye)
+PROGRESSIVE_EDIT_INTERVAL = 1.0      # Aynı mesajın iki düzenlemesi arası en az süre - Telegram limiti (saniye)
 
 # Cache Ayarları
 CACHE_DURATION = 3.0  # Cache süresi (saniye) - 3 saniye içinde tekrar istek varsa cache'den ver
 
+# Anti-bot Ayarları
+ENABLE_ANTI_BOT_JITTER = True  # Aynı proxy/IP art arda kullanılırken rastgele aralık bırak
+ANTI_BOT_MIN_SPACING = 1.0     # Aynı çıkış noktası için istekler arası min. aralık (saniye)
+ANTI_BOT_MAX_SPACING = 3.0     # Aynı çıkış noktası için istekler arası maks. aralık (saniye)
+
+# Hedge Ayarları (ProFinance isteği birden fazla rota üzerinden)
+HEDGE_POLICY = "delayed"  # "off": tek rota, "delayed": gecikmeli ikinci deneme, "aggressive": hepsi aynı anda
+HEDGE_DELAY = 1.5         # "delayed" modda ikinci rota bu kadar saniye sonra başlar
+HEDGE_MAX_ROUTES = 2      # Bir istekte denenecek maksimum rota (proxy / doğrudan bağlantı) sayısı
+
 # Proxy Ayarları
 ENABLE_PROXY = True  # Proxy kullanımını etkinleştir
 PROXY_UPDATE_INTERVAL = 6  # Proxy listesi güncelleme aralığı (saat)
 PROXY_TEST_TIMEOUT = 10  # Proxy test timeout süresi (saniye)
 PROXY_MAX_CONCURRENT_TESTS = 50  # Maksimum eşzamanlı proxy testi
 PROXY_TEST_URL = "http://httpbin.org/ip"  # Proxy test URL'i
+PROXY_TARGET_WORKING = 20  # Bu kadar çalışan proxy bulununca tarama durur
+PROXY_SCAN_MIN_CONCURRENCY = 10   # Timeout'lar artınca eşzamanlılık en fazla buraya iner
+PROXY_SCAN_MAX_CONCURRENCY = 200  # Timeout'lar olağan kaldıkça eşzamanlılık en fazla buraya çıkar
+PROXY_SOURCE_TIMEOUT = 15  # Proxy listesi kaynaklarının toplam indirme süresi sınırı (saniye)
+PROXY_HEALTH_ALPHA = 0.3         # Gecikme EWMA katsayısı (büyük: son ölçümler daha etkili)
+PROXY_COOLDOWN = 30              # Hatadan sonra proxy'nin seçilmediği süre, art arda hatalarda katlanır (saniye)
+PROXY_MAX_COOLDOWN = 600         # Cooldown üst sınırı (saniye)
+PROXY_DROP_AFTER_FAILURES = 5    # Art arda bu kadar hata veren proxy düşürülür
+PROXY_DROP_FAILURE_RATE = 0.8    # En az 10 denemede hata oranı bunu aşan proxy düşürülür
+PROXY_ROTATION_TOP_K = 5         # Rotasyon: en iyi bu kadar proxy arasından skora göre ağırlıklı rastgele seçilir
+ENABLE_PROXY_MAINTAINER = True   # Çalışan proxy havuzunu arka planda yeniden test et ve tamamla
+PROXY_MAINTAIN_INTERVAL = 60     # Bakım turları arası süre (saniye)
+PROXY_STANDBY_SIZE = 10          # Rotasyon dışında hazır bekletilen test edilmiş yedek proxy sayısı
+PROXY_REVALIDATE_SAMPLE = 5      # Her turda çalışan ve yedek listeden yeniden test edilen proxy sayısı
+PROXY_MAINTAIN_SCAN_LIMIT = 500  # Eksik tamamlarken bir turda bakılan en fazla aday
@@ -1,9 +1,118 @@
 import asyncio
+import inspect
+import time
+from collections import deque
 from datetime import datetime
-from playwright.async_api import async_playwright
-
-from config import BROWSER_TYPE, PAGE_LOAD_WAIT, CACHE_DURATION, ENABLE_PROXY
+from typing import Any, Callable, Optional
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from browser_pool import BrowserPool
+from browser_service import browser_service
+from config import (
+    BROWSER_TYPE, CACHE_DURATION, ENABLE_PROXY,
+    BROWSER_POOL_SIZE, BROWSER_PAGE_MAX_USES, BROWSER_POOL_MAX_IDLE,
+    PROFINANCE_WATCHER_STALE_TIMEOUT, PROFINANCE_WATCHER_MAX_QUIET,
+    PAGE_READY_TIMEOUT_MIN, PAGE_READY_TIMEOUT_MAX, PAGE_READY_TIMEOUT_FACTOR,
+    ENABLE_ANTI_BOT_JITTER, ANTI_BOT_MIN_SPACING, ANTI_BOT_MAX_SPACING,
+    ENABLE_HTML_ENGINE, HTML_ENGINE_TIMEOUT, ENABLE_HISTORY_FEED,
+    HEDGE_POLICY, HEDGE_DELAY, HEDGE_MAX_ROUTES, HISTORY_FEED_TIMEOUT,
+)
+from profinance_history_fetcher import ProFinanceHistoryFetcher
+from profinance_html_engine import BlockPageError, ProFinanceHtmlEngine
 from proxy_manager import ProxyManager
+from readiness import JitterBudget, ReadinessTracker, time_left, wait_for_ready
+from single_flight import SingleFlight
+
+
+# Proxy'siz doğrudan bağlantının rota anahtarı
+DIRECT_ROUTE = "direct"
+
+# Page fingerprinting koruması
+STEALTH_INIT_SCRIPT = """
+    // WebDriver özelliğini gizle
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined,
+    });
+    
+    // Chrome özelliklerini gizle
+    Object.defineProperty(navigator, 'plugins', {
+        get: () => [1, 2, 3, 4, 5],
+    });
+    
+    // Permissions API'yi gizle
+    const originalQuery = window.navigator.permissions.query;
+    window.navigator.permissions.query = (parameters) => (
+        parameters.name === 'notifications' ?
+            Promise.resolve({ state: Notification.permission }) :
+            originalQuery(parameters)
+    );
+"""
+
+# Ana tablodan (4. tablo) kotasyonu çıkaran sayfa fonksiyonu
+# "Last boşsa bir sonraki satıra bak" mantığı sayfa içinde çalışır
+PROFINANCE_QUOTE_JS = """
+() => {
+    const tables = document.querySelectorAll('table');
+    if (tables.length < 4) return null;
+    const rows = tables[3].querySelectorAll('tr');
+    if (rows.length < 2) return null;
+    const cellsOf = (row) => Array.from(row.querySelectorAll('td')).map(td => (td.innerText || td.textContent || '').trim());
+    const headers = cellsOf(rows[0]);
+    const first = cellsOf(rows[1]);
+    if (first.length < 3) return null;
+    let last = first[2];
+    let time = first[3] || '';
+    if (!last && rows.length > 2) {
+        const next = cellsOf(rows[2]);
+        if (next.length >= 3) {
+            last = next[2];
+            time = next[3] || '';
+        }
+    }
+    return { headers, bid: first[0], ask: first[1], last, time };
+}
+"""
+
+# Hazır olma koşulu: 4. tabloda sayısal bir Last değeri var mı?
+PROFINANCE_READY_JS = """
+() => {
+    const quote = (%s)();
+    return !!(quote && quote.last && !isNaN(parseFloat(quote.last.replace(',', '.'))));
+}
+""" % PROFINANCE_QUOTE_JS.strip()
+
+# Watcher modu: tablo değiştikçe kotasyonu Python'a iten script
+PROFINANCE_WATCHER_SCRIPT = """
+(() => {
+    if (window.__profinanceWatcherInstalled) return;
+    window.__profinanceWatcherInstalled = true;
+
+    const readQuote = %s;
+    const push = () => {
+        const quote = readQuote();
+        if (quote && quote.last) window.onProfinanceQuote(quote);
+    };
+
+    const start = () => {
+        let pending = false;
+        new MutationObserver(() => {
+            if (pending) return;
+            pending = true;
+            setTimeout(() => { pending = false; push(); }, 50);
+        }).observe(document.body, { subtree: true, childList: true, characterData: true });
+        push();
+        // Heartbeat: sayfanın canlı olduğunu Python tarafına bildir
+        setInterval(push, 5000);
+    };
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', start);
+    } else {
+        start();
+    }
+})();
+""" % PROFINANCE_QUOTE_JS.strip()
 
 
 class FastPriceFetcher:
@@ -56,6 +165,234 @@ class FastPriceFetcher:
             "cache_duration": CACHE_DURATION  # Config'den al
         }
 
+        # Birincil kaynak: history endpoint'inden artımlı tick akışı
+        self.history_feed = ProFinanceHistoryFetcher() if ENABLE_HISTORY_FEED else None
+
+        # Browser'sız HTML engine (havuzlanmış aiohttp bağlantısı)
+        self.html_engine = ProFinanceHtmlEngine(self.url, timeout=HTML_ENGINE_TIMEOUT)
+
+        # İçerik tabanlı hazır olma takibi ve proxy başına anti-bot bütçesi
+        self.readiness = ReadinessTracker(
+            min_timeout=PAGE_READY_TIMEOUT_MIN,
+            max_timeout=PAGE_READY_TIMEOUT_MAX,
+            factor=PAGE_READY_TIMEOUT_FACTOR,
+        )
+        self.jitter_budget = JitterBudget(ANTI_BOT_MIN_SPACING, ANTI_BOT_MAX_SPACING)
+
+        # Eşzamanlı fiyat isteklerini tek upstream fetch'inde birleştir
+        self.single_flight = SingleFlight("profinance")
+
+        # Hedge edilmiş istekler: rota (proxy / direct) bazında kazanma geçmişi
+        self.route_stats: dict[str, dict] = {}
+        self.preferred_route: Optional[str] = None
+
+        # Uzun ömürlü sayfa havuzları (paylaşılan browser üzerinde, browser tipine göre)
+        self.browser_pools: dict[str, BrowserPool] = {}
+
+        # Watcher modu (tablo sayfası açık kalır, her yeni satır push ile gelir)
+        self.watcher_context = None
+        self.watcher_page = None
+        self.latest_quote: Optional[dict] = None
+        self.ticks: deque = deque(maxlen=500)
+        self.tick_listeners: list[Callable[[dict], Any]] = []
+        self.watcher_seen_at: float = 0.0     # Son heartbeat/push (monotonic)
+        self.watcher_changed_at: float = 0.0  # Son yeni tick (monotonic)
+        self.watcher_reloads = 0
+        self._watcher_task: Optional[asyncio.Task] = None
+        self._watcher_crashed = False
+
+    def _get_browser_pool(self, browser_type: str) -> BrowserPool:
+        """Browser tipine ait havuzu döndür (yoksa oluştur)"""
+        pool = self.browser_pools.get(browser_type)
+        if pool is None:
+            pool = BrowserPool(
+                browser_type=browser_type,
+                size=BROWSER_POOL_SIZE,
+                max_uses=BROWSER_PAGE_MAX_USES,
+                max_idle=BROWSER_POOL_MAX_IDLE,
+                # Tablo sunucu tarafında render ediliyor, JavaScript gereksiz
+                context_options={"java_script_enabled": False},
+                page_setup=self._setup_page,
+            )
+            self.browser_pools[browser_type] = pool
+        return pool
+
+    async def _setup_page(self, page):
+        """Havuza giren her sayfaya bir kez uygulanan hazırlık"""
+        await page.add_init_script(STEALTH_INIT_SCRIPT)
+        # Ağ optimizasyonu: ağır kaynakları engelle
+        await page.route("**/*", self._route_filter)
+
+    @staticmethod
+    async def _route_filter(route, request):
+        try:
+            if request.resource_type in ["image", "stylesheet", "font", "media", "other"]:
+                await route.abort()
+            else:
+                await route.continue_()
+        except Exception:
+            try:
+                await route.continue_()
+            except Exception:
+                pass
+
+    async def start_browser_pool(self):
+        """Browser havuzunu önceden başlat (soğuk başlangıcı istek yolundan çıkarır)"""
+        try:
+            await self._get_browser_pool(BROWSER_TYPE).start()
+        except Exception as e:
+            print(f"⚠️ Browser havuzu başlatılamadı: {e}")
+
+    async def close(self):
+        """Watcher'ı, HTML engine'i ve browser havuzlarını kapat (paylaşılan browser servisi ayrıca kapatılır)"""
+        await self.stop_watcher()
+        await self.html_engine.close()
+        if self.history_feed:
+            await self.history_feed.close()
+        pools, self.browser_pools = self.browser_pools, {}
+        for pool in pools.values():
+            await pool.close()
+
+    def add_tick_listener(self, callback: Callable[[dict], Any]):
+        """Her yeni tick'te çağrılacak callback ekle (sync veya async)"""
+        self.tick_listeners.append(callback)
+
+    async def start_watcher(self, callback: Callable[[dict], Any] = None):
+        """
+        Watcher modunu başlat: tablo sayfası açık kalır,
+        her yeni Bid/Ask/Last satırı MutationObserver ile Python'a itilir
+        """
+        if callback:
+            self.add_tick_listener(callback)
+        if self._watcher_task and not self._watcher_task.done():
+            return
+        self._watcher_task = asyncio.create_task(self._watcher_loop())
+        print("📌 ProFinance watcher modu başlatıldı")
+
+    async def _open_watcher_page(self):
+        """Watcher context'ini ve sayfasını (yeniden) aç"""
+        await self._close_watcher_page()
+
+        context_options = {"user_agent": self.headers["User-Agent"]}
+        if self.current_proxy:
+            context_options["proxy"] = {"server": self.current_proxy['proxy']}
+
+        # Observer için JavaScript açık olmalı
+        self.watcher_context = await browser_service.new_context(**context_options)
+        await self.watcher_context.expose_binding("onProfinanceQuote", self._on_watcher_quote)
+        await self.watcher_context.add_init_script(STEALTH_INIT_SCRIPT)
+        await self.watcher_context.add_init_script(PROFINANCE_WATCHER_SCRIPT)
+        await self.watcher_context.route("**/*", self._route_filter)
+
+        self.watcher_page = await self.watcher_context.new_page()
+        self._watcher_crashed = False
+        self.watcher_page.on("crash", lambda _: self._mark_watcher_crashed())
+
+        now = time.monotonic()
+        self.watcher_seen_at = now
+        self.watcher_changed_at = now
+        await self.watcher_page.goto(self.url, wait_until="domcontentloaded", timeout=15000)
+
+    def _mark_watcher_crashed(self):
+        print("⚠️ ProFinance watcher sayfası çöktü")
+        self._watcher_crashed = True
+
+    @staticmethod
+    def _to_float(text) -> Optional[float]:
+        try:
+            value = float(str(text).strip().replace(',', '.'))
+        except (TypeError, ValueError):
+            return None
+        return value if value > 0 else None
+
+    def _on_watcher_quote(self, source, quote: dict):
+        """Sayfadaki observer'dan gelen kotasyonu işle (binding callback)"""
+        last = self._to_float(quote.get("last")) if quote else None
+        if last is None:
+            return
+
+        now = time.monotonic()
+        self.watcher_seen_at = now
+
+        tick = {
+            "bid": self._to_float(quote.get("bid")),
+            "ask": self._to_float(quote.get("ask")),
+            "last": last,
+            "time": (quote.get("time") or "").strip(),
+        }
+        previous = self.latest_quote
+        if previous and all(previous[k] == tick[k] for k in ("bid", "ask", "last", "time")):
+            return  # Heartbeat, yeni tick yok
+
+        tick["received_at"] = datetime.now()
+        self.latest_quote = tick
+        self.watcher_changed_at = now
+        self.ticks.append(tick)
+
+        for listener in self.tick_listeners:
+            try:
+                result = listener(tick)
+                if inspect.isawaitable(result):
+                    asyncio.ensure_future(result)
+            except Exception as e:
+                print(f"⚠️ Tick listener hatası: {e}")
+
+    def _watcher_needs_reload(self) -> bool:
+        """Sayfa çöktü, kapandı, heartbeat kesildi veya tablo uzun süredir değişmiyorsa True"""
+        if self.watcher_page is None or self.watcher_page.is_closed() or self._watcher_crashed:
+            return True
+        now = time.monotonic()
+        if now - self.watcher_seen_at > PROFINANCE_WATCHER_STALE_TIMEOUT:
+            return True
+        return now - self.watcher_changed_at > PROFINANCE_WATCHER_MAX_QUIET
+
+    async def _watcher_loop(self):
+        """Watcher sayfasını canlı tut; bayatlarsa veya çökerse yeniden yükle"""
+        while True:
+            try:
+                if self._watcher_needs_reload():
+                    if self.watcher_page is not None:
+                        self.watcher_reloads += 1
+                        print(f"🔄 ProFinance watcher sayfası yeniden yükleniyor (#{self.watcher_reloads})")
+                    await self._open_watcher_page()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Watcher sayfa hatası: {e}")
+                self.watcher_page = None
+            await asyncio.sleep(5)
+
+    def get_watcher_price(self) -> Optional[float]:
+        """Watcher'dan gelen son Last fiyatını döndür (sayfa canlı değilse None)"""
+        if self.latest_quote is None:
+            return None
+        if self.watcher_page is None or self._watcher_crashed:
+            return None
+        if time.monotonic() - self.watcher_seen_at > PROFINANCE_WATCHER_STALE_TIMEOUT:
+            return None
+        return self.latest_quote["last"]
+
+    async def _close_watcher_page(self):
+        try:
+            if self.watcher_context:
+                await self.watcher_context.close()
+        except Exception:
+            pass
+        self.watcher_context = None
+        self.watcher_page = None
+
+    async def stop_watcher(self):
+        """Watcher modunu durdur"""
+        if self._watcher_task:
+            self._watcher_task.cancel()
+            try:
+                await self._watcher_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._watcher_task = None
+            print("📌 ProFinance watcher modu durduruldu")
+        await self._close_watcher_page()
+
     def _rotate_proxy_and_ua(self):
         """User-Agent ve Proxy rotation"""
         # User-Agent rotation
@@ -64,15 +401,15 @@ class FastPriceFetcher:
         self.headers["User-Agent"] = new_ua
         
         # Proxy rotation (eğer proxy sistemi aktifse)
-        if self.proxy_manager and self.proxy_manager.working_proxies:
-            self.current_proxy = self.proxy_manager.get_next_proxy()
+        next_proxy = self.proxy_manager.get_next_proxy() if self.proxy_manager else None
+        if next_proxy:
+            self.current_proxy = next_proxy
             print(f"🔄 Proxy değiştirildi: {self.current_proxy['proxy']}")
         else:
             print(f"🔄 User-Agent değiştirildi: {self.current_ua_index}")
     
     def _is_cache_valid(self) -> bool:
         """Cache'in geçerli olup olmadığını kontrol et"""
-        import time
         current_time = time.time()
         
         if self.cache["price"] is None:
@@ -83,7 +420,6 @@ class FastPriceFetcher:
     
     def _update_cache(self, price: float):
         """Cache'i güncelle"""
-        import time
         self.cache["price"] = price
         self.cache["timestamp"] = time.time()
         print(f"💾 Cache güncellendi: {price:.4f} RUB ({CACHE_DURATION}s TTL)")
@@ -143,7 +479,177 @@ class FastPriceFetcher:
             "price_history": self.price_history.copy(),
         }
 
-    async def get_current_price(self, browser_type: str = None) -> float:
+    async def _extract_quote(self, page) -> dict:
+        """Ana tablodan kotasyonu tek page.evaluate çağrısıyla çıkar"""
+        quote = await page.evaluate(PROFINANCE_QUOTE_JS)
+        if not quote:
+            raise Exception("Tablo bulunamadı")
+        return quote
+
+    async def _extract_quote_elementwise(self, page) -> dict:
+        """
+        Eski yöntem: her başlık ve hücre için ayrı inner_text çağrısı
+        (Sadece latency karşılaştırması için tutuluyor)
+        """
+        tables = await page.query_selector_all("table")
+        if len(tables) < 4:
+            raise Exception("Tablo bulunamadı")
+
+        main_table = tables[3]
+        headers = await main_table.query_selector_all("tr:first-child td")
+        header_texts = [(await h.inner_text()).strip() for h in headers] if headers else []
+
+        data_rows = await main_table.query_selector_all("tr:not(:first-child)")
+        if not data_rows:
+            raise Exception("Veri satırları bulunamadı")
+
+        cells = await data_rows[0].query_selector_all("td")
+        if len(cells) < 3:
+            raise Exception("Yetersiz hücre")
+
+        bid = await cells[0].inner_text()
+        ask = await cells[1].inner_text()
+        last = await cells[2].inner_text()
+        time_txt = await cells[3].inner_text() if len(cells) > 3 else ""
+
+        if not last or not last.strip():
+            if len(data_rows) > 1:
+                next_cells = await data_rows[1].query_selector_all("td")
+                if len(next_cells) >= 3:
+                    last = await next_cells[2].inner_text()
+                    time_txt = await next_cells[3].inner_text() if len(next_cells) > 3 else ""
+
+        return {
+            "headers": header_texts,
+            "bid": bid.strip(),
+            "ask": ask.strip(),
+            "last": last.strip(),
+            "time": time_txt.strip(),
+        }
+
+    async def benchmark_extraction(self, rounds: int = 20) -> dict:
+        """
+        Tek round-trip çıkarma ile eski hücre hücre yöntemin latency karşılaştırması
+        Sayfa bir kez yüklenir, iki yöntem aynı DOM üzerinde sırayla ölçülür
+        """
+        results = {"evaluate": [], "elementwise": []}
+        browser_pool = self._get_browser_pool(BROWSER_TYPE)
+        async with browser_pool.page(headers=self.headers) as page:
+            await page.goto(self.url, wait_until="domcontentloaded", timeout=15000)
+            if not await wait_for_ready(page, PROFINANCE_READY_JS, time.monotonic() + 8):
+                raise Exception("Tablo hazır olmadı")
+
+            for _ in range(rounds):
+                start = time.perf_counter()
+                await self._extract_quote(page)
+                results["evaluate"].append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                await self._extract_quote_elementwise(page)
+                results["elementwise"].append(time.perf_counter() - start)
+
+        summary = {}
+        for name, samples in results.items():
+            samples.sort()
+            summary[name] = {
+                "median_ms": samples[len(samples) // 2] * 1000,
+                "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+            }
+        return summary
+
+    async def _apply_jitter(self, proxy_server: Optional[str], deadline: Optional[float] = None):
+        """
+        Anti-bot gecikmesi: aynı çıkış noktası art arda kullanılıyorsa bütçe kadar bekle
+        Bekleme istek süresinden düşer; kalan sürenin en fazla yarısı beklenir (fetch'e de süre kalsın)
+        """
+        jitter_key = proxy_server or DIRECT_ROUTE
+        if ENABLE_ANTI_BOT_JITTER:
+            jitter_delay = self.jitter_budget.delay_for(jitter_key)
+            if deadline is not None:
+                jitter_delay = min(jitter_delay, time_left(deadline, jitter_delay) / 2)
+            if jitter_delay > 0:
+                print(f"🎲 Anti-bot gecikmesi: {jitter_delay:.1f} saniye ({jitter_key})")
+                await asyncio.sleep(jitter_delay)
+        self.jitter_budget.mark(jitter_key)
+
+    async def _fetch_quote_via_html(self, proxy_server: Optional[str], deadline: Optional[float] = None) -> Optional[dict]:
+        """Browser'sız HTML engine ile dene; başarısızsa None (Playwright'a geçilir)"""
+        try:
+            start = time.perf_counter()
+            timeout = time_left(deadline, HTML_ENGINE_TIMEOUT)
+            if timeout <= 0:
+                raise Exception("İstek süresi doldu")
+            quote = await self.html_engine.fetch_quote(self.headers, proxy=proxy_server, timeout=timeout)
+            print(f"⚡ HTML engine ile alındı: {(time.perf_counter() - start) * 1000:.0f} ms")
+            return quote
+        except BlockPageError as e:
+            print(f"🛡️ {e}, Playwright'a geçiliyor")
+        except Exception as e:
+            print(f"⚠️ HTML engine hatası: {e}, Playwright'a geçiliyor")
+        return None
+
+    async def _fetch_quote_via_browser(
+        self, browser_type: str, proxy_server: Optional[str], deadline: Optional[float] = None
+    ) -> dict:
+        """Havuzdaki hazır bir sayfa ile tabloyu oku"""
+        browser_pool = self._get_browser_pool(browser_type)
+
+        # Havuzdan hazır sayfa al (header, init script ve route filtresi kurulu)
+        async with browser_pool.page(proxy_server=proxy_server, headers=self.headers) as page:
+            # Navigasyon + hazır olma tek bir uyarlanabilir süre bütçesini paylaşır
+            # (istek deadline'ı daha yakınsa ona kısaltılır)
+            budget = time_left(deadline, self.readiness.timeout())
+            if budget <= 0:
+                raise Exception("İstek süresi doldu")
+            nav_start = time.monotonic()
+            deadline = nav_start + budget
+
+            print(f"🔗 Sayfaya gidiyorum... (bütçe: {budget:.1f}s)")
+            try:
+                await page.goto(self.url, wait_until="domcontentloaded", timeout=budget * 1000)
+            except PlaywrightTimeoutError:
+                # Navigasyon aşımı da bütçeye geri beslenir (yoksa bütçe hiç büyümez)
+                self.readiness.record_timeout(budget)
+                raise
+
+            # Sabit bekleme yok: 4. tabloda sayısal Last değeri görünene kadar yokla
+            if not await wait_for_ready(page, PROFINANCE_READY_JS, deadline):
+                self.readiness.record_timeout(budget)
+                raise Exception(f"Tablo {budget:.1f}s içinde hazır olmadı")
+            time_to_ready = time.monotonic() - nav_start
+            self.readiness.record(time_to_ready)
+            print(f"⚡ Sayfa hazır: {time_to_ready:.2f} saniye")
+
+            # Tek round-trip: tüm tablo okuma mantığı sayfa içinde çalışır
+            return await self._extract_quote(page)
+
+    def _accept_quote(self, quote: dict) -> float:
+        """Kotasyonu doğrula, logla, analiz et ve cache'e yaz"""
+        print("📋 Tablo başlıkları:", quote["headers"])
+        last_price = self._to_float(quote["last"])
+        if not last_price:
+            raise Exception("Geçersiz fiyat")
+
+        print("✅ Fiyat başarıyla çekildi!")
+        print("   Bid:", quote["bid"])
+        print("   Ask:", quote["ask"])
+        print("   Last:", last_price)
+        print("   Zaman:", quote["time"])
+
+        # Analiz bilgisi (log)
+        analysis = self.analyze_price_change(last_price)
+        print("📊", analysis["message"])
+
+        # Cache'i güncelle
+        self._update_cache(last_price)
+
+        return last_price
+
+    async def get_current_price(self, browser_type: str = None, deadline: Optional[float] = None) -> float:
+        """
+        Güncel XAURUB fiyatı
+        deadline: time.monotonic() cinsinden son an; tüm alt adımlar buna göre kısaltılır
+        """
         # ✅ RATE LIMITING TAMAMEN KALDIRILDI!
         
         # Cache kontrolü - 3 saniye içinde tekrar istek varsa cache'den ver
@@ -151,6 +657,33 @@ class FastPriceFetcher:
             print(f"💾 Cache'den veri alınıyor: {self.cache['price']:.4f} RUB")
             print(f"⏱️ Cache yaşı: {time.time() - self.cache['timestamp']:.1f} saniye")
             return self.cache["price"]
+
+        # Watcher açıksa en son tick'i ağ beklemesi olmadan ver
+        watcher_price = self.get_watcher_price()
+        if watcher_price:
+            print(f"📌 Watcher'dan veri alınıyor: {watcher_price:.4f} RUB ({self.latest_quote['time']})")
+            return watcher_price
+
+        # Eşzamanlı istekler tek fetch'i paylaşır, sonuç cache'i herkes için doldurur
+        if self.single_flight.in_flight("xaurub"):
+            print("🔗 Devam eden ProFinance isteğine bağlanılıyor")
+        return await self.single_flight.do(
+            "xaurub", lambda: self._fetch_current_price(browser_type, deadline), deadline
+        )
+
+    async def _fetch_current_price(self, browser_type: str = None, deadline: Optional[float] = None) -> float:
+        # Birincil kaynak: history feed (sadece yeni tick'ler çekilir)
+        if self.history_feed:
+            try:
+                quote = await asyncio.wait_for(
+                    self.history_feed.get_latest_quote(), time_left(deadline, HISTORY_FEED_TIMEOUT)
+                )
+            except asyncio.TimeoutError:
+                quote = None
+            if quote:
+                print(f"📈 History feed'den alındı (tick {quote['age']:.0f} sn önce görüldü)")
+                return self._accept_quote(quote)
+            print("⚠️ History feed yanıt vermedi, tablo sayfasına geçiliyor")
         
         # Varsayılan motor ayarı
         if browser_type is None:
@@ -161,165 +694,143 @@ class FastPriceFetcher:
         
         # Proxy ve User-Agent rotation (her istekte)
         self._rotate_proxy_and_ua()
-        
-        # Proxy durumunu göster
-        if self.current_proxy:
-            print(f"🌐 Aktif Proxy: {self.current_proxy['proxy']}")
+
+        try:
+            quote = await self._fetch_quote_hedged(browser_type, deadline)
+            return self._accept_quote(quote)
+        except Exception as e:
+            print("❌ Browser API hatası:", e)
+            raise
+
+    async def _fetch_quote_on_route(self, browser_type: str, route: str, deadline: Optional[float] = None) -> dict:
+        """Tek rota üzerinden kotasyon al: önce HTML engine, olmazsa Playwright"""
+        proxy_server = None if route == DIRECT_ROUTE else route
+        if proxy_server:
+            print(f"🌐 ProFinance için Proxy kullanılıyor: {proxy_server}")
         else:
-            print("ℹ️ Proxy kullanılmıyor")
-        
-        async with async_playwright() as p:
-            browser = None
-            try:
-                # Browser başlat (fingerprinting koruması ile)
-                browser_args = [
-                    "--no-sandbox",
-                    "--disable-blink-features=AutomationControlled",
-                    "--disable-dev-shm-usage",
-                    "--disable-extensions",
-                    "--disable-plugins",
-                    "--disable-images",
-                    "--disable-javascript",
-                    "--disable-web-security",
-                    "--disable-features=VizDisplayCompositor",
-                    "--disable-ipc-flooding-protection"
-                ]
-                
-                if browser_type == "webkit":
-                    browser = await p.webkit.launch(headless=True)
-                elif browser_type == "firefox":
-                    browser = await p.firefox.launch(headless=True)
-                else:
-                    # Chromium için proxy ayarları
-                    browser_args = browser_args.copy()
-                    if self.current_proxy:
-                        proxy_server = f"{self.current_proxy['ip']}:{self.current_proxy['port']}"
-                        browser_args.extend([f"--proxy-server={proxy_server}"])
-                        print(f"🌐 ProFinance için Proxy kullanılıyor: {proxy_server}")
-                    else:
-                        print("ℹ️ ProFinance için proxy kullanılmıyor")
-                    
-                    browser = await p.chromium.launch(
-                        headless=True,
-                        args=browser_args
-                    )
-
-                page = await browser.new_page()
-                await page.set_extra_http_headers(self.headers)
-                
-                # Page fingerprinting koruması
-                await page.add_init_script("""
-                    // WebDriver özelliğini gizle
-                    Object.defineProperty(navigator, 'webdriver', {
-                        get: () => undefined,
-                    });
-                    
-                    // Chrome özelliklerini gizle
-                    Object.defineProperty(navigator, 'plugins', {
-                        get: () => [1, 2, 3, 4, 5],
-                    });
-                    
-                    // Permissions API'yi gizle
-                    const originalQuery = window.navigator.permissions.query;
-                    window.navigator.permissions.query = (parameters) => (
-                        parameters.name === 'notifications' ?
-                            Promise.resolve({ state: Notification.permission }) :
-                            originalQuery(parameters)
-                    );
-                """)
-
-                # Ağ optimizasyonu: ağır kaynakları engelle
-                async def _route_filter(route, request):
+            print("ℹ️ ProFinance için proxy kullanılmıyor")
+
+        # Anti-bot gecikmesi burada değil, hedge başlamadan önce uygulanır (_fetch_quote_hedged)
+        quote = await self._fetch_quote_via_html(proxy_server, deadline) if ENABLE_HTML_ENGINE else None
+        if quote is None:
+            quote = await self._fetch_quote_via_browser(browser_type, proxy_server, deadline)
+        if not self._to_float(quote["last"]):
+            raise Exception("Geçersiz fiyat")
+        return quote
+
+    def _hedge_routes(self) -> list:
+        """
+        Denenecek rotalar, öncelik sırasıyla:
+        son kazanan rota (hala kullanılabilirse), dönen proxy, doğrudan bağlantı
+        Proxy'ler sadece devresi kapalıysa (CLOSED) kullanılır; açık / yarı açık devreye istek gitmez
+        """
+        available = {DIRECT_ROUTE}
+        if self.proxy_manager:
+            health = self.proxy_manager.health
+            available.update(
+                p["proxy"] for p in self.proxy_manager.working_proxies
+                if health.state(p["proxy"]) == health.CLOSED
+            )
+
+        routes = []
+        if self.preferred_route in available:
+            routes.append(self.preferred_route)
+        if self.current_proxy and self.current_proxy["proxy"] in available and self.current_proxy["proxy"] not in routes:
+            routes.append(self.current_proxy["proxy"])
+        if DIRECT_ROUTE not in routes:
+            routes.append(DIRECT_ROUTE)
+
+        max_routes = 1 if HEDGE_POLICY == "off" else max(1, HEDGE_MAX_ROUTES)
+        return routes[:max_routes]
+
+    def _route_stat(self, route: str) -> dict:
+        return self.route_stats.setdefault(route, {"attempts": 0, "wins": 0, "failures": 0})
+
+    def _report_route(self, route: str, success: bool, latency: Optional[float] = None):
+        """Proxy rotasının gerçek sonucunu proxy sağlık modeline işle"""
+        if route != DIRECT_ROUTE and self.proxy_manager:
+            self.proxy_manager.report_result(route, success, latency)
+
+    async def _fetch_quote_hedged(self, browser_type: str, deadline: Optional[float] = None) -> dict:
+        """
+        Kotasyonu hedge ederek al
+        - "delayed": ilk deneme HEDGE_DELAY içinde bitmezse (veya hata verirse) sıradaki rota başlar
+        - "aggressive": tüm rotalar aynı anda başlar
+        İlk geçerli kotasyon kazanır, diğer denemeler iptal edilir
+        Anti-bot gecikmesi ilk rota için hedge saati başlamadan önce beklenir;
+        hedge denemeleri beklemez (gecikme HEDGE_DELAY'i yiyip hedge'i anlamsızlaştırmasın)
+        """
+        pending_routes = self._hedge_routes()
+        tasks: dict = {}
+        started: dict = {}
+        last_error: Optional[Exception] = None
+
+        if ENABLE_ANTI_BOT_JITTER:
+            # Beklemesiz kullanılabilecek bir rota varsa öne alınır (aralık kuralı bozulmadan gecikme yok)
+            free = [route for route in pending_routes if self.jitter_budget.delay_for(route) == 0]
+            if free and free[0] != pending_routes[0]:
+                pending_routes.remove(free[0])
+                pending_routes.insert(0, free[0])
+        await self._apply_jitter(None if pending_routes[0] == DIRECT_ROUTE else pending_routes[0], deadline)
+
+        def launch():
+            route = pending_routes.pop(0)
+            self.jitter_budget.mark(route)
+            self._route_stat(route)["attempts"] += 1
+            task = asyncio.create_task(self._fetch_quote_on_route(browser_type, route, deadline))
+            tasks[task] = route
+            started[task] = time.monotonic()
+
+        launch()
+        if HEDGE_POLICY == "aggressive":
+            while pending_routes:
+                launch()
+
+        try:
+            while tasks:
+                timeout = HEDGE_DELAY if pending_routes else None
+                if deadline is not None:
+                    timeout = time_left(deadline, HEDGE_DELAY if pending_routes else float("inf"))
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if deadline is not None and time.monotonic() >= deadline:
+                        raise asyncio.TimeoutError("İstek süresi doldu")
+                    print(f"🪁 {HEDGE_DELAY:.1f}s içinde yanıt yok, hedge isteği başlatılıyor ({pending_routes[0]})")
+                    launch()
+                    continue
+
+                for task in done:
+                    route = tasks.pop(task)
                     try:
-                        if request.resource_type in ["image", "stylesheet", "font", "media", "other"]:
-                            await route.abort()
-                        else:
-                            await route.continue_()
-                    except Exception:
-                        try:
-                            await route.continue_()
-                        except Exception:
-                            pass
-                await page.route("**/*", _route_filter)
-
-                print("🔗 Sayfaya gidiyorum...")
-                await page.goto(self.url, wait_until="domcontentloaded", timeout=8000)
-                
-                # Random delay ekle (bot tespitini zorlaştır)
-                import random
-                random_delay = random.uniform(1.0, 3.0)
-                print(f"🎲 Random delay: {random_delay:.1f} saniye")
-                await asyncio.sleep(random_delay)
-                
-                # Tablo görünene kadar bekle (daha stabil)
-                try:
-                    await page.wait_for_selector("table", timeout=4000)
-                except Exception:
-                    pass
-                await asyncio.sleep(PAGE_LOAD_WAIT)
-
-                # Tabloları bul
-                tables = await page.query_selector_all("table")
-                if len(tables) < 4:
-                    raise Exception("Tablo bulunamadı")
-
-                main_table = tables[3]
-
-                # Başlıklar
-                headers = await main_table.query_selector_all("tr:first-child td")
-                header_texts = [
-                    (await h.inner_text()).strip() for h in headers
-                ] if headers else []
-                print("📋 Tablo başlıkları:", header_texts)
-
-                # Veri satırları
-                data_rows = await main_table.query_selector_all("tr:not(:first-child)")
-                if not data_rows:
-                    raise Exception("Veri satırları bulunamadı")
-
-                # İlk satır
-                first_data_row = data_rows[0]
-                cells = await first_data_row.query_selector_all("td")
-                if len(cells) < 3:
-                    raise Exception("Yetersiz hücre")
-
-                bid = await cells[0].inner_text()
-                ask = await cells[1].inner_text()
-                last = await cells[2].inner_text()
-                time_txt = await cells[3].inner_text() if len(cells) > 3 else ""
-
-                if not last or not last.strip():
-                    print("⚠️ Last değeri boş, bir sonraki satırı kontrol ediyorum...")
-                    if len(data_rows) > 1:
-                        next_cells = await data_rows[1].query_selector_all("td")
-                        if len(next_cells) >= 3:
-                            last = await next_cells[2].inner_text()
-                            time_txt = await next_cells[3].inner_text() if len(next_cells) > 3 else ""
-
-                last_price = float(last.strip()) if last and last.strip() else None
-                if not last_price or last_price <= 0:
-                    raise Exception("Geçersiz fiyat")
-
-                print("✅ Fiyat başarıyla çekildi!")
-                print("   Bid:", bid)
-                print("   Ask:", ask)
-                print("   Last:", last_price)
-                print("   Zaman:", time_txt.strip())
-
-                # Analiz bilgisi (log)
-                analysis = self.analyze_price_change(last_price)
-                print("📊", analysis["message"])
-
-                # Cache'i güncelle
-                self._update_cache(last_price)
-
-                await browser.close()
-                return last_price
-            except Exception as e:
-                print("❌ Browser API hatası:", e)
-                if browser is not None:
-                    await browser.close()
-                raise
+                        quote = task.result()
+                    except Exception as e:
+                        last_error = e
+                        self._route_stat(route)["failures"] += 1
+                        self._report_route(route, False)
+                        print(f"⚠️ Rota başarısız ({route}): {e}")
+                        continue
+
+                    self._route_stat(route)["wins"] += 1
+                    self._report_route(route, True, time.monotonic() - started[task])
+                    self.preferred_route = route
+                    if tasks:
+                        print(f"🏁 Kazanan rota: {route} ({len(tasks)} deneme iptal ediliyor)")
+                    return quote
+
+                # Çalışan deneme kalmadıysa sıradakini beklemeden başlat
+                if not tasks and pending_routes:
+                    launch()
+
+            raise last_error or Exception("Hiçbir rota kotasyon döndürmedi")
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_route_stats(self) -> dict:
+        """Rota bazında deneme / kazanma / hata sayıları"""
+        return {"preferred": self.preferred_route, "routes": dict(self.route_stats)}
 
     async def get_price_plus_increment_async(self, increment: float = 0.01) -> dict:
         try:
@@ -336,20 +847,25 @@ class FastPriceFetcher:
             if not current_price:
                 raise Exception("Mevcut fiyat alınamadı")
 
-            percentage_increase = increment / 100.0
-            new_price = current_price * (1 + percentage_increase)
-            
-            return {
-                "current_price": current_price,
-                "increment": increment,
-                "new_price": new_price,
-                "increase_amount": new_price - current_price,
-                "percentage_increase": new_price - current_price,
-            }
+            return self.calculate_increment(current_price, increment)
         except Exception as e:
             print("❌ Fiyat hesaplama hatası:", e)
             raise
 
+    @staticmethod
+    def calculate_increment(current_price: float, increment: float) -> dict:
+        """Verilen fiyata yüzde artış/azalış uygula (ağ erişimi yok)"""
+        percentage_increase = increment / 100.0
+        new_price = current_price * (1 + percentage_increase)
+        
+        return {
+            "current_price": current_price,
+            "increment": increment,
+            "new_price": new_price,
+            "increase_amount": new_price - current_price,
+            "percentage_increase": new_price - current_price,
+        }
+
     async def initialize_proxy_manager(self):
         """
         Proxy manager'ı başlatır ve proxy listesini günceller
@@ -360,14 +876,8 @@ class FastPriceFetcher:
         try:
             print("🔄 Proxy sistemi başlatılıyor...")
             
-            # Proxy listesini güncelle
-            success = await self.proxy_manager.update_proxy_list()
-            if not success:
-                print("⚠️ Proxy listesi güncellenemedi, proxy olmadan devam ediliyor")
-                return
-            
-            # Proxy'leri test et
-            working_count = await self.proxy_manager.test_proxies(max_proxies=50)
+            # Liste inerken adaylar test edilir, yeterli çalışan proxy bulununca durulur
+            working_count = await self.proxy_manager.discover_proxies()
             
             if working_count > 0:
                 print(f"✅ {working_count} çalışan proxy bulundu")
@@ -383,10 +893,34 @@ class FastPriceFetcher:
 
 
 if __name__ == "__main__":
+    import sys
+
     fetcher = FastPriceFetcher()
+
+    async def _run_once():
+        try:
+            return await fetcher.get_price_plus_increment_async(0.01)
+        finally:
+            await fetcher.close()
+            await browser_service.close()
+
+    async def _run_benchmark():
+        try:
+            return await fetcher.benchmark_extraction()
+        finally:
+            await fetcher.close()
+            await browser_service.close()
+
+    if "--bench" in sys.argv:
+        summary = asyncio.run(_run_benchmark())
+        print("\n⏱️ TABLO ÇIKARMA LATENCY KARŞILAŞTIRMASI:")
+        for name, stats in summary.items():
+            print(f"   {name:12s} medyan: {stats['median_ms']:.2f} ms  p95: {stats['p95_ms']:.2f} ms")
+        sys.exit(0)
+
     try:
         start = datetime.now()
-        result = asyncio.run(fetcher.get_price_plus_increment_async(0.01))
+        result = asyncio.run(_run_once())
         dur = (datetime.now() - start).total_seconds()
         print("\n✅ HIZLI SİSTEM SONUÇ:")
         print(f"⏱️ Süre: {dur:.2f} saniye")
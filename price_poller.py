@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Price Poller - Arka planda fiyat kaynaklarını tazeleyen servis
+Kullanıcı istekleri upstream'i beklemez, hafızadaki son değerden cevaplanır
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+from readiness import time_left
+from single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class PriceSnapshot:
+    """
+    Bir kaynağın hafızadaki son değeri
+    """
+
+    def __init__(self, value: float, fetched_at: datetime, updated_at: float):
+        self.value = value
+        self.fetched_at = fetched_at  # Gösterim için duvar saati
+        self.updated_at = updated_at  # Yaş hesabı için monotonic
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.updated_at
+
+
+class PriceSource:
+    """
+    Arka planda tazelenen tek bir fiyat kaynağı
+    fetch(deadline=...): deadline time.monotonic() cinsinden son an
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fetch: Callable[..., Awaitable[Optional[float]]],
+        interval: float,
+        freshness: float,
+    ):
+        self.name = name
+        self.fetch = fetch
+        self.interval = interval
+        self.freshness = freshness
+        self.snapshot: Optional[PriceSnapshot] = None
+        self.last_error: Optional[str] = None
+        self.refresh_count = 0
+        self.error_count = 0
+
+
+class PricePoller:
+    """
+    Kaynakları kendi aralıklarıyla arka planda tazeler
+    - get(): anında hafızadaki snapshot
+    - get_fresh(): snapshot tazeyse onu, bayatsa zorla yeni değer
+    """
+
+    def __init__(self):
+        self.sources: Dict[str, PriceSource] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # Aynı kaynağın eşzamanlı tazelemeleri tek fetch'te birleşir
+        self.single_flight = SingleFlight("poller")
+
+    def add_source(
+        self,
+        name: str,
+        fetch: Callable[..., Awaitable[Optional[float]]],
+        interval: float,
+        freshness: float,
+    ):
+        """Tazelenecek yeni bir kaynak ekle"""
+        self.sources[name] = PriceSource(name, fetch, interval, freshness)
+
+    def get(self, name: str) -> Optional[PriceSnapshot]:
+        """Kaynağın son snapshot'ı (ağ beklemesi yok)"""
+        source = self.sources.get(name)
+        return source.snapshot if source else None
+
+    def is_fresh(self, name: str, max_age: Optional[float] = None) -> bool:
+        source = self.sources[name]
+        if source.snapshot is None:
+            return False
+        limit = source.freshness if max_age is None else max_age
+        return source.snapshot.age <= limit
+
+    async def refresh(self, name: str, deadline: Optional[float] = None) -> Optional[float]:
+        """
+        Kaynağı hemen tazele ve yeni değeri döndür
+        Uçuşta bir tazeleme varsa ona bağlanılır; o tazeleme bu çağıranınkinden kısa bir deadline
+        yüzünden boş dönerse kalan süreyle yeniden denenir
+        """
+        return await self.single_flight.do(name, lambda: self._refresh(name, deadline), deadline)
+
+    async def _refresh(self, name: str, deadline: Optional[float]) -> Optional[float]:
+        source = self.sources[name]
+        try:
+            value = await source.fetch(deadline=deadline)
+        except Exception as e:
+            source.error_count += 1
+            source.last_error = str(e)
+            logger.warning(f"⚠️ {name} tazeleme hatası: {e}")
+            return None
+
+        if value:
+            source.snapshot = PriceSnapshot(value, datetime.now(), time.monotonic())
+            source.refresh_count += 1
+            source.last_error = None
+        return value
+
+    async def get_fresh(
+        self, name: str, max_age: Optional[float] = None, deadline: Optional[float] = None
+    ) -> Optional[float]:
+        """
+        Snapshot tazelik sınırı içindeyse onu döndür, değilse zorla yenile
+        deadline dolarsa None döner; tazeleme arka planda sürer ve snapshot'ı günceller
+        """
+        if self.is_fresh(name, max_age):
+            return self.sources[name].snapshot.value
+        if deadline is None:
+            return await self.refresh(name)
+        try:
+            return await asyncio.wait_for(self.refresh(name, deadline), time_left(deadline, float("inf")))
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ {name} süre içinde tazelenemedi")
+            return None
+
+    async def _run_source(self, source: PriceSource):
+        while True:
+            # Kullanıcı isteği kaynağı yeni tazelediyse bir tur atla
+            if not self.is_fresh(source.name, source.interval / 2):
+                # Arka plan tazelemesi de bir tur süresiyle sınırlı; hata / süre aşımı görevi öldürmez
+                try:
+                    await self.refresh(source.name, time.monotonic() + source.interval)
+                except asyncio.TimeoutError:
+                    logger.warning(f"⚠️ {source.name} arka plan tazelemesi süre içinde bitmedi")
+                except Exception as e:
+                    source.error_count += 1
+                    source.last_error = str(e)
+                    logger.warning(f"⚠️ {source.name} arka plan tazeleme hatası: {e}")
+            await asyncio.sleep(source.interval)
+
+    def start(self):
+        """Her kaynak için arka plan görevini başlat"""
+        for name, source in self.sources.items():
+            task = self._tasks.get(name)
+            if task is None or task.done():
+                self._tasks[name] = asyncio.create_task(self._run_source(source))
+        logger.info(f"🔄 Arka plan fiyat tazeleyici başlatıldı ({', '.join(self.sources)})")
+
+    async def stop(self):
+        """Arka plan görevlerini durdur"""
+        tasks, self._tasks = self._tasks, {}
+        for task in tasks.values():
+            task.cancel()
+        for task in tasks.values():
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        logger.info("🔄 Arka plan fiyat tazeleyici durduruldu")
+
+    def get_stats(self) -> Dict:
+        """Kaynak bazında durum özeti"""
+        return {
+            name: {
+                "value": source.snapshot.value if source.snapshot else None,
+                "age": round(source.snapshot.age, 1) if source.snapshot else None,
+                "refreshes": source.refresh_count,
+                "errors": source.error_count,
+                "last_error": source.last_error,
+            }
+            for name, source in self.sources.items()
+        }
@@ -10,8 +10,10 @@ import logging
 import time
 import re
 import random
+from collections import deque
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from config import PROFINANCE_SID_MAX_AGE, HISTORY_MAX_TICKS, HISTORY_TICK_MAX_AGE
 from user_agent_rotator import user_agent_rotator
 from proxy_manager_enhanced import proxy_manager
 
@@ -23,6 +25,9 @@ class ProFinanceHistoryFetcher:
     """
     ProFinance.ru History API üzerinden XAURUB fiyatlarını çeken sınıf
     Gerçek fiyat verisini history endpoint'inden alır
+    - SID süresi dolana kadar tekrar kullanılır, dolunca otomatik yenilenir
+    - Her yanıttaki tüm satırlar tick geçmişine işlenir, sadece yeni tick'ler eklenir
+    - Tek bir kalıcı ClientSession kullanılır
     """
     
     def __init__(self):
@@ -34,6 +39,7 @@ class ProFinanceHistoryFetcher:
         # Sembol bilgileri
         self.symbol = "GOLDGRRUB"
         self.session_id = None
+        self.session_id_at: float = 0.0  # SID alındığı an (monotonic)
         
         # Fiyat verileri
         self.current_price: Optional[float] = None
@@ -41,6 +47,10 @@ class ProFinanceHistoryFetcher:
         self.price_history: list[Dict[str, Any]] = []
         self.max_history_size = 100
         
+        # Tick akışı (kronolojik, en yeni sonda)
+        self.ticks: deque = deque(maxlen=HISTORY_MAX_TICKS)
+        self.last_tick_key: Optional[tuple] = None
+        
         # HTTP session
         self.session: Optional[aiohttp.ClientSession] = None
         
@@ -63,21 +73,42 @@ class ProFinanceHistoryFetcher:
     
     async def __aenter__(self):
         """Async context manager girişi"""
-        self.session = aiohttp.ClientSession(headers=self.headers)
+        await self._get_session()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager çıkışı"""
-        if self.session:
+        await self.close()
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Kalıcı HTTP session (keep-alive bağlantı havuzu ile)
+        """
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=10, ttl_dns_cache=300, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=10),
+            )
+        return self.session
+    
+    async def close(self):
+        """HTTP session'ı kapat"""
+        if self.session and not self.session.closed:
             await self.session.close()
+        self.session = None
+    
+    def _session_id_expired(self) -> bool:
+        """SID yoksa veya yaşı PROFINANCE_SID_MAX_AGE'i geçtiyse True"""
+        if not self.session_id:
+            return True
+        return time.monotonic() - self.session_id_at > PROFINANCE_SID_MAX_AGE
     
     async def get_session_id(self) -> Optional[str]:
         """
         Session ID al
         """
         try:
-            if not self.session:
-                self.session = aiohttp.ClientSession(headers=self.headers)
+            session = await self._get_session()
             
             # User-Agent rotasyonu
             self.headers["User-Agent"] = user_agent_rotator.get_next_user_agent()
@@ -88,7 +119,7 @@ class ProFinanceHistoryFetcher:
             
             # Refresh endpoint'ini çağır
             params = {"s": self.symbol}
-            async with self.session.get(self.refresh_url, params=params, proxy=proxy_url) as response:
+            async with session.get(self.refresh_url, params=params, headers=self.headers, proxy=proxy_url) as response:
                 if response.status == 200:
                     text = await response.text()
                     
@@ -96,6 +127,7 @@ class ProFinanceHistoryFetcher:
                     sid_match = re.search(r'1;([a-zA-Z0-9]+)', text)
                     if sid_match:
                         self.session_id = sid_match.group(1)
+                        self.session_id_at = time.monotonic()
                         logger.info(f"✅ Session ID alındı: {self.session_id}")
                         return self.session_id
                     else:
@@ -109,116 +141,211 @@ class ProFinanceHistoryFetcher:
             logger.error(f"❌ Session ID alma hatası: {e}")
             return None
     
-    async def get_current_price(self) -> Optional[float]:
+    async def _request_history(self) -> Optional[str]:
         """
-        Mevcut XAURUB fiyatını döndür
+        History endpoint'ini mevcut SID ile çağır
+        Geçerli bir CSV yanıtı gelmezse None döner
+        """
+        session = await self._get_session()
+        
+        # Proxy al (sadece mevcut çalışan proxy'lerden, test yapmadan)
+        proxy = proxy_manager.get_random_proxy()
+        proxy_url = proxy['http'] if proxy else None
+        
+        params = {
+            "SID": self.session_id,
+            "s": "goldgrrub",
+            "h": "400",
+            "w": "728",
+            "pt": "4",
+            "tt": "0",
+            "z": "7",
+            "ba": "2",
+            "left": "0",
+            "T": str(int(time.time() * 1000))
+        }
+        
+        async with session.get(self.history_url, params=params, headers=self.headers, proxy=proxy_url) as response:
+            if response.status != 200:
+                logger.warning(f"⚠️ History yanıtı: HTTP {response.status}")
+                return None
+            text = await response.text()
+        
+        # Süresi dolmuş SID genelde boş veya başlıksız yanıt döndürür
+        if "Bid" not in text.split('\n', 1)[0]:
+            return None
+        return text
+    
+    async def fetch_new_ticks(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        History endpoint'inden sadece son görülen tick'ten yeni olanları al
+        SID geçersizse bir kez yenileyip tekrar dener
+        Hata durumunda None, yeni tick yoksa boş liste döner
         """
         try:
-            if not self.session:
-                self.session = aiohttp.ClientSession(headers=self.headers)
-            
-            # Session ID yoksa al
-            if not self.session_id:
-                await self.get_session_id()
+            text = None
+            for attempt in range(2):
+                if attempt > 0 or self._session_id_expired():
+                    await self.get_session_id()
+                if not self.session_id:
+                    logger.error("❌ Session ID alınamadı")
+                    return None
+                
+                text = await self._request_history()
+                if text is not None:
+                    break
+                
+                logger.info("🔄 SID geçersiz görünüyor, yenileniyor...")
+                self.session_id = None
             
-            if not self.session_id:
-                logger.error("❌ Session ID alınamadı")
+            if text is None:
                 return None
             
-            # User-Agent rotasyonu
-            self.headers["User-Agent"] = user_agent_rotator.get_next_user_agent()
-            
-            # Proxy al (sadece mevcut çalışan proxy'lerden, test yapmadan)
-            proxy = proxy_manager.get_random_proxy()
-            proxy_url = proxy['http'] if proxy else None
-            
-            # History endpoint'ini çağır
-            params = {
-                "SID": self.session_id,
-                "s": "goldgrrub",
-                "h": "400",
-                "w": "728",
-                "pt": "4",
-                "tt": "0",
-                "z": "7",
-                "ba": "2",
-                "left": "0",
-                "T": str(int(time.time() * 1000))
-            }
+            new_ticks = self._take_new_ticks(self._parse_ticks(text))
+            self.ticks.extend(new_ticks)
+            if new_ticks:
+                logger.info(f"📈 {len(new_ticks)} yeni tick alındı (toplam {len(self.ticks)})")
+            return new_ticks
             
-            async with self.session.get(self.history_url, params=params, proxy=proxy_url) as response:
-                if response.status == 200:
-                    text = await response.text()
-                    
-                    # Fiyatı parse et
-                    price = self._parse_price_from_history(text)
-                    if price:
-                        self._update_price(price)
-                        return price
-                    else:
-                        logger.warning("⚠️ Fiyat parse edilemedi")
-                        return None
-                else:
-                    logger.error(f"❌ Fiyat alınamadı: HTTP {response.status}")
-                    return None
-                    
         except Exception as e:
-            logger.error(f"❌ Fiyat çekme hatası: {e}")
+            logger.error(f"❌ Tick çekme hatası: {e}")
             return None
     
-    def _parse_price_from_history(self, text: str) -> Optional[float]:
+    async def get_current_price(self) -> Optional[float]:
         """
-        History response'dan fiyatı parse et
+        Mevcut XAURUB fiyatını döndür
+        """
+        if await self.fetch_new_ticks() is None:
+            return None
+        
+        # En yeni tick'ten geriye doğru ilk geçerli fiyat
+        for tick in reversed(self.ticks):
+            price = self._price_from_tick(tick)
+            if price:
+                self._update_price(price)
+                return price
+        
+        logger.warning("⚠️ Fiyat parse edilemedi")
+        return None
+    
+    async def get_latest_quote(self, max_age: float = HISTORY_TICK_MAX_AGE) -> Optional[Dict[str, Any]]:
+        """
+        Tablo formatında son kotasyon (Last değeri makul aralıkta olan en yeni tick)
+        FastPriceFetcher birincil kaynak olarak bunu kullanır
+        Yeni tick gelmediyse eski tick tekrar döner: yaşı "age" ile verilir,
+        max_age saniyeden eskiyse None döner (çağıran başka kaynağa geçer)
+        """
+        if await self.fetch_new_ticks() is None:
+            return None
+        
+        for tick in reversed(self.ticks):
+            if not self._in_range(tick["last"]):
+                continue
+            # Yaş, tick'in ilk görüldüğü andan ölçülür (yanıttaki saat tarih/saat dilimi içermez)
+            age = (datetime.now() - tick["received_at"]).total_seconds()
+            if age > max_age:
+                logger.warning(f"⚠️ History feed'de yeni tick yok (son tick {age:.0f} sn önce)")
+                return None
+            self._update_price(tick["last"])
+            return {
+                "headers": ["Bid", "Ask", "Last", "Время"],
+                "bid": f"{tick['bid']}" if tick["bid"] else "",
+                "ask": f"{tick['ask']}" if tick["ask"] else "",
+                "last": f"{tick['last']}",
+                "time": tick["time"],
+                "age": age,
+            }
+        return None
+    
+    def _parse_ticks(self, text: str) -> List[Dict[str, Any]]:
+        """
+        History CSV'sinin tüm satırlarını tick listesine çevir (yanıt sırasıyla, en yeni ilk)
         Format: ";Bid;Ask;Last;Время\n;9817.16;9821.23;;20:29:25.000\n;9817.47;9821.52;9819.26;20:29:25.000"
         """
+        ticks = []
+        for line in text.strip().split('\n')[1:]:  # Header'ı atla
+            if not line.strip():
+                continue
+            parts = line.split(';')
+            if len(parts) < 4:
+                continue
+            try:
+                ticks.append({
+                    "bid": float(parts[1]) if parts[1] else None,
+                    "ask": float(parts[2]) if parts[2] else None,
+                    "last": float(parts[3]) if parts[3] else None,
+                    "time": parts[4].strip() if len(parts) > 4 else "",
+                })
+            except ValueError as e:
+                logger.warning(f"⚠️ Satır parse hatası: {line} - {e}")
+        return ticks
+    
+    @staticmethod
+    def _tick_key(tick: Dict[str, Any]) -> tuple:
+        return (tick["time"], tick["bid"], tick["ask"], tick["last"])
+    
+    def _take_new_ticks(self, ticks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Son görülen tick'e kadar olan (daha yeni) satırları kronolojik sırayla döndür
+        """
+        new_ticks = []
+        for tick in ticks:
+            if self._tick_key(tick) == self.last_tick_key:
+                break
+            new_ticks.append(tick)
+        
+        if ticks:
+            self.last_tick_key = self._tick_key(ticks[0])
+        
+        received_at = datetime.now()
+        for tick in new_ticks:
+            tick["received_at"] = received_at
+        new_ticks.reverse()
+        return new_ticks
+    
+    @staticmethod
+    def _in_range(price: Optional[float]) -> bool:
+        """Makul fiyat aralığı kontrolü"""
+        return bool(price) and 50 < price < 10000
+    
+    def _price_from_tick(self, tick: Dict[str, Any]) -> Optional[float]:
+        """
+        Tick'ten fiyat seç: Last → Bid/Ask ortalaması → Bid → Ask
+        """
+        bid, ask, last = tick["bid"], tick["ask"], tick["last"]
+        
+        # Last fiyatı varsa onu kullan
+        if self._in_range(last):
+            logger.info(f"✅ ProFinance Last fiyatı: {last} RUB (Zaman: {tick['time']})")
+            return last
+        
+        # Last yoksa Bid ve Ask'in ortalamasını al
+        if self._in_range(bid) and self._in_range(ask):
+            avg_price = (bid + ask) / 2
+            logger.info(f"✅ ProFinance ortalama fiyat: {avg_price} RUB (Bid: {bid}, Ask: {ask})")
+            return avg_price
+        
+        # Sadece Bid varsa onu kullan
+        if self._in_range(bid):
+            logger.info(f"✅ ProFinance Bid fiyatı: {bid} RUB")
+            return bid
+        
+        # Sadece Ask varsa onu kullan
+        if self._in_range(ask):
+            logger.info(f"✅ ProFinance Ask fiyatı: {ask} RUB")
+            return ask
+        
+        return None
+    
+    def _parse_price_from_history(self, text: str) -> Optional[float]:
+        """
+        History response'dan fiyatı parse et (ilk geçerli satır)
+        """
         try:
-            # CSV formatını parse et
-            lines = text.strip().split('\n')
-            
-            if len(lines) < 2:
-                logger.warning("⚠️ Yetersiz veri satırı")
-                return None
-            
-            # İlk satır header: ";Bid;Ask;Last;Время"
-            # İkinci satır veri: ";9817.16;9821.23;;20:29:25.000"
-            
-            for line in lines[1:]:  # Header'ı atla
-                if not line.strip():
-                    continue
-                
-                # Satırı parse et
-                parts = line.split(';')
-                if len(parts) >= 4:
-                    try:
-                        bid = float(parts[1]) if parts[1] else None
-                        ask = float(parts[2]) if parts[2] else None
-                        last = float(parts[3]) if parts[3] else None
-                        time_str = parts[4] if len(parts) > 4 else ""
-                        
-                        # Last fiyatı varsa onu kullan
-                        if last and 50 < last < 10000:  # Makul fiyat aralığı
-                            logger.info(f"✅ ProFinance Last fiyatı: {last} RUB (Zaman: {time_str})")
-                            return last
-                        
-                        # Last yoksa Bid ve Ask'in ortalamasını al
-                        if bid and ask and 50 < bid < 10000 and 50 < ask < 10000:
-                            avg_price = (bid + ask) / 2
-                            logger.info(f"✅ ProFinance ortalama fiyat: {avg_price} RUB (Bid: {bid}, Ask: {ask})")
-                            return avg_price
-                        
-                        # Sadece Bid varsa onu kullan
-                        if bid and 50 < bid < 10000:
-                            logger.info(f"✅ ProFinance Bid fiyatı: {bid} RUB")
-                            return bid
-                        
-                        # Sadece Ask varsa onu kullan
-                        if ask and 50 < ask < 10000:
-                            logger.info(f"✅ ProFinance Ask fiyatı: {ask} RUB")
-                            return ask
-                            
-                    except (ValueError, IndexError) as e:
-                        logger.warning(f"⚠️ Satır parse hatası: {line} - {e}")
-                        continue
+            for tick in self._parse_ticks(text):
+                price = self._price_from_tick(tick)
+                if price:
+                    return price
             
             logger.warning("⚠️ Geçerli fiyat bulunamadı")
             return None
@@ -262,6 +389,7 @@ class ProFinanceHistoryFetcher:
             "last_update": self.last_update,
             "session_id": self.session_id,
             "price_history_count": len(self.price_history),
+            "tick_count": len(self.ticks),
             "symbol": self.symbol
         }
     
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+ProFinance HTML Engine - Browser'sız tablo okuma
+Sayfa sunucu tarafında render edildiği için HTML'i havuzlanmış bir
+aiohttp bağlantısıyla çekip 4. tabloyu doğrudan parse eder
+"""
+
+import asyncio
+import logging
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+# Engelleme / bot doğrulama sayfası işaretleri (küçük harfle)
+BLOCK_PAGE_MARKERS = [
+    "captcha",
+    "cf-chl",
+    "cf-browser-verification",
+    "ddos-guard",
+    "access denied",
+    "доступ запрещен",
+    "доступ ограничен",
+]
+
+
+class BlockPageError(Exception):
+    """Sunucu engelleme veya bot doğrulama sayfası döndürdü"""
+
+
+class _StopParsing(Exception):
+    """Hedef tablo okundu, kalan HTML'i parse etmeye gerek yok"""
+
+
+class _QuoteTableParser(HTMLParser):
+    """
+    Belge sırasına göre N. tablonun satır ve hücrelerini toplar
+    (document.querySelectorAll('table')[N] ile aynı sayım)
+    Kapanış etiketi atlanmış <td>/<tr>'leri tarayıcı gibi örtük kapatır,
+    hedef tablo kapanınca parse işlemini erken bitirir
+    """
+
+    def __init__(self, table_index: int = 3):
+        super().__init__(convert_charrefs=True)
+        self.table_index = table_index
+        self.table_count = 0
+        self.rows: List[List[str]] = []
+        self._target_depth: Optional[int] = None
+        self._depth = 0
+        # (tablo derinliği, hücre listesi)
+        self._open_rows: List[tuple] = []
+        # (ait olduğu satır, metin parçaları)
+        self._open_cells: List[tuple] = []
+
+    def _close_cell(self):
+        row, parts = self._open_cells.pop()
+        row.append(" ".join("".join(parts).split()))
+
+    def _close_rows_at(self, depth: int):
+        while self._open_rows and self._open_rows[-1][0] >= depth:
+            row = self._open_rows[-1][1]
+            while self._open_cells and self._open_cells[-1][0] is row:
+                self._close_cell()
+            self._open_rows.pop()
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            self._depth += 1
+            if self.table_count == self.table_index:
+                self._target_depth = self._depth
+            self.table_count += 1
+            return
+        if self._target_depth is None:
+            return
+        if tag == "tr":
+            self._close_rows_at(self._depth)
+            row: List[str] = []
+            self.rows.append(row)
+            self._open_rows.append((self._depth, row))
+        elif tag == "td" and self._open_rows:
+            row = self._open_rows[-1][1]
+            while self._open_cells and self._open_cells[-1][0] is row:
+                self._close_cell()
+            self._open_cells.append((row, []))
+        elif tag == "br" and self._open_cells:
+            self._open_cells[-1][1].append(" ")
+
+    def handle_endtag(self, tag):
+        if tag == "table":
+            if self._target_depth is not None:
+                self._close_rows_at(self._depth)
+                if self._depth == self._target_depth:
+                    raise _StopParsing()
+            self._depth = max(0, self._depth - 1)
+            return
+        if self._target_depth is None:
+            return
+        if tag == "td" and self._open_cells:
+            self._close_cell()
+        elif tag == "tr" and self._open_rows:
+            self._close_rows_at(self._open_rows[-1][0])
+
+    def handle_data(self, data):
+        if self._open_cells:
+            self._open_cells[-1][1].append(data)
+
+
+def parse_quote_table(html: str, table_index: int = 3) -> Optional[Dict]:
+    """
+    HTML'den kotasyonu çıkar (PROFINANCE_QUOTE_JS ile aynı mantık)
+    Dönüş: {"headers", "bid", "ask", "last", "time"} veya None
+    """
+    parser = _QuoteTableParser(table_index)
+    try:
+        parser.feed(html)
+        parser.close()
+    except _StopParsing:
+        pass
+    else:
+        # Belge hedef tablo kapanmadan bitti: açık kalan satırları topla
+        parser._close_rows_at(0)
+
+    rows = parser.rows
+    if parser.table_count <= table_index or len(rows) < 2:
+        return None
+
+    headers = rows[0]
+    first = rows[1]
+    if len(first) < 3:
+        return None
+
+    last = first[2]
+    time_txt = first[3] if len(first) > 3 else ""
+    if not last and len(rows) > 2:
+        next_cells = rows[2]
+        if len(next_cells) >= 3:
+            last = next_cells[2]
+            time_txt = next_cells[3] if len(next_cells) > 3 else ""
+
+    return {"headers": headers, "bid": first[0], "ask": first[1], "last": last, "time": time_txt}
+
+
+class ProFinanceHtmlEngine:
+    """
+    Havuzlanmış aiohttp bağlantısı üzerinden ProFinance tablo okuyucu
+    """
+
+    def __init__(self, url: str, timeout: float = 5.0, connection_limit: int = 10):
+        self.url = url
+        self.timeout = timeout
+        self.connection_limit = connection_limit
+        self.session: Optional[aiohttp.ClientSession] = None
+
+        # İstatistikler
+        self.stats = {"success": 0, "blocked": 0, "failed": 0}
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self.session
+
+    @staticmethod
+    def _looks_like_block_page(html: str) -> bool:
+        lowered = html[:20000].lower()
+        return any(marker in lowered for marker in BLOCK_PAGE_MARKERS)
+
+    async def fetch_quote(
+        self, headers: Dict[str, str], proxy: Optional[str] = None, timeout: Optional[float] = None
+    ) -> Dict:
+        """
+        Sayfayı çek ve kotasyonu döndür
+        timeout: bu istek için süre (verilmezse engine varsayılanı)
+        Engelleme sayfasında BlockPageError, diğer hatalarda Exception fırlatır
+        """
+        session = await self._get_session()
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            async with session.get(
+                self.url, headers=headers, proxy=proxy, timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                body = await response.read()
+                html = body.decode(response.charset or "windows-1251", errors="replace")
+                status = response.status
+        except asyncio.TimeoutError:
+            self.stats["failed"] += 1
+            raise Exception(f"HTML engine timeout ({timeout:.1f}s)")
+        except Exception:
+            self.stats["failed"] += 1
+            raise
+
+        if status in (401, 403, 429, 503):
+            self.stats["blocked"] += 1
+            raise BlockPageError(f"Engelleme yanıtı (HTTP {status})")
+        if status != 200:
+            self.stats["failed"] += 1
+            raise Exception(f"HTTP {status}")
+
+        quote = parse_quote_table(html)
+        if not quote:
+            # Tablo yoksa sayfanın bir bot doğrulama sayfası olup olmadığına bak
+            if self._looks_like_block_page(html):
+                self.stats["blocked"] += 1
+                raise BlockPageError("Engelleme sayfası tespit edildi")
+            self.stats["failed"] += 1
+            raise Exception("Tablo bulunamadı")
+
+        self.stats["success"] += 1
+        return quote
+
+    async def close(self):
+        """
+        HTTP session'ı kapat
+        """
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Progressive Message - Sonuçlar geldikçe bekleme mesajını düzenler
+- Her bileşen geldiğinde update() çağrılır, en son metin saklanır
+- Düzenlemeler birleştirilir ve min_interval ile sınırlanır (Telegram limitleri)
+- Cevap placeholder_delay içinde hazırsa bekleme mesajı hiç gönderilmez
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressiveMessage:
+    """
+    Tek bir cevap mesajının aşamalı gönderimi
+    reply(text): ilk mesajı gönderir ve düzenlenebilir mesajı döndürür
+    (ör. update.message.reply_text)
+    """
+
+    def __init__(
+        self,
+        reply: Callable[[str], Awaitable[Any]],
+        placeholder: str,
+        placeholder_delay: float = 0.3,
+        min_interval: float = 1.0,
+    ):
+        self._reply = reply
+        self.placeholder = placeholder
+        self.placeholder_delay = placeholder_delay
+        self.min_interval = min_interval
+        self.message = None
+
+        self._latest: Optional[str] = None
+        self._sent_text: Optional[str] = None
+        self._last_send = 0.0
+        self._final = False
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        # İstatistikler
+        self.stats = {"updates": 0, "sends": 0, "errors": 0, "placeholder": False}
+
+    def start(self):
+        """Gönderim görevini başlat (placeholder süresi buradan sayılır)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def update(self, text: str):
+        """Gösterilecek en son metni ver; gönderim arka planda, birleştirilerek yapılır"""
+        self.stats["updates"] += 1
+        self._latest = text
+        self._wakeup.set()
+
+    async def finish(self, text: Optional[str] = None):
+        """Son metni ver ve gönderilmesini bekle; gönderilen mesajı döndürür"""
+        if text is not None:
+            self.update(text)
+        self._final = True
+        self._wakeup.set()
+        self.start()
+        await self._task
+        return self.message
+
+    async def _wait_final(self):
+        while not self._final:
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    async def _run(self):
+        # İlk mesaj: cevap tamamlanana ya da placeholder süresi dolana kadar beklenir
+        try:
+            await asyncio.wait_for(self._wait_final(), self.placeholder_delay)
+        except asyncio.TimeoutError:
+            pass
+        if self._latest is None:
+            self.stats["placeholder"] = True
+            await self._send(self.placeholder)
+        else:
+            # Bu arada gelen kısmi sonuç placeholder yerine gönderilir
+            await self._send(self._latest)
+
+        while True:
+            if self._latest is not None and self._latest != self._sent_text:
+                delay = self._last_send + self.min_interval - time.monotonic()
+                if delay > 0:
+                    # Beklerken gelen güncellemeler tek düzenlemede birleşir
+                    await asyncio.sleep(delay)
+                await self._send(self._latest)
+                continue
+            if self._final:
+                return
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    async def _send(self, text: str):
+        self._sent_text = text
+        self._last_send = time.monotonic()
+        try:
+            if self.message is None:
+                self.message = await self._reply(text)
+            else:
+                await self.message.edit_text(text)
+            self.stats["sends"] += 1
+        except Exception as e:
+            # Hata cevabın geri kalanını bozmaz; sonraki metinle tekrar denenir
+            self.stats["errors"] += 1
+            logger.warning(f"⚠️ Mesaj gönderilemedi/güncellenemedi: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "coalesced": max(0, self.stats["updates"] - self.stats["sends"])}
+
+
+async def _benchmark(min_interval: float = 1.0, placeholder_delay: float = 0.3):
+    """
+    Sahte mesajla API çağrısı sayımı: bekleme mesajı + her bileşende düzenleme
+    vs aşamalı (birleştirilmiş, sınırlı) düzenleme
+    """
+
+    class _Message:
+        def __init__(self, calls):
+            self.calls = calls
+
+        async def edit_text(self, text):
+            self.calls.append(time.monotonic())
+
+    scenarios = {
+        "hızlı (0.1, 0.2 sn)": [0.1, 0.2],
+        "yavaş (0.5, 0.6, 0.7, 1.2, 2.5 sn)": [0.5, 0.6, 0.7, 1.2, 2.5],
+    }
+    print(f"⏱️ Bileşen geliş zamanları, min. düzenleme aralığı {min_interval:.1f} sn")
+    for name, arrivals in scenarios.items():
+        calls = []
+
+        async def reply(text):
+            calls.append(time.monotonic())
+            return _Message(calls)
+
+        progress = ProgressiveMessage(reply, "📊 ...", placeholder_delay, min_interval)
+        start = time.monotonic()
+        progress.start()
+        for index, at in enumerate(arrivals):
+            await asyncio.sleep(max(0.0, start + at - time.monotonic()))
+            progress.update(f"{index + 1}/{len(arrivals)}")
+        await progress.finish()
+
+        gaps = [b - a for a, b in zip(calls, calls[1:])]
+        min_gap = f"{min(gaps):.2f} sn" if gaps else "-"
+        print(
+            f"   {name:36s} eski: {len(arrivals) + 1} çağrı  aşamalı: {len(calls)} çağrı  "
+            f"placeholder: {progress.stats['placeholder']}  en kısa aralık: {min_gap}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(_benchmark())
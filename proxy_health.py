@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Proxy Health - Proxy başına sağlık modeli ve O(log n) seçim
+- Gecikme EWMA'sı ve başarı/hata sayıları gerçek fetch'lerden güncellenir
+- Proxy başına devre kesici: hata sonrası artan süreli cooldown (açık), süre dolunca
+  deneme (yarı açık), başarıda kapanır; deneme bir arka plan testine bırakılabilir
+- Sürekli hata veren proxy'ler otomatik düşürülür
+- Seçim heap'ten yapılır: eski kayıtlar tembel silinir (versiyon numarası ile)
+- Rotasyon: en iyi top_k arasından skorla ters orantılı ağırlıklı rastgele seçim
+"""
+
+import heapq
+import itertools
+import logging
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ProxyHealth:
+    """
+    Tek bir proxy'nin sağlık durumu
+    """
+
+    __slots__ = (
+        "url", "latency", "successes", "failures", "consecutive_failures",
+        "cooldown_until", "dropped", "version",
+    )
+
+    def __init__(self, url: str, latency: Optional[float] = None):
+        self.url = url
+        self.latency = latency          # EWMA gecikme (saniye), None: henüz ölçülmedi
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0       # time.monotonic(); bu ana kadar seçilmez
+        self.dropped = False
+        self.version = 0                # Heap'teki geçerli kaydın numarası
+
+    @property
+    def failure_rate(self) -> float:
+        # Laplace düzeltmesi: az örnekle uç değerlere gidilmez
+        return (self.failures + 1) / (self.successes + self.failures + 2)
+
+    def score(self, unknown_latency: float) -> float:
+        """Bir başarılı fetch'in beklenen süresi: gecikme / başarı olasılığı (küçük daha iyi)"""
+        latency = self.latency if self.latency is not None else unknown_latency
+        return latency / (1 - self.failure_rate)
+
+
+class ProxyHealthTracker:
+    """
+    Proxy adresi → ProxyHealth, en iyi proxy heap'in tepesinde
+    - _ready: (skor, versiyon, url) — seçilebilir proxy'ler
+    - _cooling: (cooldown bitişi, versiyon, url) — süresi dolunca _ready'ye döner
+    - hold_trials açıksa cooldown'u biten proxy _half_open'da bekler: kullanıcıya verilmez,
+      arka plan testi sonucu (record_success / record_failure) devreyi kapatır ya da yeniden açar
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        alpha: float = 0.3,
+        cooldown: float = 30.0,
+        max_cooldown: float = 600.0,
+        drop_after: int = 5,
+        drop_failure_rate: float = 0.8,
+        drop_min_samples: int = 10,
+        unknown_latency: float = 5.0,
+    ):
+        self.alpha = alpha
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.drop_after = drop_after
+        self.drop_failure_rate = drop_failure_rate
+        self.drop_min_samples = drop_min_samples
+        self.unknown_latency = unknown_latency
+
+        self._health: Dict[str, ProxyHealth] = {}
+        self._ready: List[Tuple[float, int, str]] = []
+        self._cooling: List[Tuple[float, int, str]] = []
+        self._half_open: Dict[str, None] = {}  # Ekleme sırasını koruyan küme
+        # Takipçi genelinde artan sürüm: silinip yeniden eklenen proxy'nin eski heap kayıtları eşleşmez
+        self._versions = itertools.count(1)
+        self.hold_trials = False
+
+        # İstatistikler
+        self.stats = {"selections": 0, "successes": 0, "failures": 0, "cooldowns": 0, "dropped": 0}
+
+    def __len__(self) -> int:
+        return sum(1 for health in self._health.values() if not health.dropped)
+
+    def __contains__(self, url: str) -> bool:
+        health = self._health.get(url)
+        return health is not None and not health.dropped
+
+    def get(self, url: str) -> Optional[ProxyHealth]:
+        return self._health.get(url)
+
+    def _push_ready(self, health: ProxyHealth):
+        health.version = next(self._versions)
+        heapq.heappush(self._ready, (health.score(self.unknown_latency), health.version, health.url))
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        # Tembel silme heap'i şişirir; geçerli kayıtların birkaç katını aşınca yeniden kur
+        if len(self._ready) + len(self._cooling) <= 2 * len(self._health) + 64:
+            return
+        now = time.monotonic()
+        self._ready, self._cooling = [], []
+        for health in self._health.values():
+            if health.dropped or health.url in self._half_open:
+                continue
+            if health.cooldown_until > now:
+                self._cooling.append((health.cooldown_until, health.version, health.url))
+            elif self.hold_trials and health.consecutive_failures:
+                # Cooldown'u bitmiş ama henüz denenmemiş: _release_cooled gibi yarı açıkta bekler
+                self._half_open[health.url] = None
+            else:
+                self._ready.append((health.score(self.unknown_latency), health.version, health.url))
+        heapq.heapify(self._ready)
+        heapq.heapify(self._cooling)
+
+    def add(self, url: str, latency: Optional[float] = None):
+        """Proxy'yi takibe al (zaten varsa ve düşürülmediyse dokunulmaz)"""
+        health = self._health.get(url)
+        if health is not None and not health.dropped:
+            return
+        health = ProxyHealth(url, latency)
+        self._health[url] = health
+        self._push_ready(health)
+
+    def remove(self, url: str):
+        """Proxy'yi takipten çıkar (heap kayıtları tembel silinir)"""
+        self._health.pop(url, None)
+        self._half_open.pop(url, None)
+
+    def record_success(self, url: str, latency: Optional[float] = None):
+        health = self._health.get(url)
+        if health is None or health.dropped:
+            return
+        self.stats["successes"] += 1
+        self._half_open.pop(url, None)
+        health.successes += 1
+        health.consecutive_failures = 0
+        health.cooldown_until = 0.0
+        if latency is not None:
+            health.latency = latency if health.latency is None else (
+                health.latency + self.alpha * (latency - health.latency)
+            )
+        self._push_ready(health)
+
+    def record_failure(self, url: str) -> bool:
+        """Hatayı kaydet; proxy düşürüldüyse True döner"""
+        health = self._health.get(url)
+        if health is None or health.dropped:
+            return False
+        self.stats["failures"] += 1
+        self._half_open.pop(url, None)
+        health.failures += 1
+        health.consecutive_failures += 1
+
+        samples = health.successes + health.failures
+        if health.consecutive_failures >= self.drop_after or (
+            samples >= self.drop_min_samples and health.failure_rate >= self.drop_failure_rate
+        ):
+            health.dropped = True
+            self.stats["dropped"] += 1
+            logger.info(f"🗑️ Proxy düşürüldü: {url} ({health.failures}/{samples} hata)")
+            return True
+
+        # Art arda hatalarda cooldown katlanır
+        cooldown = min(self.max_cooldown, self.cooldown * 2 ** (health.consecutive_failures - 1))
+        health.cooldown_until = time.monotonic() + cooldown
+        health.version = next(self._versions)
+        heapq.heappush(self._cooling, (health.cooldown_until, health.version, url))
+        self.stats["cooldowns"] += 1
+        self._maybe_compact()
+        return False
+
+    def _release_cooled(self):
+        # Cooldown'u biten proxy'ler: deneme arka plana bırakıldıysa yarı açık bekler
+        now = time.monotonic()
+        while self._cooling and self._cooling[0][0] <= now:
+            _, version, url = heapq.heappop(self._cooling)
+            health = self._health.get(url)
+            if health is None or health.dropped or health.version != version:
+                continue
+            if self.hold_trials:
+                self._half_open[url] = None
+            else:
+                self._push_ready(health)
+
+    def set_hold_trials(self, enabled: bool):
+        """Yarı açık denemeleri arka plan testine bırak (kapatılınca bekleyenler seçime döner)"""
+        self.hold_trials = enabled
+        if not enabled:
+            pending, self._half_open = self._half_open, {}
+            for url in pending:
+                health = self._health.get(url)
+                if health is not None and not health.dropped:
+                    self._push_ready(health)
+
+    def half_open(self) -> List[str]:
+        """Deneme bekleyen (cooldown'u bitmiş, henüz test edilmemiş) proxy'ler"""
+        self._release_cooled()
+        return list(self._half_open)
+
+    def state(self, url: str) -> Optional[str]:
+        """Devre durumu: CLOSED / OPEN / HALF_OPEN (takipte değilse None)"""
+        health = self._health.get(url)
+        if health is None or health.dropped:
+            return None
+        if url in self._half_open:
+            return self.HALF_OPEN
+        if health.cooldown_until > time.monotonic():
+            return self.OPEN
+        # Deneme arka plana bırakılmadıysa cooldown'u biten proxy doğrudan seçime döner
+        return self.HALF_OPEN if self.hold_trials and health.consecutive_failures else self.CLOSED
+
+    def select(self, top_k: int = 1) -> Optional[str]:
+        """
+        Cooldown'da olmayan proxy (amortize O(k log n))
+        top_k=1: en iyi skorlu; top_k>1: en iyi top_k arasından skorla ters orantılı ağırlıkla
+        (tek çıkış IP'sine yığılmadan iyi proxy'ler tercih edilir)
+        """
+        self._release_cooled()
+
+        candidates = []
+        while self._ready and len(candidates) < top_k:
+            entry = heapq.heappop(self._ready)
+            health = self._health.get(entry[2])
+            if health is None or health.dropped or health.version != entry[1]:
+                continue
+            candidates.append(entry)
+        for entry in candidates:
+            heapq.heappush(self._ready, entry)
+        if not candidates:
+            return None
+
+        self.stats["selections"] += 1
+        if len(candidates) == 1:
+            return candidates[0][2]
+        weights = [1 / max(score, 1e-6) for score, _, _ in candidates]
+        return random.choices(candidates, weights)[0][2]
+
+    def get_stats(self) -> Dict:
+        now = time.monotonic()
+        active = [health for health in self._health.values() if not health.dropped]
+        return {
+            **self.stats,
+            "tracked": len(active),
+            "cooling": sum(1 for health in active if health.cooldown_until > now),
+            "half_open": len(self._half_open),
+        }
+
+
+def _benchmark(proxies: int = 10000, selections: int = 2000):
+    """Seçim maliyeti: her çağrıda sorted() vs heap (her seçimden sonra bir sonuç kaydı ile)"""
+    import random
+
+    rng = random.Random(1)
+    working = [{"proxy": f"http://10.0.{i // 256}.{i % 256}:8080", "response_time": rng.uniform(0.1, 3.0)}
+               for i in range(proxies)]
+
+    start = time.perf_counter()
+    for _ in range(selections):
+        fastest = sorted(
+            [p for p in working if p["response_time"] is not None], key=lambda p: p["response_time"]
+        )[0]
+        fastest["response_time"] += rng.uniform(-0.05, 0.2)
+    sorted_elapsed = time.perf_counter() - start
+
+    tracker = ProxyHealthTracker()
+    for proxy in working:
+        tracker.add(proxy["proxy"], proxy["response_time"])
+    start = time.perf_counter()
+    for _ in range(selections):
+        url = tracker.select(top_k=5)
+        if rng.random() < 0.8:
+            tracker.record_success(url, rng.uniform(0.1, 3.0))
+        else:
+            tracker.record_failure(url)
+    heap_elapsed = time.perf_counter() - start
+
+    print(f"⏱️ {proxies} proxy, {selections} seçim + sonuç kaydı")
+    print(f"   sorted() her çağrıda  {sorted_elapsed * 1000:8.1f} ms  ({sorted_elapsed / selections * 1e6:7.1f} µs/seçim)")
+    print(f"   heap (top-5 rotasyon) {heap_elapsed * 1000:8.1f} ms  ({heap_elapsed / selections * 1e6:7.1f} µs/seçim)")
+    stats = tracker.get_stats()
+    print(f"   cooldown: {stats['cooldowns']}, düşürülen: {stats['dropped']}")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Proxy Maintainer - Çalışan proxy havuzunu arka planda canlı tutar
+- Her turda çalışan ve yedek proxy'lerden dönen bir örnek yeniden test edilir
+- Devre kesici: canlı fetch hatasıyla açılan proxy'nin denemesi kullanıcıya değil
+  arka plan testine bırakılır (yarı açık), sonucu devreyi kapatır ya da yeniden açar
+- Düşen proxy'lerin yerine önce yedekler geçer, eksik kalırsa listeden yeni adaylar taranır
+- Kullanıcı istekleri hiçbir zaman beklemez: testler ayrı görevde, sonuçlar tek adımda işlenir
+"""
+
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+from proxy_manager import ProxyManager
+from proxy_scanner import ProxyScanner
+
+logger = logging.getLogger(__name__)
+
+
+class ProxyMaintainer:
+    """
+    manager: ProxyManager (working_proxies, standby_proxies ve sağlık modeli)
+    make_scanner: test için ProxyScanner üretir (varsayılan: manager._make_scanner)
+    """
+
+    def __init__(
+        self,
+        manager: ProxyManager,
+        interval: float = 60,
+        target: int = 20,
+        standby_size: int = 10,
+        sample_size: int = 5,
+        scan_limit: int = 500,
+        make_scanner: Optional[Callable[[], ProxyScanner]] = None,
+    ):
+        self.manager = manager
+        self.interval = interval
+        self.target = target
+        self.standby_size = standby_size
+        self.sample_size = sample_size
+        self.scan_limit = scan_limit
+        self.make_scanner = make_scanner or manager._make_scanner
+        self._task: Optional[asyncio.Task] = None
+
+        # Dönen örnekleme imleçleri: her turda listenin bir sonraki dilimi test edilir
+        self._working_cursor = 0
+        self._standby_cursor = 0
+        self._candidate_cursor = 0
+
+        # İstatistikler
+        self.stats = {
+            "rounds": 0, "probed": 0, "trials": 0, "closed": 0, "evicted": 0,
+            "promoted": 0, "discovered": 0, "errors": 0, "last_round": 0.0,
+        }
+
+    @staticmethod
+    def _rolling(items: List[Dict], cursor: int, count: int) -> tuple:
+        if not items:
+            return [], 0
+        count = min(count, len(items))
+        start = cursor % len(items)
+        return [items[(start + i) % len(items)] for i in range(count)], start + count
+
+    def _deficit(self) -> int:
+        # Devresi açık / denemede olan proxy'ler kullanıcıya verilmez: hedef kapalı devrelerle dolar
+        manager = self.manager
+        usable = sum(1 for p in manager.working_proxies if manager.health.state(p['proxy']) == manager.health.CLOSED)
+        return max(0, self.target - usable)
+
+    async def _ensure_list(self):
+        manager = self.manager
+        if not manager.proxies and not manager.working_proxies:
+            # İlk tur: liste inerken tara, hedefe ulaşınca dön
+            await manager.discover_proxies(self.target)
+        elif not manager._should_use_cache():
+            # Liste bayat: koşullu indirme değişmeyen kaynakları yeniden indirmez
+            await manager.update_proxy_list(force_update=True)
+            self._candidate_cursor = 0
+
+    async def _revalidate(self):
+        """Yarı açık proxy'leri ve çalışan / yedek listeden dönen örneği tek taramada test et"""
+        manager = self.manager
+        health = manager.health
+        trials = [manager._working_by_url[url] for url in health.half_open() if url in manager._working_by_url]
+        # Açık devreler cooldown bitene kadar beklenir; yarı açıklar zaten denemede
+        closed = [p for p in manager.working_proxies if health.state(p['proxy']) == health.CLOSED]
+        working_sample, self._working_cursor = self._rolling(closed, self._working_cursor, self.sample_size)
+        standby_sample, self._standby_cursor = self._rolling(
+            manager.standby_proxies, self._standby_cursor, self.sample_size
+        )
+
+        batch = trials + working_sample + standby_sample
+        if not batch:
+            return
+        # target = tümü: erken çıkış yok, her proxy'nin sonucu gerekli
+        await self.make_scanner().scan(batch, len(batch))
+        self.stats["probed"] += len(batch)
+        self.stats["trials"] += len(trials)
+
+        # Sonuçlar await olmadan işlenir: seçim yapan istekler yarım durum görmez
+        for proxy in trials + working_sample:
+            manager.record_probe(proxy)
+        self.stats["closed"] += sum(1 for proxy in trials if proxy.get('working'))
+        dead = {id(proxy) for proxy in standby_sample if not proxy.get('working')}
+        if dead:
+            manager.standby_proxies = [p for p in manager.standby_proxies if id(p) not in dead]
+            self.stats["evicted"] += len(dead)
+
+    def _promote_standby(self):
+        """Kullanılabilir havuz hedefin altındaysa yedekleri hemen rotasyona al"""
+        manager = self.manager
+        deficit = self._deficit()
+        if deficit <= 0 or not manager.standby_proxies:
+            return
+        promoted = manager.standby_proxies[:deficit]
+        manager.standby_proxies = manager.standby_proxies[deficit:]
+        manager.add_working(promoted)
+        self.stats["promoted"] += len(promoted)
+        logger.info(f"🔁 {len(promoted)} yedek proxy rotasyona alındı")
+
+    def _iter_candidates(self) -> Iterator[Dict]:
+        # Listenin kaldığı yerden devam: tarama erken biterse imleç sadece tüketilen kadar ilerler
+        manager = self.manager
+        in_use = set(manager._working_by_url) | {p['proxy'] for p in manager.standby_proxies}
+        total = len(manager.proxies)
+        for _ in range(min(total, self.scan_limit)):
+            proxy = manager.proxies[self._candidate_cursor % total]
+            self._candidate_cursor = (self._candidate_cursor + 1) % total
+            if proxy['proxy'] not in in_use:
+                yield proxy
+
+    async def _refill(self):
+        """Eksik çalışan + yedek proxy'leri listeden yeni adaylarla tamamla"""
+        manager = self.manager
+        working_deficit = self._deficit()
+        need = working_deficit + max(0, self.standby_size - len(manager.standby_proxies))
+        if need <= 0 or not manager.proxies:
+            return
+        found = await self.make_scanner().scan(self._iter_candidates(), need)
+        self.stats["discovered"] += len(found)
+        if found[:working_deficit]:
+            manager.add_working(found[:working_deficit])
+        manager.standby_proxies.extend(found[working_deficit:])
+
+    async def maintain_once(self):
+        """Bir bakım turu: liste tazeliği, yeniden test, yedek terfisi, eksik tamamlama"""
+        start = time.perf_counter()
+        await self._ensure_list()
+        await self._revalidate()
+        self._promote_standby()
+        await self._refill()
+        self._promote_standby()
+        self.stats["rounds"] += 1
+        self.stats["last_round"] = time.perf_counter() - start
+
+    async def _run(self):
+        while True:
+            try:
+                await self.maintain_once()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"⚠️ Proxy bakım turu hatası: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Arka plan bakım görevini başlat (yarı açık denemeler bu göreve bırakılır)"""
+        if self._task is None or self._task.done():
+            self.manager.health.set_hold_trials(True)
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"🩺 Proxy bakımı başlatıldı (her {self.interval:.0f} sn, hedef {self.target})")
+
+    async def stop(self):
+        """Arka plan bakım görevini durdur"""
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
+        self.manager.health.set_hold_trials(False)
+        logger.info("🩺 Proxy bakımı durduruldu")
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "working": len(self.manager.working_proxies),
+            "standby": len(self.manager.standby_proxies),
+        }
+
+
+async def _benchmark(candidates: int = 2000, working_ratio: float = 0.1, target: int = 20,
+                     duration: float = 10.0, death_rate: float = 0.3, fetch_interval: float = 0.01):
+    """
+    Simüle edilmiş oturum: çalışan proxy'ler zamanla ölür, kullanıcı fetch'leri sürekli gelir
+    Bakımsız (sadece canlı hatalarla düşürme) vs arka plan bakımı
+    Seçim hep en iyi skorlu proxy'yi verdiği için bakımsız havuzda ölü proxy'ler ancak
+    sıra kendilerine gelince (kullanıcı isteği hata alınca) fark edilir
+    death_rate: çalışan bir proxy'nin saniye başına ölme olasılığı
+    """
+    import random
+    from datetime import datetime
+
+    from proxy_scanner import FAILED, OK
+
+    async def run(with_maintainer: bool) -> Dict:
+        rng = random.Random(7)
+        death_rng = random.Random(11)  # Ölümler iki senaryoda aynı sırayla gelsin
+        manager = ProxyManager()
+        manager.health.cooldown = 0.2
+        manager.health.max_cooldown = 2.0
+        manager.proxies = [manager._parse_proxy(f"10.0.{i // 256}.{i % 256}:8080") for i in range(candidates)]
+        alive = {p['proxy'] for p in manager.proxies if rng.random() < working_ratio}
+        manager.last_update = datetime.now()
+
+        async def probe(session, proxy_url):
+            await asyncio.sleep(rng.uniform(0.01, 0.05))
+            return OK if proxy_url in alive else FAILED
+
+        def make_scanner():
+            return ProxyScanner(timeout=0.1, probe=probe)
+
+        manager.add_working([p for p in manager.proxies if p['proxy'] in alive][:target])
+        maintainer = ProxyMaintainer(manager, interval=0.2, target=target, standby_size=10,
+                                     sample_size=5, make_scanner=make_scanner)
+        if with_maintainer:
+            maintainer.start()
+
+        result = {"ok": 0, "failed": 0, "no_proxy": 0, "alive_pool": []}
+        start = last_tick = time.monotonic()
+        while time.monotonic() - start < duration:
+            await asyncio.sleep(fetch_interval)
+            now = time.monotonic()
+            # Ölüm süreci: proxy'ler rastgele çalışmaz hale gelir
+            for url in list(alive):
+                if death_rng.random() < death_rate * (now - last_tick):
+                    alive.discard(url)
+            last_tick = now
+
+            proxy = manager.get_next_proxy()
+            if proxy is None:
+                result["no_proxy"] += 1
+                continue
+            ok = proxy['proxy'] in alive
+            result["ok" if ok else "failed"] += 1
+            manager.report_result(proxy['proxy'], ok, 0.1 if ok else None)
+            result["alive_pool"].append(sum(1 for p in manager.working_proxies if p['proxy'] in alive))
+
+        await maintainer.stop()
+        result["final_pool"] = len(manager.working_proxies)
+        result["final_alive"] = sum(1 for p in manager.working_proxies if p['proxy'] in alive)
+        result["stats"] = maintainer.get_stats()
+        return result
+
+    logging.getLogger("proxy_scanner").setLevel(logging.WARNING)
+    logging.getLogger("proxy_health").setLevel(logging.WARNING)
+    print(
+        f"⏱️ {candidates} aday (%{working_ratio * 100:.0f} canlı), hedef {target}, {duration:.0f} sn, "
+        f"proxy ölüm olasılığı {death_rate:.2f}/sn"
+    )
+    for name, with_maintainer in (("bakımsız", False), ("arka plan bakımı", True)):
+        result = await run(with_maintainer)
+        fetches = result["ok"] + result["failed"] + result["no_proxy"]
+        print(
+            f"   {name:18s} başarılı fetch %{result['ok'] / fetches * 100:5.1f}  "
+            f"hatalı %{result['failed'] / fetches * 100:5.1f}  proxy yok %{result['no_proxy'] / fetches * 100:5.1f}  "
+            f"son havuz {result['final_pool']:2d} (canlı {result['final_alive']:2d}, "
+            f"ort. canlı {sum(result['alive_pool']) / max(1, len(result['alive_pool'])):4.1f})"
+        )
+        if with_maintainer:
+            stats = result["stats"]
+            print(
+                f"   {'':18s} tur {stats['rounds']}, test {stats['probed']}, deneme {stats['trials']} "
+                f"(kapanan {stats['closed']}), terfi {stats['promoted']}, yeni {stats['discovered']}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(_benchmark())
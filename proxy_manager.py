@@ -8,6 +8,15 @@ from datetime import datetime, timedelta
 import json
 import os
 
+from config import (
+    PROXY_UPDATE_INTERVAL, PROXY_TEST_TIMEOUT, PROXY_MAX_CONCURRENT_TESTS, PROXY_TEST_URL,
+    PROXY_TARGET_WORKING, PROXY_SCAN_MIN_CONCURRENCY, PROXY_SCAN_MAX_CONCURRENCY, PROXY_SOURCE_TIMEOUT,
+    PROXY_HEALTH_ALPHA, PROXY_COOLDOWN, PROXY_MAX_COOLDOWN, PROXY_DROP_AFTER_FAILURES, PROXY_DROP_FAILURE_RATE,
+    PROXY_ROTATION_TOP_K,
+)
+from proxy_health import ProxyHealthTracker
+from proxy_scanner import ProxyScanner
+
 logger = logging.getLogger(__name__)
 
 class ProxyManager:
@@ -32,17 +41,33 @@ class ProxyManager:
         # Proxy verileri
         self.proxies: List[Dict] = []
         self.working_proxies: List[Dict] = []
-        self.current_proxy_index = 0
+        
+        # Çalışan proxy'lerin sağlık modeli (gerçek fetch sonuçlarından) ve adres → proxy eşlemesi
+        self.health = ProxyHealthTracker(
+            alpha=PROXY_HEALTH_ALPHA,
+            cooldown=PROXY_COOLDOWN,
+            max_cooldown=PROXY_MAX_COOLDOWN,
+            drop_after=PROXY_DROP_AFTER_FAILURES,
+            drop_failure_rate=PROXY_DROP_FAILURE_RATE,
+        )
+        self._working_by_url: Dict[str, Dict] = {}
+        # Test edilmiş, rotasyona alınmamış yedek proxy'ler (düşen proxy'nin yerine hemen geçer)
+        self.standby_proxies: List[Dict] = []
         
         # Cache ve güncelleme ayarları
         self.cache_file = "proxy_cache.json"
         self.last_update = None
-        self.update_interval = timedelta(hours=6)  # 6 saatte bir güncelle
+        self.update_interval = timedelta(hours=PROXY_UPDATE_INTERVAL)
+        
+        # Kaynak bazında koşullu indirme bilgisi: {url: {"etag", "last_modified", "lines"}}
+        self.source_cache: Dict[str, Dict] = {}
+        self._source_cache_loaded = False
+        self.source_stats = {"downloaded": 0, "not_modified": 0, "failed": 0}
         
         # Test ayarları
-        self.test_url = "http://httpbin.org/ip"  # IP test URL'i
-        self.test_timeout = 10  # Test timeout süresi
-        self.max_concurrent_tests = 50  # Maksimum eşzamanlı test
+        self.test_url = PROXY_TEST_URL  # IP test URL'i
+        self.test_timeout = PROXY_TEST_TIMEOUT  # Test timeout süresi
+        self.max_concurrent_tests = PROXY_MAX_CONCURRENT_TESTS  # Başlangıç eşzamanlı test sayısı (AIMD ile değişir)
         
         # Performans izleme
         self.proxy_stats = {}
@@ -63,23 +88,10 @@ class ProxyManager:
             
             logger.info("🔄 Proxy listesi güncelleniyor...")
             
-            # Tüm kaynaklardan proxy'leri topla
-            all_proxies = set()
-            
-            for source in self.proxy_sources:
-                try:
-                    proxies = await self._fetch_proxies_from_source(source)
-                    all_proxies.update(proxies)
-                    logger.info(f"📡 {source}: {len(proxies)} proxy bulundu")
-                except Exception as e:
-                    logger.warning(f"⚠️ {source} hatası: {e}")
-            
-            # Proxy'leri parse et
+            # Tüm kaynaklardan proxy'leri topla ve parse et
             self.proxies = []
-            for proxy_str in all_proxies:
-                proxy = self._parse_proxy(proxy_str)
-                if proxy:
-                    self.proxies.append(proxy)
+            async for _ in self._iter_source_proxies():
+                pass
             
             logger.info(f"📊 Toplam {len(self.proxies)} proxy bulundu")
             
@@ -93,23 +105,95 @@ class ProxyManager:
             logger.error(f"❌ Proxy listesi güncelleme hatası: {e}")
             return False
     
-    async def _fetch_proxies_from_source(self, url: str) -> set:
-        """
-        Tek bir kaynaktan proxy listesi çeker
-        """
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=30) as response:
-                if response.status == 200:
-                    content = await response.text()
-                    # Satır satır parse et
-                    proxies = set()
-                    for line in content.strip().split('\n'):
-                        line = line.strip()
-                        if line and ':' in line and not line.startswith('#'):
-                            proxies.add(line)
-                    return proxies
-                else:
-                    raise Exception(f"HTTP {response.status}")
+    async def _iter_source_proxies(self):
+        """
+        Kaynakları paylaşılan session'la eşzamanlı indirir; satırlar geldikçe kaynaklar arası
+        tekilleştirilip parse edilir ve hemen verilir (self.proxies'e de eklenir)
+        """
+        self._load_source_cache()
+        queue: asyncio.Queue = asyncio.Queue()
+        seen = set()
+        
+        async def produce(session: aiohttp.ClientSession, url: str):
+            count = 0
+            try:
+                async for proxy_str in self._stream_source(session, url):
+                    # Tekilleştirme parse'tan önce: aynı satır ikinci kez işlenmez
+                    if proxy_str in seen:
+                        continue
+                    seen.add(proxy_str)
+                    proxy = self._parse_proxy(proxy_str)
+                    if proxy:
+                        count += 1
+                        queue.put_nowait(proxy)
+                logger.info(f"📡 {url}: {count} yeni proxy")
+            except Exception as e:
+                self.source_stats["failed"] += 1
+                logger.warning(f"⚠️ {url} hatası: {e}")
+        
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=PROXY_SOURCE_TIMEOUT)) as session:
+            producers = [asyncio.create_task(produce(session, url)) for url in self.proxy_sources]
+            finished = asyncio.gather(*producers)
+            finished.add_done_callback(lambda _: queue.put_nowait(None))
+            try:
+                while True:
+                    proxy = await queue.get()
+                    if proxy is None:
+                        break
+                    self.proxies.append(proxy)
+                    yield proxy
+            finally:
+                for task in producers:
+                    task.cancel()
+    
+    async def _stream_source(self, session: aiohttp.ClientSession, url: str):
+        """
+        Tek bir kaynağın proxy satırlarını akış halinde verir
+        ETag / Last-Modified ile koşullu istek: değişmemiş liste 304 ile cache'ten gelir
+        """
+        entry = self.source_cache.get(url, {})
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        
+        async with session.get(url, headers=headers) as response:
+            if response.status == 304 and "lines" in entry:
+                self.source_stats["not_modified"] += 1
+                logger.info(f"♻️ {url}: değişmemiş (304), cache'teki liste kullanılıyor")
+                for line in entry["lines"]:
+                    yield line
+                return
+            if response.status != 200:
+                raise Exception(f"HTTP {response.status}")
+            
+            # Gövde satır satır okunur, tamamı belleğe alınıp bölünmez
+            lines = []
+            async for raw_line in response.content:
+                line = raw_line.decode("utf-8", "ignore").strip()
+                if line and ':' in line and not line.startswith('#'):
+                    lines.append(line)
+                    yield line
+            
+            self.source_stats["downloaded"] += 1
+            self.source_cache[url] = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "lines": lines,
+            }
+    
+    def _load_source_cache(self):
+        """Kaynak doğrulayıcılarını (ETag / Last-Modified) cache dosyasından bir kez yükler"""
+        if self._source_cache_loaded:
+            return
+        self._source_cache_loaded = True
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r') as f:
+                    self.source_cache = json.load(f).get('sources', {})
+        except Exception as e:
+            logger.error(f"❌ Kaynak cache yükleme hatası: {e}")
     
     def _parse_proxy(self, proxy_str: str) -> Optional[Dict]:
         """
@@ -171,51 +255,59 @@ class ProxyManager:
         except:
             return False
     
-    async def test_proxies(self, max_proxies: int = 100) -> int:
+    def _make_scanner(self) -> ProxyScanner:
+        return ProxyScanner(
+            test_url=self.test_url,
+            timeout=self.test_timeout,
+            concurrency=self.max_concurrent_tests,
+            min_concurrency=PROXY_SCAN_MIN_CONCURRENCY,
+            max_concurrency=PROXY_SCAN_MAX_CONCURRENCY,
+        )
+    
+    async def test_proxies(self, max_proxies: Optional[int] = None, target: int = PROXY_TARGET_WORKING) -> int:
         """
-        Proxy'leri test eder ve çalışanları filtreler
+        Proxy'leri test eder, target kadar çalışan bulununca durur
+        max_proxies: test edilecek en fazla aday (None: hepsi)
         """
         if not self.proxies:
             logger.warning("⚠️ Test edilecek proxy yok!")
             return 0
         
-        logger.info(f"🧪 {min(len(self.proxies), max_proxies)} proxy test ediliyor...")
+        candidates = self.proxies if max_proxies is None else self.proxies[:max_proxies]
+        logger.info(f"🧪 {len(candidates)} aday arasından {target} çalışan proxy aranıyor...")
         
-        # Test edilecek proxy'leri seç
-        test_proxies = self.proxies[:max_proxies]
+        # Tek paylaşılan session, uyarlanabilir eşzamanlılık, hedefe ulaşınca erken çıkış
+        self._set_working(await self._make_scanner().scan(candidates, target))
         
-        # Eşzamanlı test
-        semaphore = asyncio.Semaphore(self.max_concurrent_tests)
+        logger.info(f"✅ {len(self.working_proxies)} çalışan proxy bulundu")
         
-        async def test_single_proxy(proxy):
-            async with semaphore:
-                return await self._test_single_proxy(proxy)
-        
-        # Tüm proxy'leri test et
-        tasks = [test_single_proxy(proxy) for proxy in test_proxies]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Cache'e kaydet
+        self._save_to_cache()
         
-        # Sonuçları işle
-        working_count = 0
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logger.debug(f"❌ {test_proxies[i]['proxy']} test hatası: {result}")
-                test_proxies[i]['working'] = False
-                test_proxies[i]['fail_count'] += 1
-            elif result:
-                test_proxies[i]['working'] = True
-                test_proxies[i]['success_count'] += 1
-                working_count += 1
+        return len(self.working_proxies)
+    
+    async def discover_proxies(self, target: int = PROXY_TARGET_WORKING, force_update: bool = False) -> int:
+        """
+        Proxy listesi inerken adayları test eder; target kadar çalışan proxy bulununca döner
+        Cache tazeyse cache'teki liste taranır
+        """
+        if not force_update and self._should_use_cache() and self._load_from_cache():
+            logger.info(f"✅ Cache'den {len(self.proxies)} proxy yüklendi")
+            return await self.test_proxies(target=target)
         
-        # Çalışan proxy'leri filtrele
-        self.working_proxies = [p for p in test_proxies if p['working']]
+        logger.info("🔄 Proxy listesi indirilirken test ediliyor...")
+        self.proxies = []
+        stream = self._iter_source_proxies()
+        self._set_working(await self._make_scanner().scan(stream, target))
         
-        logger.info(f"✅ {working_count}/{len(test_proxies)} proxy çalışıyor")
+        # Tarama erken bittiyse listenin kalanı da toplanır (cache ve sonraki taramalar için)
+        async for _ in stream:
+            pass
+        logger.info(f"📊 Toplam {len(self.proxies)} proxy, {len(self.working_proxies)} çalışan")
         
-        # Cache'e kaydet
+        self.last_update = datetime.now()
         self._save_to_cache()
-        
-        return working_count
+        return len(self.working_proxies)
     
     async def _test_single_proxy(self, proxy: Dict) -> bool:
         """
@@ -242,18 +334,59 @@ class ProxyManager:
             proxy['last_tested'] = datetime.now()
             return False
     
+    def _set_working(self, proxies: List[Dict]):
+        """
+        Çalışan proxy listesini ayarla ve sağlık modelini eşitle
+        (listede kalanların geçmişi korunur, yeniler test gecikmesiyle başlar)
+        """
+        working_by_url = {proxy['proxy']: proxy for proxy in proxies}
+        for url in self._working_by_url.keys() - working_by_url.keys():
+            self.health.remove(url)
+        for url, proxy in working_by_url.items():
+            self.health.add(url, proxy.get('response_time'))
+        self.working_proxies = list(working_by_url.values())
+        self._working_by_url = working_by_url
+    
+    def report_result(self, proxy_url: str, success: bool, latency: Optional[float] = None):
+        """
+        Gerçek bir fetch'in (ProFinance, TradingView) sonucunu sağlık modeline işler
+        Sürekli hata veren proxy çalışan listeden çıkarılır
+        """
+        proxy = self._working_by_url.get(proxy_url)
+        if proxy is None:
+            return
+        if success:
+            proxy['success_count'] = proxy.get('success_count', 0) + 1
+        else:
+            proxy['fail_count'] = proxy.get('fail_count', 0) + 1
+        self._record_health(proxy, success, latency)
+    
+    def record_probe(self, proxy: Dict):
+        """
+        Arka plan testinin (ProxyScanner, sayaçları kendisi günceller) sonucunu sağlık modeline işler
+        """
+        if proxy['proxy'] in self._working_by_url:
+            self._record_health(proxy, proxy.get('working', False), proxy.get('response_time'))
+    
+    def _record_health(self, proxy: Dict, success: bool, latency: Optional[float]):
+        proxy_url = proxy['proxy']
+        if success:
+            self.health.record_success(proxy_url, latency)
+        elif self.health.record_failure(proxy_url):
+            del self._working_by_url[proxy_url]
+            self.working_proxies.remove(proxy)
+    
+    def add_working(self, proxies: List[Dict]):
+        """Test edilmiş proxy'leri rotasyona ekle (mevcutların geçmişi korunur)"""
+        self._set_working(self.working_proxies + proxies)
+    
     def get_next_proxy(self) -> Optional[Dict]:
         """
-        Sıradaki çalışan proxy'yi döner
+        Rotasyon: sağlık skoru en iyi PROXY_ROTATION_TOP_K proxy arasından ağırlıklı rastgele seçer
+        (istekler tek çıkış IP'sinde toplanmaz; hepsi cooldown'daysa None)
         """
-        if not self.working_proxies:
-            return None
-        
-        # Round-robin rotation
-        proxy = self.working_proxies[self.current_proxy_index]
-        self.current_proxy_index = (self.current_proxy_index + 1) % len(self.working_proxies)
-        
-        return proxy
+        url = self.health.select(PROXY_ROTATION_TOP_K)
+        return self._working_by_url.get(url) if url else None
     
     def get_random_proxy(self) -> Optional[Dict]:
         """
@@ -266,18 +399,10 @@ class ProxyManager:
     
     def get_fastest_proxy(self) -> Optional[Dict]:
         """
-        En hızlı proxy'yi döner
+        En hızlı proxy'yi döner (gecikme EWMA'sı hata oranıyla düzeltilmiş, O(log n))
         """
-        if not self.working_proxies:
-            return None
-        
-        # Response time'a göre sırala
-        sorted_proxies = sorted(
-            [p for p in self.working_proxies if p['response_time'] is not None],
-            key=lambda x: x['response_time']
-        )
-        
-        return sorted_proxies[0] if sorted_proxies else None
+        url = self.health.select()
+        return self._working_by_url.get(url) if url else None
     
     def _should_use_cache(self) -> bool:
         """
@@ -292,25 +417,28 @@ class ProxyManager:
         """
         Proxy listesini cache'e kaydeder
         """
+        # Kaynak doğrulayıcıları henüz okunmadıysa önce yükle (boş haliyle üzerine yazılmasın)
+        self._load_source_cache()
         try:
             # Proxy verilerini kopyala ve datetime'ları temizle
             proxies_copy = []
             for proxy in self.proxies:
                 proxy_copy = proxy.copy()
-                if proxy_copy.get('last_tested'):
+                if isinstance(proxy_copy.get('last_tested'), datetime):
                     proxy_copy['last_tested'] = proxy_copy['last_tested'].isoformat()
                 proxies_copy.append(proxy_copy)
             
             working_proxies_copy = []
             for proxy in self.working_proxies:
                 proxy_copy = proxy.copy()
-                if proxy_copy.get('last_tested'):
+                if isinstance(proxy_copy.get('last_tested'), datetime):
                     proxy_copy['last_tested'] = proxy_copy['last_tested'].isoformat()
                 working_proxies_copy.append(proxy_copy)
             
             cache_data = {
                 'proxies': proxies_copy,
                 'working_proxies': working_proxies_copy,
+                'sources': self.source_cache,
                 'last_update': self.last_update.isoformat() if self.last_update else None
             }
             
@@ -333,8 +461,13 @@ class ProxyManager:
             with open(self.cache_file, 'r') as f:
                 cache_data = json.load(f)
             
+            # JSON'daki ISO tarihleri datetime'a çevrilir (kaydederken tekrar isoformat edilir)
+            for proxy in cache_data.get('proxies', []) + cache_data.get('working_proxies', []):
+                if isinstance(proxy.get('last_tested'), str):
+                    proxy['last_tested'] = datetime.fromisoformat(proxy['last_tested'])
+            
             self.proxies = cache_data.get('proxies', [])
-            self.working_proxies = cache_data.get('working_proxies', [])
+            self._set_working(cache_data.get('working_proxies', []))
             
             if cache_data.get('last_update'):
                 self.last_update = datetime.fromisoformat(cache_data['last_update'])
@@ -357,7 +490,8 @@ class ProxyManager:
                 'total': 0,
                 'working': 0,
                 'working_percentage': 0,
-                'last_update': self.last_update.isoformat() if self.last_update else None
+                'last_update': self.last_update.isoformat() if self.last_update else None,
+                'health': self.health.get_stats(),
             }
         
         working_percentage = (working_proxies / total_proxies) * 100
@@ -374,6 +508,9 @@ class ProxyManager:
             'working': working_proxies,
             'working_percentage': round(working_percentage, 2),
             'avg_response_time': round(avg_response_time, 3) if avg_response_time else None,
+            'standby': len(self.standby_proxies),
+            'sources': dict(self.source_stats),
+            'health': self.health.get_stats(),
             'last_update': self.last_update.isoformat() if self.last_update else None
         }
     
@@ -405,7 +542,7 @@ async def test_proxy_manager():
             return
         
         # Proxy'leri test et
-        working_count = await manager.test_proxies(max_proxies=50)
+        working_count = await manager.test_proxies()
         
         # İstatistikleri göster
         stats = manager.get_stats()
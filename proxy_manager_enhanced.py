@@ -10,6 +10,9 @@ import logging
 from typing import List, Optional, Dict
 from datetime import datetime, timedelta
 
+from config import PROXY_TARGET_WORKING, PROXY_SCAN_MIN_CONCURRENCY, PROXY_SCAN_MAX_CONCURRENCY
+from proxy_scanner import ProxyScanner
+
 logger = logging.getLogger(__name__)
 
 class EnhancedProxyManager:
@@ -20,10 +23,8 @@ class EnhancedProxyManager:
         self.last_update = None
         self.update_interval = timedelta(hours=6)  # 6 saatte bir güncelle
         
-    async def load_proxies(self) -> List[Dict[str, str]]:
-        """Proxy listesini yükle (çeşitli kaynaklardan)"""
-        proxies = []
-        
+    async def iter_proxies(self):
+        """Proxy'leri kaynaklar indikçe ver (çeşitli kaynaklardan)"""
         # Ücretsiz proxy kaynakları
         proxy_sources = [
             "https://raw.githubusercontent.com/TheSpeedX/PROXY-List/master/http.txt",
@@ -45,15 +46,18 @@ class EnhancedProxyManager:
                                         ip, port = line.split(':')
                                         # Port'un sayı olduğunu kontrol et
                                         int(port)
-                                        proxies.append({
+                                        yield {
                                             'http': f'http://{ip}:{port}',
                                             'https': f'http://{ip}:{port}'
-                                        })
+                                        }
                                     except ValueError:
                                         continue
             except Exception as e:
                 logger.warning(f"Proxy kaynağı yüklenemedi {source}: {e}")
-        
+    
+    async def load_proxies(self) -> List[Dict[str, str]]:
+        """Proxy listesini yükle (çeşitli kaynaklardan)"""
+        proxies = [proxy async for proxy in self.iter_proxies()]
         logger.info(f"📡 {len(proxies)} proxy yüklendi")
         return proxies
     
@@ -83,25 +87,15 @@ class EnhancedProxyManager:
         
         logger.info("🔄 Proxy listesi güncelleniyor...")
         
-        # Yeni proxy'leri yükle
-        new_proxies = await self.load_proxies()
-        
-        # Çalışan proxy'leri test et
-        working = []
-        test_count = min(100, len(new_proxies))  # İlk 100'ü test et
-        
-        logger.info(f"🔍 {test_count} proxy test ediliyor...")
-        
-        for i, proxy in enumerate(new_proxies[:test_count]):
-            if await self.test_proxy(proxy):
-                working.append(proxy)
-                logger.info(f"✅ Çalışan proxy {len(working)}: {proxy['http']}")
-                if len(working) >= 20:  # 20 çalışan proxy yeter
-                    break
-            
-            # Her 10 testte bir ilerleme göster
-            if (i + 1) % 10 == 0:
-                logger.info(f"📊 Test edilen: {i+1}/{test_count}, Çalışan: {len(working)}")
+        # Kaynaklar inerken test et, yeterli çalışan proxy bulununca dur
+        scanner = ProxyScanner(
+            test_url='http://httpbin.org/ip',
+            timeout=8,
+            min_concurrency=PROXY_SCAN_MIN_CONCURRENCY,
+            max_concurrency=PROXY_SCAN_MAX_CONCURRENCY,
+            proxy_url=lambda proxy: proxy['http'],
+        )
+        working = await scanner.scan(self.iter_proxies(), PROXY_TARGET_WORKING)
         
         self.working_proxies = working
         self.last_update = datetime.now()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Proxy Scanner - Akış halinde, uyarlanabilir eşzamanlılıkla proxy tarayıcı
+- Tüm testler tek bir paylaşılan connector/session üzerinden yapılır
+- Adaylar async iterator'dan okunur: kaynaklar inerken testler başlar
+- Eşzamanlılık AIMD ile ayarlanır: timeout oranı olağan seviyesini aşarsa yarıya iner,
+  aşmıyorsa kademeli artar (ölü proxy'lerin timeout'u olağandır, artış tıkanmayı gösterir)
+- Hedef sayıda çalışan proxy bulununca tarama durur, kalan testler iptal edilir
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import AsyncIterable, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+OK = "ok"
+TIMEOUT = "timeout"
+FAILED = "failed"
+
+
+async def _aiter(candidates: Union[Iterable, AsyncIterable]):
+    if hasattr(candidates, "__aiter__"):
+        async for item in candidates:
+            yield item
+    else:
+        for item in candidates:
+            yield item
+
+
+class ProxyScanner:
+    """
+    proxy_url(proxy): aday sözlüğünden proxy adresini çıkarır
+    probe(session, proxy_url): test isteği; OK / TIMEOUT / FAILED döndürür
+    (verilmezse test_url'e proxy üzerinden GET yapılır)
+    """
+
+    def __init__(
+        self,
+        test_url: str = "http://httpbin.org/ip",
+        timeout: float = 10,
+        concurrency: int = 50,
+        min_concurrency: int = 10,
+        max_concurrency: int = 200,
+        window: int = 40,
+        timeout_margin: float = 0.2,
+        proxy_url: Callable[[Dict], str] = lambda proxy: proxy["proxy"],
+        probe: Optional[Callable[[aiohttp.ClientSession, str], Awaitable[str]]] = None,
+    ):
+        self.test_url = test_url
+        self.timeout = timeout
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.concurrency = min(max(concurrency, self.min_concurrency), self.max_concurrency)
+        self.window = window
+        self.timeout_margin = timeout_margin
+        self.baseline_timeout_rate: Optional[float] = None
+        self.proxy_url = proxy_url
+        self.probe = probe or self._probe
+
+        # Pencere = art arda başlatılan window test; karar, penceredeki testlerin hepsi bitince verilir
+        # (bitiş sırasına göre pencere hızlı hataları önce, timeout'ları sonra görür)
+        # Pencere boyu bir "tur": en az window, en fazla o anki eşzamanlılık kadar test
+        self._epoch = 0
+        self._epoch_started = 0
+        self._epoch_sizes: Dict[int, int] = {}
+        self._change_epoch = 0
+        self._epoch_outcomes: Dict[int, List[str]] = {}
+
+        # İstatistikler
+        self.stats = {
+            "tested": 0, "working": 0, "timeouts": 0, "failed": 0, "duplicates": 0,
+            "cancelled": 0, "increases": 0, "decreases": 0, "elapsed": 0.0,
+        }
+
+    async def _probe(self, session: aiohttp.ClientSession, proxy_url: str) -> str:
+        try:
+            async with session.get(self.test_url, proxy=proxy_url) as response:
+                if response.status != 200:
+                    return FAILED
+                await response.read()
+                return OK
+        except asyncio.TimeoutError:
+            return TIMEOUT
+        except Exception:
+            return FAILED
+
+    async def _test(self, session: aiohttp.ClientSession, proxy: Dict) -> str:
+        start = time.perf_counter()
+        outcome = await self.probe(session, self.proxy_url(proxy))
+        proxy["last_tested"] = datetime.now()
+        if outcome == OK:
+            proxy["working"] = True
+            proxy["response_time"] = time.perf_counter() - start
+            proxy["success_count"] = proxy.get("success_count", 0) + 1
+        else:
+            proxy["working"] = False
+            proxy["fail_count"] = proxy.get("fail_count", 0) + 1
+        return outcome
+
+    def _start_epoch(self) -> int:
+        epoch = self._epoch
+        size = self._epoch_sizes.setdefault(epoch, max(self.window, self.concurrency))
+        self._epoch_started += 1
+        if self._epoch_started >= size:
+            self._epoch += 1
+            self._epoch_started = 0
+        return epoch
+
+    def _record(self, outcome: str, epoch: int):
+        self.stats["tested"] += 1
+        self.stats[{OK: "working", TIMEOUT: "timeouts", FAILED: "failed"}[outcome]] += 1
+        outcomes = self._epoch_outcomes.setdefault(epoch, [])
+        outcomes.append(outcome)
+        if len(outcomes) < self._epoch_sizes[epoch]:
+            return
+        del self._epoch_outcomes[epoch]
+        del self._epoch_sizes[epoch]
+        if epoch < self._change_epoch:
+            # Son değişiklikten önce başlamış pencere: eski eşzamanlılığı ölçüyor
+            return
+
+        # AIMD: tur başına en fazla bir karar
+        self._change_epoch = self._epoch + 1
+        timeout_rate = outcomes.count(TIMEOUT) / len(outcomes)
+        baseline = self.baseline_timeout_rate
+        if baseline is not None and timeout_rate > baseline + self.timeout_margin:
+            if self.concurrency > self.min_concurrency:
+                self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+                self.stats["decreases"] += 1
+                logger.debug(f"📉 Proxy tarama eşzamanlılığı: {self.concurrency} (timeout %{timeout_rate * 100:.0f})")
+            return
+
+        # Olağan timeout oranı: düşüşleri hızlı, yükselişleri yavaş izler (tıkanma sinsice tabana karışmasın)
+        if baseline is None:
+            self.baseline_timeout_rate = timeout_rate
+        else:
+            alpha = 0.5 if timeout_rate < baseline else 0.05
+            self.baseline_timeout_rate = baseline + alpha * (timeout_rate - baseline)
+        if self.concurrency < self.max_concurrency:
+            self.concurrency = min(self.max_concurrency, self.concurrency + max(1, self.concurrency // 10))
+            self.stats["increases"] += 1
+            logger.debug(f"📈 Proxy tarama eşzamanlılığı: {self.concurrency} (timeout %{timeout_rate * 100:.0f})")
+
+    async def scan(self, candidates: Union[Iterable[Dict], AsyncIterable[Dict]], target: int) -> List[Dict]:
+        """
+        Adayları test et, target kadar çalışan proxy bulununca dur
+        Dönüş: çalışan proxy'ler (bulunma sırasıyla)
+        """
+        start = time.perf_counter()
+        found: List[Dict] = []
+        seen = set()
+        active: Dict[asyncio.Task, tuple] = {}
+
+        def collect(done):
+            for task in done:
+                proxy, epoch = active.pop(task)
+                outcome = task.result()
+                self._record(outcome, epoch)
+                if outcome == OK:
+                    found.append(proxy)
+
+        # Proxy'ler farklı host'lar: bağlantılar yeniden kullanılmaz, soketler hemen kapanır
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, force_close=True, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            try:
+                async for proxy in _aiter(candidates):
+                    if len(found) >= target:
+                        break
+                    url = self.proxy_url(proxy)
+                    if url in seen:
+                        self.stats["duplicates"] += 1
+                        continue
+                    seen.add(url)
+
+                    # Slot açılana kadar biten testleri topla (limit AIMD ile değişebilir)
+                    while len(active) >= self.concurrency:
+                        done, _ = await asyncio.wait(active, return_when=asyncio.FIRST_COMPLETED)
+                        collect(done)
+                    if len(found) >= target:
+                        break
+                    active[asyncio.create_task(self._test(session, proxy))] = (proxy, self._start_epoch())
+
+                while active and len(found) < target:
+                    done, _ = await asyncio.wait(active, return_when=asyncio.FIRST_COMPLETED)
+                    collect(done)
+            finally:
+                # Erken çıkış: hedefe ulaşıldı, kalan testlere gerek yok
+                for task in active:
+                    task.cancel()
+                self.stats["cancelled"] += len(active)
+                await asyncio.gather(*active, return_exceptions=True)
+
+        found = found[:target]
+        self.stats["elapsed"] = time.perf_counter() - start
+        logger.info(
+            f"🧪 Proxy tarama: {len(found)} çalışan / {self.stats['tested']} test, "
+            f"{self.stats['timeouts']} timeout, eşzamanlılık {self.concurrency}, "
+            f"{self.stats['elapsed']:.1f}s"
+        )
+        return found
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "concurrency": self.concurrency}
+
+
+async def _benchmark(candidates: int = 20000, working_ratio: float = 0.05, target: int = 20,
+                     timeout: float = 1.0, capacity: int = 150):
+    """
+    Simüle edilmiş proxy'lerle tarama süresi: sabit dilim + hepsini bekle vs akış + erken çıkış
+    Ölü proxy'lerin yarısı timeout'a düşer; eşzamanlı test sayısı capacity'yi aşınca
+    bant genişliği tükenmiş gibi her teste ek timeout olasılığı gelir
+    """
+    import random
+
+    rng = random.Random(42)
+    working = {f"http://10.0.{i // 256}.{i % 256}:8080" for i in range(candidates) if rng.random() < working_ratio}
+    pool = [{"proxy": f"http://10.0.{i // 256}.{i % 256}:8080"} for i in range(candidates)]
+    state = {"active": 0}
+
+    async def probe(session, proxy_url):
+        state["active"] += 1
+        try:
+            overload = min(1.0, max(0, state["active"] - capacity) / capacity)
+            if rng.random() < overload:
+                await asyncio.sleep(timeout)
+                return TIMEOUT
+            if proxy_url in working:
+                await asyncio.sleep(rng.uniform(0.05, 0.3))
+                return OK
+            if rng.random() < 0.5:
+                await asyncio.sleep(timeout)
+                return TIMEOUT
+            await asyncio.sleep(rng.uniform(0.01, 0.1))
+            return FAILED
+        finally:
+            state["active"] -= 1
+
+    async def fixed_slice(limit: int, concurrency: int):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(proxy):
+            async with semaphore:
+                return await probe(None, proxy["proxy"])
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(p) for p in pool[:limit]))
+        return time.perf_counter() - start, results.count(OK), limit
+
+    async def slow_source():
+        # Kaynak listeler parça parça iniyor
+        for index in range(0, len(pool), 2000):
+            await asyncio.sleep(0.2)
+            for proxy in pool[index:index + 2000]:
+                yield proxy
+
+    print(f"⏱️ {candidates} aday, %{working_ratio * 100:.0f} çalışan, hedef {target}, timeout {timeout:.1f}s")
+    for limit, concurrency in ((100, 50), (2000, 50), (2000, 400)):
+        elapsed, ok, tested = await fixed_slice(limit, concurrency)
+        print(f"   sabit dilim [:{limit}] ({concurrency} eşzamanlı) {elapsed:6.2f} sn  {ok:4d} çalışan / {tested} test")
+
+    scanner = ProxyScanner(timeout=timeout, probe=probe, max_concurrency=1000)
+    start = time.perf_counter()
+    found = await scanner.scan(slow_source(), target)
+    elapsed = time.perf_counter() - start
+    stats = scanner.get_stats()
+    print(
+        f"   akış + AIMD + erken çıkış           {elapsed:6.2f} sn  {len(found):4d} çalışan / {stats['tested']} test  "
+        f"(eşzamanlılık {stats['concurrency']}, +{stats['increases']}/-{stats['decreases']})"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(_benchmark())
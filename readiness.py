@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Readiness - Sabit beklemeler yerine içerik tabanlı hazır olma kontrolü
+- Sayfa, verilen koşul (predicate) sağlanana kadar kısa aralıklarla yoklanır
+- Gözlemlenen hazır olma süreleri kaydedilir, timeout bunlara göre uyarlanır
+- Süre aşımları da geri besler: art arda timeout'ta bütçe max_timeout'a doğru büyür
+- Anti-bot gecikmesi proxy başına bütçe olarak uygulanır
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Dict, Optional
+
+
+class ReadinessTracker:
+    """
+    Gözlemlenen hazır olma sürelerinden uyarlanabilir timeout üretir
+    Süre aşımı, dolan bütçe kadar alt sınır (sansürlü) örnek olarak kaydedilir ve
+    art arda her timeout bütçeyi backoff katı büyütür; ilk başarıda geri çekilme sıfırlanır
+    """
+
+    def __init__(
+        self,
+        min_timeout: float = 2.0,
+        max_timeout: float = 8.0,
+        factor: float = 2.0,
+        min_samples: int = 5,
+        window: int = 50,
+        backoff: float = 1.5,
+    ):
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.factor = factor
+        self.min_samples = min_samples
+        self.backoff = backoff
+        self.samples: deque = deque(maxlen=window)
+        self.timeouts = 0
+        self.consecutive_timeouts = 0
+
+    def record(self, seconds: float):
+        """Başarılı bir hazır olma süresini kaydet"""
+        self.samples.append(seconds)
+        self.consecutive_timeouts = 0
+
+    def record_timeout(self, budget: Optional[float] = None):
+        """
+        Süre aşımını kaydet
+        budget: dolan bütçe; uyarlanabilir timeout kadarsa sansürlü örnek olarak eklenir
+        (istek deadline'ı yüzünden kısalmış bütçe sayfanın yavaşladığını göstermez)
+        """
+        self.timeouts += 1
+        if budget is not None and budget >= self._learned_timeout() - 1e-3:
+            self.samples.append(budget)
+            self.consecutive_timeouts += 1
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(len(ordered) * p))
+        return ordered[index]
+
+    def _learned_timeout(self) -> float:
+        if len(self.samples) < self.min_samples:
+            return self.max_timeout
+        p95 = self.percentile(0.95)
+        return max(self.min_timeout, min(self.max_timeout, p95 * self.factor))
+
+    def timeout(self) -> float:
+        """
+        Şu anki timeout (saniye): p95 × factor, [min, max] aralığında
+        Yeterli örnek yoksa max timeout kullanılır; art arda timeout'larda backoff ile büyür
+        """
+        learned = self._learned_timeout()
+        if self.consecutive_timeouts:
+            return min(self.max_timeout, learned * self.backoff ** self.consecutive_timeouts)
+        return learned
+
+    def get_stats(self) -> Dict:
+        p50 = self.percentile(0.5)
+        p95 = self.percentile(0.95)
+        return {
+            "samples": len(self.samples),
+            "timeouts": self.timeouts,
+            "consecutive_timeouts": self.consecutive_timeouts,
+            "p50": round(p50, 3) if p50 is not None else None,
+            "p95": round(p95, 3) if p95 is not None else None,
+            "current_timeout": round(self.timeout(), 3),
+        }
+
+
+class JitterBudget:
+    """
+    Proxy başına anti-bot gecikme bütçesi
+    Aynı çıkış noktasından art arda gelen istekler arasında rastgele bir
+    minimum aralık bırakılır; aralık zaten geçmişse hiç beklenmez
+    """
+
+    def __init__(self, min_spacing: float = 1.0, max_spacing: float = 3.0):
+        self.min_spacing = min_spacing
+        self.max_spacing = max_spacing
+        self._last_used: Dict[str, float] = {}
+
+    def delay_for(self, key: str) -> float:
+        """Bu çıkış noktası için beklenmesi gereken süre (saniye)"""
+        last = self._last_used.get(key)
+        if last is None:
+            return 0.0
+        target = random.uniform(self.min_spacing, self.max_spacing)
+        return max(0.0, target - (time.monotonic() - last))
+
+    def mark(self, key: str):
+        """Çıkış noktasının kullanıldığını kaydet"""
+        self._last_used[key] = time.monotonic()
+
+
+def time_left(deadline: Optional[float], cap: float) -> float:
+    """
+    deadline'a kalan süre (saniye), cap ile sınırlı ve negatif olmayan
+    deadline None ise cap döner
+    """
+    if deadline is None:
+        return cap
+    return max(0.0, min(cap, deadline - time.monotonic()))
+
+
+async def wait_for_ready(page, predicate_js: str, deadline: float, interval: float = 0.1) -> bool:
+    """
+    predicate_js sayfada true dönene kadar yokla
+
+    deadline: time.monotonic() cinsinden son an
+    Koşul sağlanırsa True, süre dolarsa False döner
+    """
+    while True:
+        try:
+            if await page.evaluate(predicate_js):
+                return True
+        except Exception:
+            # Navigasyon sırasında context yok edilebilir, tekrar dene
+            pass
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        await asyncio.sleep(min(interval, remaining))
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Single Flight - Aynı anda gelen aynı istekleri tek bir upstream çağrısında birleştirir
+İlk çağıran fetch'i başlatır, diğerleri aynı sonucu (veya hatayı) bekler
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from readiness import time_left
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Anahtar başına tek uçuştaki (in-flight) görev
+    - Aynı anahtar için eşzamanlı çağrılar aynı görevi bekler
+    - Görev bitince anahtar serbest kalır, sonraki çağrı yeni fetch başlatır
+    - Bekleyenlerden biri iptal edilirse görev diğerleri için devam eder
+    - Fetch, başlatanın deadline'ı ile çalışır; bağlanan kendi deadline'ına kadar bekler ve
+      uçuş daha erken bir deadline yüzünden boş döndüyse kalan süresiyle bir kez daha dener
+    """
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._deadlines: Dict[Hashable, Optional[float]] = {}
+
+        # İstatistikler
+        self.stats = {"calls": 0, "executions": 0, "coalesced": 0, "errors": 0, "retries": 0}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    @staticmethod
+    def _outlives(deadline: Optional[float], flight_deadline: Optional[float]) -> bool:
+        # deadline None: süre sınırı yok, her sınırlı uçuştan uzun yaşar
+        return flight_deadline is not None and (deadline is None or deadline > flight_deadline)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], deadline: Optional[float] = None) -> Any:
+        """
+        fn'i anahtar için tek sefer çalıştır, eşzamanlı çağıranlar sonucu paylaşır
+        deadline: time.monotonic() cinsinden bu çağıranın son anı (fn de buna göre sınırlanmış olmalı)
+        Bağlanan çağıran deadline'ı dolunca asyncio.TimeoutError alır
+        """
+        self.stats["calls"] += 1
+        retried = False
+        while True:
+            task = self._inflight.get(key)
+            if task is None:
+                self.stats["executions"] += 1
+                task = asyncio.ensure_future(fn())
+                self._inflight[key] = task
+                self._deadlines[key] = deadline
+                task.add_done_callback(lambda t: self._on_done(key, t))
+                # shield: bekleyen iptal edilse bile görev diğerleri için sürer
+                return await asyncio.shield(task)
+
+            self.stats["coalesced"] += 1
+            logger.debug(f"🔗 {self.name}:{key} uçuştaki fetch'e bağlandı")
+            flight_deadline = self._deadlines.get(key)
+
+            def can_retry() -> bool:
+                # Çağıran başına en fazla bir yeniden deneme: kesintide upstream çağrıları zincirlenmesin
+                return not retried and self._outlives(deadline, flight_deadline) and time_left(deadline, 1) > 0
+
+            try:
+                if deadline is None:
+                    result = await asyncio.shield(task)
+                else:
+                    result = await asyncio.wait_for(asyncio.shield(task), time_left(deadline, float("inf")))
+            except asyncio.TimeoutError:
+                if task.done() and can_retry():
+                    # Uçuşun kendi (daha kısa) süresi doldu, bu çağıranın hâlâ vakti var
+                    retried = True
+                    self.stats["retries"] += 1
+                    continue
+                raise
+            except Exception:
+                if can_retry():
+                    retried = True
+                    self.stats["retries"] += 1
+                    continue
+                raise
+            if result is None and can_retry():
+                # Boş sonuç, başlatanın kısa deadline'ından olabilir: kalan süreyle bir kez yeniden dene
+                retried = True
+                self.stats["retries"] += 1
+                continue
+            return result
+
+    def _on_done(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            self._deadlines.pop(key, None)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            # Hata tüm bekleyenlere iletilir; burada sadece sayılır
+            self.stats["errors"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "in_flight": len(self._inflight)}
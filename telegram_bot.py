@@ -1,13 +1,34 @@
 import logging
 import time
 import os
+import secrets
 import signal
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 from price_fetcher_fast import FastPriceFetcher
 from tradingview_chart_fetcher import TradingViewChartFetcher
 from yfinance_fetcher import YFinanceFetcher
-from config import ENABLE_INSTANCE_CONTROL, INSTANCE_CHECK_INTERVAL, PRICE_VALIDATION_TOLERANCE
+from browser_service import browser_service
+from price_poller import PricePoller
+from chat_sessions import ChatSessionStore
+from update_processor import ChatOrderedUpdateProcessor
+from xauusd_aggregator import build_default_aggregator
+from progressive_message import ProgressiveMessage
+from webhook_server import WebhookServer
+from proxy_maintainer import ProxyMaintainer
+from config import (
+    ENABLE_INSTANCE_CONTROL, INSTANCE_CHECK_INTERVAL, PRICE_VALIDATION_TOLERANCE,
+    ENABLE_RESIDENT_XAUUSD_PAGE, ENABLE_PROFINANCE_WATCHER,
+    ENABLE_BACKGROUND_POLLER, PRICE_POLL_INTERVAL, PRICE_FRESHNESS_SECONDS,
+    VALIDATION_DEADLINE, CHAT_SESSION_MAX, CHAT_SESSION_TTL,
+    MAX_CONCURRENT_UPDATES, MAX_PENDING_UPDATES, FAST_LANE_CONCURRENCY,
+    ENABLE_XAUUSD_AGGREGATOR, XAUUSD_AGG_SOURCES, XAUUSD_AGG_DEADLINE, XAUUSD_AGG_TOLERANCE,
+    XAUUSD_AGG_TRUST_WEIGHT, XAUUSD_AGG_LEARNING_RATE,
+    REQUEST_DEADLINE, REQUEST_LATE_DEADLINE, PROGRESSIVE_PLACEHOLDER_DELAY, PROGRESSIVE_EDIT_INTERVAL,
+    BOT_MODE, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_SECRET,
+    ENABLE_PROXY_MAINTAINER, PROXY_MAINTAIN_INTERVAL, PROXY_TARGET_WORKING, PROXY_STANDBY_SIZE,
+    PROXY_REVALIDATE_SAMPLE, PROXY_MAINTAIN_SCAN_LIMIT,
+)
 import asyncio
 
 # Logging ayarları
@@ -23,9 +44,45 @@ class TelegramBot:
         self.price_fetcher = FastPriceFetcher()
         self.xauusd_fetcher = TradingViewChartFetcher()
         self.yfinance_fetcher = YFinanceFetcher()  # Fiyat doğrulama için
-        self.application = Application.builder().token(token).build()
-        self.last_xaurub_price = None  # Son XAURUB fiyatı
-        self.last_xauusd_price = None  # Son XAUUSD fiyatı (hafızada)
+        # XAUUSD: tüm kaynaklar süre sınırı altında, konsensüsle
+        self.xauusd_aggregator = build_default_aggregator(
+            self.xauusd_fetcher,
+            XAUUSD_AGG_SOURCES,
+            deadline=XAUUSD_AGG_DEADLINE,
+            tolerance_percent=XAUUSD_AGG_TOLERANCE,
+            trust_weight=XAUUSD_AGG_TRUST_WEIGHT,
+            learning_rate=XAUUSD_AGG_LEARNING_RATE,
+        ) if ENABLE_XAUUSD_AGGREGATOR else None
+        # Öncelik lane'leri: ağ gerektirmeyen komutlar fetch bekleyenlerin arkasında kalmaz
+        self.update_processor = ChatOrderedUpdateProcessor(
+            max_pending_updates=MAX_PENDING_UPDATES,
+            lanes={"fetch": MAX_CONCURRENT_UPDATES, "fast": FAST_LANE_CONCURRENCY},
+            classify=self._classify_update,
+        )
+        self.application = (
+            Application.builder()
+            .token(token)
+            # Farklı chat'ler paralel, aynı chat'in mesajları sırayla işlenir
+            .concurrent_updates(self.update_processor)
+            .post_init(self._post_init)
+            .post_shutdown(self._post_shutdown)
+            .build()
+        )
+        # Chat bazında son fiyatlar (bölme işlemi her chat'in kendi sorgusunu kullanır)
+        self.sessions = ChatSessionStore(CHAT_SESSION_MAX, CHAT_SESSION_TTL)
+        self.price_poller = self._create_price_poller()
+        self.webhook_server = None  # Sadece webhook modunda kurulur
+        # Proxy havuzu arka planda yeniden test edilir ve tamamlanır (ilk tur keşfi de yapar)
+        proxy_manager = self.price_fetcher.proxy_manager
+        self.proxy_maintainer = ProxyMaintainer(
+            proxy_manager,
+            interval=PROXY_MAINTAIN_INTERVAL,
+            target=PROXY_TARGET_WORKING,
+            standby_size=PROXY_STANDBY_SIZE,
+            sample_size=PROXY_REVALIDATE_SAMPLE,
+            scan_limit=PROXY_MAINTAIN_SCAN_LIMIT,
+        ) if proxy_manager and ENABLE_PROXY_MAINTAINER else None
+        self._proxy_init_task = None
         self.setup_handlers()
         
         # Instance kontrolü için PID dosyası
@@ -35,22 +92,80 @@ class TelegramBot:
         else:
             logger.info("Instance kontrolü devre dışı")
     
+    @staticmethod
+    def _classify_update(update) -> str:
+        """
+        Update'in öncelik lane'i: '+0,01' / '-0,05' fiyat çeker ("fetch"),
+        bölme, /start, /help ve /stats sadece hesaplama yapar ("fast")
+        """
+        message = getattr(update, "message", None)
+        text = (message.text or "").strip() if message else ""
+        if text.startswith('+') or text.startswith('-'):
+            return "fetch"
+        return "fast"
+    
     def initialize_proxy_system(self):
         """
-        Proxy sistemini başlatır
+        Proxy sistemini arka planda başlatır (kullanıcı istekleri keşfi beklemez)
         """
         try:
-            # Price fetcher'da proxy manager'ı başlat
-            if hasattr(self.price_fetcher, 'proxy_manager') and self.price_fetcher.proxy_manager:
+            if self.proxy_maintainer:
+                print("🔄 Proxy sistemi başlatılıyor (arka plan bakımı ile)...")
+                self.proxy_maintainer.start()
+            elif self.price_fetcher.proxy_manager:
                 print("🔄 Proxy sistemi başlatılıyor...")
                 # Async olarak proxy manager'ı başlat
-                asyncio.create_task(self.price_fetcher.initialize_proxy_manager())
+                self._proxy_init_task = asyncio.create_task(self.price_fetcher.initialize_proxy_manager())
             else:
                 print("ℹ️ Proxy sistemi devre dışı")
         except Exception as e:
             logger.error(f"❌ Proxy sistemi başlatma hatası: {e}")
             print("⚠️ Proxy olmadan devam ediliyor")
     
+    def _create_price_poller(self) -> PricePoller:
+        """Arka planda tazelenecek fiyat kaynaklarını tanımla"""
+        poller = PricePoller()
+        poller.add_source(
+            "xaurub", self.price_fetcher.get_current_price,
+            PRICE_POLL_INTERVAL, PRICE_FRESHNESS_SECONDS,
+        )
+        xauusd_fetch = (
+            self.xauusd_aggregator.get_price_value if self.xauusd_aggregator
+            else self.xauusd_fetcher.fetch_price
+        )
+        poller.add_source("xauusd", xauusd_fetch, PRICE_POLL_INTERVAL, PRICE_FRESHNESS_SECONDS)
+        # yfinance doğrulama verisi kendi stale-while-revalidate cache'inde tutulur
+        return poller
+
+    async def _post_init(self, application: Application):
+        """Polling başlamadan önce paylaşılan browser'ı ve havuzu ısıt"""
+        await self.price_fetcher.start_browser_pool()
+        if ENABLE_RESIDENT_XAUUSD_PAGE:
+            await self.xauusd_fetcher.start_resident_page()
+        if ENABLE_PROFINANCE_WATCHER:
+            await self.price_fetcher.start_watcher()
+        if ENABLE_BACKGROUND_POLLER:
+            self.price_poller.start()
+        self.initialize_proxy_system()
+
+    async def _post_shutdown(self, application: Application):
+        """Kapanışta uzun ömürlü browser kaynaklarını serbest bırak"""
+        try:
+            await self.price_poller.stop()
+            if self.proxy_maintainer:
+                await self.proxy_maintainer.stop()
+            if self._proxy_init_task and not self._proxy_init_task.done():
+                self._proxy_init_task.cancel()
+            if self.xauusd_aggregator:
+                await self.xauusd_aggregator.close()
+            self.yfinance_fetcher.close()
+            await self.price_fetcher.close()
+            await self.xauusd_fetcher.stop_resident_page()
+            await self.xauusd_fetcher.close_browser()
+            await browser_service.close()
+        except Exception as e:
+            logger.error(f"❌ Browser kaynakları kapatma hatası: {e}")
+
     def check_instance(self):
         """Aynı anda sadece bir bot instance'ının çalışmasını sağlar"""
         if os.path.exists(self.pid_file):
@@ -92,6 +207,7 @@ class TelegramBot:
         # Komut işleyicileri
         self.application.add_handler(CommandHandler("start", self.start_command))
         self.application.add_handler(CommandHandler("help", self.help_command))
+        self.application.add_handler(CommandHandler("stats", self.stats_command))
         
         # Mesaj işleyicileri
         self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message))
@@ -124,6 +240,7 @@ Bu bot hem ProFinance.ru'dan XAURUB hem de TradingView'den XAUUSD fiyat verileri
 📝 Komutlar:
 • /start - Botu başlat
 • /help - Bu yardım mesajını göster
+• /stats - Fetch istatistiklerini göster
 
 💰 Fiyat Sorgulama (Yüzde Artış/Azalış):
 • "+0,01" - GÜNCEL XAURUB fiyatı + %0.01 + GÜNCEL XAUUSD fiyatı
@@ -154,6 +271,82 @@ Bot: XAURUB ÷ 25 = 4.7605 RUB
       Fark: 107.68 - 4.7605 = 102.92 RUB
         """
         await update.message.reply_text(help_message)
+
+    async def stats_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Stats komutu işleyicisi"""
+        lines = ["📊 Fetch İstatistikleri", ""]
+        flights = {
+            "ProFinance": self.price_fetcher.single_flight,
+            "TradingView": self.xauusd_fetcher.single_flight,
+            "yfinance": self.yfinance_fetcher.single_flight,
+            "Tazeleyici": self.price_poller.single_flight,
+        }
+        for label, flight in flights.items():
+            stats = flight.get_stats()
+            lines.append(
+                f"🔗 {label}: {stats['executions']} fetch, "
+                f"{stats['coalesced']} birleştirilen istek, {stats['errors']} hata"
+            )
+
+        routes = self.price_fetcher.get_route_stats()
+        if routes["routes"]:
+            lines.append(f"🏁 ProFinance tercih edilen rota: {routes['preferred']}")
+            for route, stats in routes["routes"].items():
+                lines.append(
+                    f"   {route}: {stats['wins']}/{stats['attempts']} kazanma, {stats['failures']} hata"
+                )
+        if self.xauusd_aggregator:
+            agg = self.xauusd_aggregator.get_stats()
+            lines.append(
+                f"💎 XAUUSD aggregator: {agg['first']} ilk kabul, {agg['consensus']} konsensüs, "
+                f"{agg['empty']} boş"
+            )
+            for name, source in agg["sources"].items():
+                lines.append(
+                    f"   {name}: ağırlık {source['weight']}, "
+                    f"{source['agreements']} uyum / {source['disagreements']} uyumsuz, {source['failures']} hata"
+                )
+        cache = self.yfinance_fetcher.get_cache_stats()
+        lines.append(
+            f"💾 yfinance cache: {cache['hits']} hit, {cache['stale']} bayat, "
+            f"{cache['misses']} miss, {cache['negative_hits']} negatif"
+        )
+
+        updates = self.update_processor.get_stats()
+        lines.append(
+            f"⚙️ Update'ler: {updates['processed']} işlendi, {updates['active']} aktif "
+            f"(en fazla {updates['max_active']}), {updates['failed']} hata"
+        )
+        for name, lane in updates["lanes"].items():
+            lines.append(
+                f"   🛣️ {name}: kuyruk {lane['waiting']} (maks. {lane['max_waiting']}), "
+                f"bekleme p50 {lane['wait_p50_ms']} ms / p95 {lane['wait_p95_ms']} ms"
+            )
+        if self.proxy_maintainer:
+            proxies = self.proxy_maintainer.get_stats()
+            health = self.price_fetcher.proxy_manager.health.get_stats()
+            lines.append(
+                f"🩺 Proxy havuzu: {proxies['working']} çalışan, {proxies['standby']} yedek, "
+                f"{health['cooling']} açık / {health['half_open']} yarı açık devre, "
+                f"{proxies['rounds']} tur, {proxies['promoted']} terfi, {proxies['discovered']} yeni"
+            )
+        sessions = self.sessions.get_stats()
+        lines.append(f"💬 Chat oturumları: {sessions['active']}/{sessions['max']}")
+        if self.webhook_server:
+            hook = self.webhook_server.get_stats()
+            lines.append(
+                f"🌐 Webhook: {hook['received']} update, {hook['rejected']} reddedilen, "
+                f"{hook['invalid']} geçersiz, kuyrukta {hook['queued']}"
+            )
+
+        lines.append("")
+        for name, stats in self.price_poller.get_stats().items():
+            if stats["value"] is None:
+                lines.append(f"🔄 {name}: veri yok")
+            else:
+                lines.append(f"🔄 {name}: {stats['value']:.4f} ({stats['age']} sn önce)")
+
+        await update.message.reply_text("\n".join(lines))
     
 
     
@@ -178,10 +371,9 @@ Bot: XAURUB ÷ 25 = 4.7605 RUB
     
     async def handle_price_request(self, update: Update, increment_text: str):
         """Fiyat artırma/azaltma isteğini işler"""
+        progress = None
         try:
             start_ts = time.perf_counter()
-            # Bekleme mesajı gönder
-            waiting_message = await update.message.reply_text("📊 Fiyat verileri çekiliyor...\n🔍 XAURUB ve XAUUSD fiyatları alınıyor...")
             
             # İşareti ve değeri ayır
             sign = increment_text[0]  # + veya -
@@ -193,128 +385,135 @@ Bot: XAURUB ÷ 25 = 4.7605 RUB
             if sign == '-':
                 increment = -increment
             
-            # ✅ HER İŞLEMDE YENİ FİYATLAR ÇEK!
-            # XAURUB ve XAUUSD fiyat verilerini paralel olarak çek (ASYNC)
-            xaurub_task = self.price_fetcher.get_price_plus_increment_async(increment)
-            
-            # XAUUSD için browser başlatma ve fiyat çekme task'ı
-            async def get_xauusd_price():
-                try:
-                    if await self.xauusd_fetcher.start_browser():
-                        # Sadece JavaScript-only yöntemi kullan (çok hızlı!)
-                        price = await self.xauusd_fetcher.get_price_javascript_only()
-                        
-                        if price:
-                            await self.xauusd_fetcher.update_price(price)
-                            # ✅ XAUUSD fiyatını hafızaya al
-                            self.last_xauusd_price = price
-                        await self.xauusd_fetcher.close_browser()
-                        return price
-                except Exception as e:
-                    logger.error(f"XAUUSD fiyat çekme hatası: {e}")
-                    return None
-                return None
-            
-            xauusd_task = get_xauusd_price()
-            
-            # Paralel olarak çalıştır
-            xaurub_result, xauusd_price = await asyncio.gather(xaurub_task, xauusd_task)
-            
-            # ✅ HER İŞLEMDE YENİ FİYATLAR GÜNCELLENİYOR!
-            # XAUUSD fiyatını hafızaya al
-            if xauusd_price:
-                self.last_xauusd_price = xauusd_price
+            # Bekleme mesajı sonuçlar geldikçe düzenlenir; cevap hemen hazırsa hiç gönderilmez
+            progress = ProgressiveMessage(
+                update.message.reply_text,
+                "📊 Fiyat verileri çekiliyor...\n🔍 XAURUB ve XAUUSD fiyatları alınıyor...",
+                placeholder_delay=PROGRESSIVE_PLACEHOLDER_DELAY,
+                min_interval=PROGRESSIVE_EDIT_INTERVAL,
+            )
+            progress.start()
             
-            # Son XAURUB fiyatını kaydet
-            self.last_xaurub_price = xaurub_result['new_price']
+            # Süre bütçesi: REQUEST_DEADLINE'a kadar güncel fiyat beklenir, sonra eksikler son bilinen
+            # değerle gösterilir; geç gelen sonuçlar REQUEST_LATE_DEADLINE'a kadar mesaja işlenir
+            start_mono = time.monotonic()
+            late_deadline = start_mono + REQUEST_LATE_DEADLINE
+            tasks = {
+                "xaurub": asyncio.create_task(self.price_poller.get_fresh("xaurub", deadline=late_deadline)),
+                "xauusd": asyncio.create_task(self.price_poller.get_fresh("xauusd", deadline=late_deadline)),
+                # Doğrulama (yfinance) paralel başlar, kendi süresi var
+                "validation": asyncio.create_task(
+                    self.yfinance_fetcher.get_cached_quotes(start_mono + VALIDATION_DEADLINE)
+                ),
+            }
+            # İşlem süresi gösterilen son fiyatın geldiği ana göre
+            finished_at = {}
+            for name in ("xaurub", "xauusd"):
+                tasks[name].add_done_callback(lambda _, name=name: finished_at.setdefault(name, time.perf_counter()))
             
-            # yfinance ile gram fiyatı karşılaştırması yap
-            yfinance_gram_price = self.yfinance_fetcher.calculate_xaurub_gram_price()
-            security_warning = ""
+            session = self.sessions.get_or_create(update.effective_chat.id)
+            xauusd_analysis = {}
             
-            if yfinance_gram_price:
-                # ProFinance.ru gram fiyatı (zaten gram fiyatı)
-                profinance_gram_price = xaurub_result['current_price']
+            def render(fallback: bool = False, timed_out: bool = False) -> str:
+                xaurub_price, xaurub_age = self._resolve_price("xaurub", tasks["xaurub"], fallback)
+                xauusd_price, xauusd_age = self._resolve_price("xauusd", tasks["xauusd"], fallback)
                 
-                # Fark hesapla
-                difference = abs(profinance_gram_price - yfinance_gram_price)
-                difference_percent = (difference / yfinance_gram_price) * 100
+                # Bu chat'in son XAURUB / XAUUSD fiyatlarını hafızaya al
+                if xaurub_price:
+                    xaurub_result = self.price_fetcher.calculate_increment(xaurub_price, increment)
+                    session.record_prices(xaurub_result['new_price'], xauusd_price, increment)
                 
-                # Güvenlik kontrolü (%2 tolerans)
-                if difference_percent > 2.0:
-                    security_warning = f"\n🚨 GÜVENLİK UYARISI: Fiyat farkı %{difference_percent:.2f}!\n"
-                    security_warning += f"📊 ProFinance: {profinance_gram_price:.4f} RUB/gram\n"
-                    security_warning += f"🧮 yfinance: {yfinance_gram_price:.4f} RUB/gram\n"
-                    security_warning += f"📈 Fark: {difference:.4f} RUB/gram\n"
+                # İşaret ve değişim mesajını hazırla
+                if increment >= 0:
+                    change_text = f"+%{increment}"
+                    change_desc = "Artış"
                 else:
-                    security_warning = f"\n✅ Güvenlik kontrolü: Fark %{difference_percent:.2f} (Normal)\n"
-            else:
-                security_warning = "\n⚠️ yfinance verisi alınamadı - güvenlik kontrolü yapılamadı\n"
-            
-            # XAUUSD güvenlik kontrolü ekle
-            yf_xauusd = self.yfinance_fetcher.get_xauusd_price()
-            if yf_xauusd:
-                xauusd_difference = abs(xauusd_price - yf_xauusd)
-                xauusd_difference_percent = (xauusd_difference / yf_xauusd) * 100
+                    change_text = f"%{increment}"
+                    change_desc = "Azalış"
                 
-                if xauusd_difference_percent > 2.0:  # %2 tolerans XAUUSD için
-                    security_warning += f"\n⚠️ XAUUSD UYARISI: Fark %{xauusd_difference_percent:.2f}!\n"
-                    security_warning += f"📊 TradingView: ${xauusd_price:.2f}\n"
-                    security_warning += f"🧮 yfinance: ${yf_xauusd:.2f}\n"
-                    security_warning += f"📈 Fark: ${xauusd_difference:.2f}\n"
+                # XAURUB durumu
+                if xaurub_price:
+                    xaurub_status = f"""
+📈 Mevcut fiyat: {xaurub_result['current_price']:.2f} RUB{self._age_note(xaurub_age, timed_out)}
+📊 Yeni fiyat: {xaurub_result['new_price']:.4f} RUB ({change_text})
+📈 {change_desc} miktarı: {xaurub_result['percentage_increase']:.4f} RUB"""
+                elif tasks["xaurub"].done() or timed_out:
+                    xaurub_status = "\n❌ XAURUB fiyatı alınamadı"
                 else:
-                    security_warning += f"\n✅ XAUUSD kontrolü: Fark %{xauusd_difference_percent:.2f} (Normal)\n"
-            else:
-                security_warning += "\n⚠️ XAUUSD yfinance verisi alınamadı\n"
-            
-            # XAUUSD durumu mesajı
-            xauusd_status = ""
-            if xauusd_price:
-                # XAUUSD fiyatını 31.1035'e böl (1 troy ounce = 31.1035 gram)
-                xauusd_rub_per_gram = xauusd_price / 31.1035
+                    xaurub_status = "\n⏳ XAURUB fiyatı bekleniyor..."
                 
-                # XAUUSD fiyat değişim analizi
-                xauusd_analysis = self.xauusd_fetcher.analyze_xauusd_price_change(xauusd_price)
-                xauusd_status = f"""
-💎 XAUUSD: ${xauusd_price:.2f}
+                # Güvenlik kontrolü
+                validation_task = tasks["validation"]
+                if not xaurub_price:
+                    security_warning = ""
+                elif not validation_task.done() and not timed_out:
+                    security_warning = "\n⏳ Güvenlik kontrolü bekleniyor...\n"
+                elif (
+                    not validation_task.done()
+                    or validation_task.cancelled()
+                    or isinstance(validation_task.exception(), asyncio.TimeoutError)
+                ):
+                    security_warning = f"\n⌛ Güvenlik kontrolü zaman aşımı ({VALIDATION_DEADLINE:.0f} sn)\n"
+                elif validation_task.exception() is not None:
+                    security_warning = "\n⚠️ yfinance verisi alınamadı - güvenlik kontrolü yapılamadı\n"
+                else:
+                    security_warning = self._build_security_warning(
+                        xaurub_price, xauusd_price, validation_task.result()
+                    )
+                
+                # XAUUSD durumu mesajı
+                if xauusd_price:
+                    # XAUUSD fiyatını 31.1035'e böl (1 troy ounce = 31.1035 gram)
+                    xauusd_rub_per_gram = xauusd_price / 31.1035
+                    
+                    # XAUUSD fiyat değişim analizi (her fiyat için bir kez)
+                    if xauusd_price not in xauusd_analysis:
+                        xauusd_analysis[xauusd_price] = self.xauusd_fetcher.analyze_xauusd_price_change(xauusd_price)
+                    analysis = xauusd_analysis[xauusd_price]
+                    xauusd_status = f"""
+💎 XAUUSD: ${xauusd_price:.2f}{self._age_note(xauusd_age, timed_out)}
 📏 Gram başına: {xauusd_rub_per_gram:.4f} RUB (÷31.1035)"""
+                    
+                    # XAUUSD uyarı mesajı
+                    if analysis["is_warning"]:
+                        xauusd_status += f"\n⚠️ {analysis['message']}"
+                elif tasks["xauusd"].done() or timed_out:
+                    xauusd_status = "\n❌ XAUUSD fiyatı alınamadı"
+                else:
+                    xauusd_status = "\n⏳ XAUUSD fiyatı bekleniyor..."
                 
-                # XAUUSD uyarı mesajı
-                if xauusd_analysis["is_warning"]:
-                    xauusd_status += f"\n⚠️ {xauusd_analysis['message']}"
-            else:
-                xauusd_status = f"\n❌ XAUUSD fiyatı alınamadı"
-            
-            # Sonuç mesajını hazırla
-            elapsed = time.perf_counter() - start_ts
-            
-            # İşaret ve değişim mesajını hazırla
-            if increment >= 0:
-                change_text = f"+%{increment}"
-                change_desc = "Artış"
-            else:
-                change_text = f"%{increment}"
-                change_desc = "Azalış"
-            
-            response_message = f"""
+                elapsed = max(finished_at.values(), default=time.perf_counter()) - start_ts
+                return f"""
 💰 Fiyat Bilgisi (GÜNCEL)
 
-🇷🇺 XAURUB (Ruble):
-📈 Mevcut fiyat: {xaurub_result['current_price']:.2f} RUB
-📊 Yeni fiyat: {xaurub_result['new_price']:.4f} RUB ({change_text})
-📈 {change_desc} miktarı: {xaurub_result['percentage_increase']:.4f} RUB{security_warning}
+🇷🇺 XAURUB (Ruble):{xaurub_status}{security_warning}
 
 🇺🇸 XAUUSD (Dolar):{xauusd_status}
 
 🕐 Güncelleme zamanı: {self.get_current_time()}
 ⏱️ İşlem süresi: {elapsed:.2f} sn
-🔄 Her işlemde güncel fiyatlar çekiliyor!
+🔄 Fiyatlar arka planda sürekli tazeleniyor!
 
 💡 İpucu: Bir sayı göndererek XAURUB fiyatını o sayıya bölebilir ve XAUUSD ile karşılaştırabilirsiniz
-            """.strip()
+                """.strip()
+            
+            # Her bileşen geldikçe mesaj güncellenir (ProgressiveMessage birleştirir ve sınırlar)
+            answer_deadline = start_mono + REQUEST_DEADLINE
+            pending = set(tasks.values())
+            while pending:
+                now = time.monotonic()
+                if now >= late_deadline:
+                    break
+                wake_at = answer_deadline if now < answer_deadline else late_deadline
+                done, pending = await asyncio.wait(pending, timeout=wake_at - now, return_when=asyncio.FIRST_COMPLETED)
+                if pending:
+                    progress.update(render(fallback=time.monotonic() >= answer_deadline))
             
-            # Bekleme mesajını güncelle
-            await waiting_message.edit_text(response_message)
+            if pending:
+                # Fetch'ler arka planda sürer ve snapshot'ları doldurur; bu mesaj için süre doldu
+                for task in pending:
+                    task.cancel()
+            await progress.finish(render(fallback=True, timed_out=bool(pending)))
             
         except ValueError:
             await update.message.reply_text(
@@ -323,18 +522,83 @@ Bot: XAURUB ÷ 25 = 4.7605 RUB
             )
         except Exception as e:
             error_message = f"❌ Hata oluştu: {str(e)}\n\n🔄 Lütfen tekrar deneyin."
-            try:
-                await waiting_message.edit_text(error_message)
-            except:
+            logger.error(f"Fiyat çekme hatası: {e}")
+            if progress is not None:
+                await progress.finish(error_message)
+            else:
                 await update.message.reply_text(error_message)
+    
+    def _resolve_price(self, name: str, task: asyncio.Task, fallback: bool = True):
+        """
+        Fiyat görevinin sonucu hazırsa (fiyat, None), değilse (fallback ise) son bilinen
+        snapshot (fiyat, yaş), o da yoksa (None, None)
+        """
+        if task.done() and not task.cancelled() and task.exception() is None and task.result():
+            return task.result(), None
+        snapshot = self.price_poller.get(name) if fallback else None
+        if snapshot is not None:
+            return snapshot.value, snapshot.age
+        return None, None
+    
+    def _age_note(self, age, timed_out: bool = False) -> str:
+        """Son bilinen değer gösteriliyorsa yaşını (ve güncelin gelmediğini) belirt"""
+        if age is None:
+            return ""
+        if timed_out:
+            return f" (⌛ güncel fiyat gelmedi, son bilinen {self.format_age(age)})"
+        return f" (⏳ son bilinen, {self.format_age(age)})"
+    
+    def _build_security_warning(self, profinance_gram_price: float, xauusd_price, yf_quotes: dict) -> str:
+        """yfinance verisiyle ProFinance ve TradingView fiyatlarını karşılaştırır"""
+        yf_xauusd, yf_xauusd_age = yf_quotes[self.yfinance_fetcher.gold_ticker]
+        yf_usd_rub, yf_usd_rub_age = yf_quotes[self.yfinance_fetcher.usd_rub_ticker]
+        yfinance_gram_price = None
+        yfinance_age = ""
+        if yf_xauusd and yf_usd_rub:
+            yfinance_gram_price = self.yfinance_fetcher.compute_gram_price(yf_xauusd, yf_usd_rub)
+            yfinance_age = self.format_age(max(yf_xauusd_age, yf_usd_rub_age))
+        security_warning = ""
+        
+        if yfinance_gram_price:
+            # Fark hesapla (ProFinance.ru fiyatı zaten gram fiyatı)
+            difference = abs(profinance_gram_price - yfinance_gram_price)
+            difference_percent = (difference / yfinance_gram_price) * 100
             
-            logger.error(f"Fiyat çekme hatası: {e}")
+            # Güvenlik kontrolü (%2 tolerans)
+            if difference_percent > 2.0:
+                security_warning = f"\n🚨 GÜVENLİK UYARISI: Fiyat farkı %{difference_percent:.2f}!\n"
+                security_warning += f"📊 ProFinance: {profinance_gram_price:.4f} RUB/gram\n"
+                security_warning += f"🧮 yfinance: {yfinance_gram_price:.4f} RUB/gram ({yfinance_age})\n"
+                security_warning += f"📈 Fark: {difference:.4f} RUB/gram\n"
+            else:
+                security_warning = f"\n✅ Güvenlik kontrolü: Fark %{difference_percent:.2f} (Normal, yfinance {yfinance_age})\n"
+        else:
+            security_warning = "\n⚠️ yfinance verisi alınamadı - güvenlik kontrolü yapılamadı\n"
+        
+        # XAUUSD güvenlik kontrolü ekle
+        if yf_xauusd and xauusd_price:
+            xauusd_difference = abs(xauusd_price - yf_xauusd)
+            xauusd_difference_percent = (xauusd_difference / yf_xauusd) * 100
+            
+            if xauusd_difference_percent > 2.0:  # %2 tolerans XAUUSD için
+                security_warning += f"\n⚠️ XAUUSD UYARISI: Fark %{xauusd_difference_percent:.2f}!\n"
+                security_warning += f"📊 TradingView: ${xauusd_price:.2f}\n"
+                security_warning += f"🧮 yfinance: ${yf_xauusd:.2f} ({self.format_age(yf_xauusd_age)})\n"
+                security_warning += f"📈 Fark: ${xauusd_difference:.2f}\n"
+            else:
+                security_warning += f"\n✅ XAUUSD kontrolü: Fark %{xauusd_difference_percent:.2f} (Normal, yfinance {self.format_age(yf_xauusd_age)})\n"
+        else:
+            security_warning += "\n⚠️ XAUUSD yfinance verisi alınamadı\n"
+        
+        return security_warning
     
     async def handle_division_request(self, update: Update, number_text: str):
         """Sayı gönderildiğinde son XAURUB fiyatını böler ve XAUUSD ile karşılaştırır"""
         try:
+            session = self.sessions.get(update.effective_chat.id)
+            
             # Son XAURUB fiyatı var mı kontrol et
-            if self.last_xaurub_price is None:
+            if session is None or session.last_xaurub_price is None:
                 await update.message.reply_text(
                     "❌ Henüz XAURUB fiyat sorgulaması yapmadınız!\n"
                     "Önce '+0,01' yazarak fiyat sorgulayın."
@@ -342,7 +606,7 @@ Bot: XAURUB ÷ 25 = 4.7605 RUB
                 return
             
             # XAUUSD fiyatı hafızada var mı kontrol et
-            if self.last_xauusd_price is None:
+            if session.last_xauusd_price is None:
                 await update.message.reply_text(
                     "❌ XAUUSD fiyatı hafızada yok!\n"
                     "Önce '+0,01' yazarak hem XAURUB hem XAUUSD fiyatlarını alın."
@@ -357,11 +621,11 @@ Bot: XAURUB ÷ 25 = 4.7605 RUB
                 return
             
             # Bölme işlemi
-            divided_xaurub = self.last_xaurub_price / divisor
+            divided_xaurub = session.last_xaurub_price / divisor
             
             # XAUUSD ile karşılaştırma
             # XAUUSD fiyatını 31.1035'e böl (1 troy ounce = 31.1035 gram)
-            xauusd_rub_per_gram = self.last_xauusd_price / 31.1035
+            xauusd_rub_per_gram = session.last_xauusd_price / 31.1035
             
             # Fark hesaplama (XAUUSD gram başına - XAURUB bölünmüş)
             difference = xauusd_rub_per_gram - divided_xaurub
@@ -381,12 +645,12 @@ Bot: XAURUB ÷ 25 = 4.7605 RUB
 🔢 Bölme ve Karşılaştırma İşlemi
 
 🇷🇺 XAURUB (Ruble):
-📊 Son fiyat: {self.last_xaurub_price:.4f} RUB
+📊 Son fiyat: {session.last_xaurub_price:.4f} RUB ({session.xaurub_at:%H:%M:%S})
 ➗ Bölen: {divisor}
 📉 Sonuç: {divided_xaurub:.4f} RUB
 
 🇺🇸 XAUUSD (Dolar):
-💎 Fiyat: ${self.last_xauusd_price:.2f}
+💎 Fiyat: ${session.last_xauusd_price:.2f} ({session.xauusd_at:%H:%M:%S})
 📏 Gram başına: {xauusd_rub_per_gram:.4f} RUB (÷31.1035)
 
 📊 Karşılaştırma:
@@ -419,6 +683,13 @@ Bot: XAURUB ÷ 25 = 4.7605 RUB
         """Mevcut zamanı formatlar"""
         from datetime import datetime
         return datetime.now().strftime("%H:%M:%S")
+
+    @staticmethod
+    def format_age(seconds: float) -> str:
+        """Veri yaşını okunabilir formatta döndürür"""
+        if seconds < 60:
+            return f"{seconds:.0f} sn önce"
+        return f"{seconds / 60:.0f} dk önce"
     
 
     
@@ -431,8 +702,47 @@ Bot: XAURUB ÷ 25 = 4.7605 RUB
                 "❌ Beklenmeyen bir hata oluştu. Lütfen tekrar deneyin."
             )
     
+    async def _run_webhook(self):
+        """Webhook modu: aiohttp sunucusu update'leri Application kuyruğuna atar"""
+        if not WEBHOOK_URL:
+            raise RuntimeError("BOT_MODE=webhook için WEBHOOK_URL gerekli")
+        # Secret verilmediyse her başlangıçta yenisi üretilir (setWebhook ile Telegram'a bildirilir)
+        secret_token = WEBHOOK_SECRET or secrets.token_urlsafe(32)
+        self.webhook_server = WebhookServer(
+            self.application, WEBHOOK_PATH, secret_token, WEBHOOK_LISTEN, WEBHOOK_PORT
+        )
+        
+        # Graceful shutdown: sinyal gelince sunucu ve Application sırayla kapanır
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop_event.set)
+        
+        # run_polling'in aksine post_init / post_shutdown burada elle çağrılır
+        try:
+            async with self.application:
+                await self._post_init(self.application)
+                await self.application.start()
+                try:
+                    await self.webhook_server.start()
+                    await self.application.bot.set_webhook(
+                        url=WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+                        allowed_updates=Update.ALL_TYPES,
+                        drop_pending_updates=True,  # Eski mesajları yoksay
+                        secret_token=secret_token,
+                        max_connections=MAX_CONCURRENT_UPDATES,
+                    )
+                    print(f"🌐 Webhook modu: {WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH} → {WEBHOOK_LISTEN}:{WEBHOOK_PORT}")
+                    await stop_event.wait()
+                    print("\n🛑 Signal alındı, bot kapatılıyor...")
+                finally:
+                    await self.webhook_server.stop()
+                    await self.application.stop()
+        finally:
+            await self._post_shutdown(self.application)
+    
     def run(self):
-        """Botu çalıştırır"""
+        """Botu çalıştırır (BOT_MODE: polling veya webhook)"""
         print("🤖 Telegram botu başlatılıyor...")
         print("📱 Bot hazır! Telegram'da mesaj gönderebilirsiniz.")
         print("🛑 Durdurmak için Ctrl+C tuşlarına basın.\n")
@@ -440,6 +750,16 @@ Bot: XAURUB ÷ 25 = 4.7605 RUB
         # Hata işleyicisini ekle
         self.application.add_error_handler(self.error_handler)
         
+        if BOT_MODE == "webhook":
+            try:
+                asyncio.run(self._run_webhook())
+            except Exception as e:
+                logger.error(f"Bot çalışma hatası: {e}")
+                raise
+            finally:
+                self.cleanup()
+            return
+        
         # Signal handler ekle (graceful shutdown için)
         def signal_handler(signum, frame):
             print(f"\n🛑 Signal {signum} alındı, bot kapatılıyor...")
@@ -4,14 +4,98 @@ import time
 from datetime import datetime
 from typing import Optional, Dict, Any
 import logging
-from playwright.async_api import async_playwright
 import re
-from config import BROWSER_TYPE
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from browser_service import browser_service
+from readiness import time_left
+from single_flight import SingleFlight
+from config import BROWSER_TYPE, RESIDENT_PAGE_STALE_TIMEOUT, RESIDENT_PAGE_MAX_QUIET
 
 # Logging ayarları
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Resident sayfa: fiyat elementini izleyip değişimleri Python'a iten script
+# (Element bulunamazsa sayfa metni throttled şekilde taranır)
+RESIDENT_OBSERVER_SCRIPT = """
+(() => {
+    if (window.__xauusdObserverInstalled) return;
+    window.__xauusdObserverInstalled = true;
+
+    const SELECTORS = [
+        '.js-symbol-last',
+        '[data-qa-id="symbol-last-value"]',
+        '.tv-symbol-price-quote__value',
+        '[class*="lastContainer"] [class*="last-"]'
+    ];
+    let target = null;
+    let lastSent = null;
+
+    const parse = (text) => {
+        const m = (text || '').replace(/[\s\u202f]/g, '').match(/\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?/);
+        return m ? parseFloat(m[0].replace(/,/g, '')) : null;
+    };
+    const findTarget = () => {
+        if (target && target.isConnected) return target;
+        target = null;
+        for (const s of SELECTORS) {
+            const el = document.querySelector(s);
+            if (el && parse(el.textContent)) { target = el; break; }
+        }
+        return target;
+    };
+    const read = () => {
+        const el = findTarget();
+        if (el) return parse(el.textContent);
+        const m = (document.body ? document.body.innerText : '').match(/XAUUSD\s*([\d,]+(?:\.\d+)?)\s*USD/);
+        return m ? parseFloat(m[1].replace(/,/g, '')) : null;
+    };
+    const push = (force) => {
+        const value = read();
+        if (!value || value <= 0) return;
+        if (force || value !== lastSent) {
+            lastSent = value;
+            window.onXauusdPrice(value);
+        }
+    };
+
+    const start = () => {
+        let pending = false;
+        new MutationObserver(() => {
+            if (pending) return;
+            pending = true;
+            setTimeout(() => { pending = false; push(false); }, target ? 0 : 250);
+        }).observe(document.body, { subtree: true, childList: true, characterData: true });
+        push(true);
+        // Heartbeat: sayfanın canlı olduğunu Python tarafına bildir
+        setInterval(() => push(true), 5000);
+    };
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', start);
+    } else {
+        start();
+    }
+})();
+"""
+
+# Tek seferlik okuma: fiyat elementi ya da sayfa metnindeki "XAUUSD ... USD" hazır mı
+PRICE_READY_PREDICATE = """
+() => {
+    const SELECTORS = [
+        '.js-symbol-last',
+        '[data-qa-id="symbol-last-value"]',
+        '.tv-symbol-price-quote__value',
+        '[class*="lastContainer"] [class*="last-"]'
+    ];
+    for (const s of SELECTORS) {
+        const el = document.querySelector(s);
+        if (el && /\\d/.test(el.textContent || '')) return true;
+    }
+    return /XAUUSD\\s*[\\d,]+(?:\\.\\d+)?\\s*USD/.test(document.body ? document.body.innerText : '');
+}
+"""
+
 class TradingViewChartFetcher:
     """
     TradingView XAUUSD sayfasından fiyat çeken optimize edilmiş sınıf
@@ -31,138 +115,43 @@ class TradingViewChartFetcher:
         self.last_known_price: Optional[float] = None
         self.price_change_threshold = 0.5  # %0.5 eşik
         
-        # Browser ayarları
-        self.browser = None
+        # Browser ayarları (context seviyesinde)
+        self.user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+        self.viewport = {"width": 1280, "height": 720}
+        self.proxy_server: Optional[str] = None
+        self.context = None
         self.page = None
         
+        # Resident sayfa modu (sayfa açık kalır, fiyat push ile gelir)
+        self.resident_context = None
+        self.resident_page = None
+        self.resident_price: Optional[float] = None
+        self.resident_seen_at: float = 0.0     # Son heartbeat/push (monotonic)
+        self.resident_changed_at: float = 0.0  # Son fiyat değişimi (monotonic)
+        self.resident_reloads = 0
+        self._resident_task: Optional[asyncio.Task] = None
+        self._resident_crashed = False
+
+        # Eşzamanlı istekler tek browser oturumunu paylaşır
+        self.single_flight = SingleFlight("tradingview")
+        
     async def start_browser(self):
         """
-        Browser'ı başlat (optimize edilmiş)
+        Paylaşılan browser üzerinde izole context + sayfa aç
+        (User agent, viewport ve proxy context seviyesinde ayarlanır)
         """
         try:
-            self.playwright = await async_playwright().start()
-            
-            # Browser type'ı config'den al
-            if BROWSER_TYPE == "webkit":
-                self.browser = await self.playwright.webkit.launch(
-                    headless=True,
-                    args=[
-                        "--no-sandbox",
-                        "--disable-setuid-sandbox",
-                        "--disable-dev-shm-usage",
-                        "--disable-gpu",
-                        "--disable-web-security",
-                        "--disable-features=VizDisplayCompositor",
-                        "--disable-extensions",
-                        "--disable-plugins",
-                        "--disable-images",
-                        "--disable-javascript-harmony-shipping",
-                        "--disable-background-timer-throttling",
-                        "--disable-backgrounding-occluded-windows",
-                        "--disable-renderer-backgrounding",
-                        "--disable-features=TranslateUI",
-                        "--disable-ipc-flooding-protection",
-                        "--no-default-browser-check",
-                        "--disable-default-apps",
-                        "--disable-sync",
-                        "--metrics-recording-only",
-                        "--disable-background-networking",
-                        "--disable-component-extensions-with-background-pages",
-                        "--disable-background-mode",
-                        "--disable-client-side-phishing-detection",
-                        "--disable-hang-monitor",
-                        "--disable-prompt-on-repost",
-                        "--disable-domain-reliability",
-                        "--disable-component-update",
-                        "--disable-features=InterestBasedFeatureSuggestions",
-                        "--disable-features=AutofillServerCommunication",
-                        "--disable-features=OptimizationHints"
-                    ]
-                )
-            elif BROWSER_TYPE == "firefox":
-                self.browser = await self.playwright.firefox.launch(
-                    headless=True,
-                    args=[
-                        "--no-sandbox",
-                        "--disable-setuid-sandbox",
-                        "--disable-dev-shm-usage",
-                        "--disable-gpu",
-                        "--disable-web-security",
-                        "--disable-features=VizDisplayCompositor",
-                        "--disable-extensions",
-                        "--disable-plugins",
-                        "--disable-images",
-                        "--disable-javascript-harmony-shipping",
-                        "--disable-background-timer-throttling",
-                        "--disable-backgrounding-occluded-windows",
-                        "--disable-renderer-backgrounding",
-                        "--disable-features=TranslateUI",
-                        "--disable-ipc-flooding-protection",
-                        "--no-default-browser-check",
-                        "--disable-default-apps",
-                        "--disable-sync",
-                        "--metrics-recording-only",
-                        "--disable-background-networking",
-                        "--disable-component-extensions-with-background-pages",
-                        "--disable-background-mode",
-                        "--disable-client-side-phishing-detection",
-                        "--disable-hang-monitor",
-                        "--disable-prompt-on-repost",
-                        "--disable-domain-reliability",
-                        "--disable-component-update",
-                        "--disable-features=InterestBasedFeatureSuggestions",
-                        "--disable-features=AutofillServerCommunication",
-                        "--disable-features=OptimizationHints"
-                    ]
-                )
-            else:
-                # Default: chromium
-                self.browser = await self.playwright.chromium.launch(
-                    headless=True,
-                    args=[
-                        "--no-sandbox",
-                        "--disable-setuid-sandbox",
-                        "--disable-dev-shm-usage",
-                        "--disable-gpu",
-                        "--disable-web-security",
-                        "--disable-features=VizDisplayCompositor",
-                        "--disable-extensions",
-                        "--disable-plugins",
-                        "--disable-images",
-                        "--disable-javascript-harmony-shipping",
-                        "--disable-background-timer-throttling",
-                        "--disable-backgrounding-occluded-windows",
-                        "--disable-renderer-backgrounding",
-                        "--disable-features=TranslateUI",
-                        "--disable-ipc-flooding-protection",
-                        "--no-default-browser-check",
-                        "--disable-default-apps",
-                        "--disable-sync",
-                        "--metrics-recording-only",
-                        "--disable-background-networking",
-                        "--disable-component-extensions-with-background-pages",
-                        "--disable-background-mode",
-                        "--disable-client-side-phishing-detection",
-                        "--disable-hang-monitor",
-                        "--disable-prompt-on-repost",
-                        "--disable-domain-reliability",
-                        "--disable-component-update",
-                        "--disable-features=InterestBasedFeatureSuggestions",
-                        "--disable-features=AutofillServerCommunication",
-                        "--disable-features=OptimizationHints"
-                    ]
-                )
-            
-            self.page = await self.browser.new_page()
-            
-            # User agent ve viewport ayarla
-            await self.page.set_extra_http_headers({
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-            })
-            
-            await self.page.set_viewport_size({"width": 1280, "height": 720})
-            
-            logger.info(f"🌐 Browser başlatıldı ({BROWSER_TYPE} - optimize edilmiş)")
+            context_options = {
+                "user_agent": self.user_agent,
+                "viewport": self.viewport,
+            }
+            if self.proxy_server:
+                context_options["proxy"] = {"server": self.proxy_server}
+
+            self.context = await browser_service.new_context(**context_options)
+            self.page = await self.context.new_page()
+            
+            logger.info(f"🌐 Browser context açıldı ({BROWSER_TYPE} - paylaşılan browser)")
             return True
             
         except Exception as e:
@@ -389,6 +378,32 @@ class TradingViewChartFetcher:
         except Exception as e:
             logger.error(f"❌ Fiyat güncelleme hatası: {e}")
     
+    async def fetch_price(self, deadline: Optional[float] = None) -> Optional[float]:
+        """
+        XAUUSD fiyatını çek (önce resident sayfa, yoksa tek seferlik context)
+        Eşzamanlı çağrılar aynı fetch'in sonucunu bekler
+        deadline: time.monotonic() cinsinden son an
+        """
+        price = self.get_resident_price()
+        if price:
+            await self.update_price(price)
+            return price
+        return await self.single_flight.do("xauusd", lambda: self._fetch_price_once(deadline), deadline)
+
+    async def _fetch_price_once(self, deadline: Optional[float] = None) -> Optional[float]:
+        try:
+            if await self.start_browser():
+                # Sadece JavaScript-only yöntemi kullan (çok hızlı!)
+                price = await self.get_price_javascript_only(deadline)
+                if price:
+                    await self.update_price(price)
+                return price
+        except Exception as e:
+            logger.error(f"XAUUSD fiyat çekme hatası: {e}")
+        finally:
+            await self.close_browser()
+        return None
+
     async def get_current_xauusd_price(self) -> Optional[float]:
         """
         Mevcut XAUUSD fiyatını al
@@ -416,24 +431,159 @@ class TradingViewChartFetcher:
     
     async def close_browser(self):
         """
-        Browser'ı kapat
+        Context'i kapat (paylaşılan browser açık kalır)
         """
         try:
-            if self.page:
-                await self.page.close()
-            if self.browser:
-                await self.browser.close()
-            if hasattr(self, 'playwright'):
-                await self.playwright.stop()
+            if self.context:
+                await self.context.close()
+            self.context = None
+            self.page = None
             
-            logger.info("🌐 Browser kapatıldı")
+            logger.info("🌐 Browser context kapatıldı")
             
         except Exception as e:
             logger.error(f"❌ Browser kapatma hatası: {e}")
 
-    async def get_price_javascript_only(self) -> Optional[float]:
+    async def start_resident_page(self):
+        """
+        Resident sayfa modunu başlat: XAUUSD sayfası açık kalır,
+        fiyat değişimleri DOM observer ile Python'a itilir
+        """
+        if self._resident_task and not self._resident_task.done():
+            return
+        self._resident_task = asyncio.create_task(self._resident_watchdog())
+        logger.info("📌 XAUUSD resident sayfa modu başlatıldı")
+
+    async def _open_resident_page(self):
+        """
+        Resident context'i ve sayfasını (yeniden) aç
+        """
+        await self._close_resident_page()
+
+        context_options = {
+            "user_agent": self.user_agent,
+            "viewport": self.viewport,
+        }
+        if self.proxy_server:
+            context_options["proxy"] = {"server": self.proxy_server}
+
+        self.resident_context = await browser_service.new_context(**context_options)
+        # Binding ve script context seviyesinde: sayfa yenilense de kalıcı
+        await self.resident_context.expose_binding("onXauusdPrice", self._on_resident_price)
+        await self.resident_context.add_init_script(RESIDENT_OBSERVER_SCRIPT)
+        await self.resident_context.route("**/*", self._resident_route_filter)
+
+        self.resident_page = await self.resident_context.new_page()
+        self._resident_crashed = False
+        self.resident_page.on("crash", lambda _: self._mark_resident_crashed())
+
+        now = time.monotonic()
+        self.resident_seen_at = now
+        self.resident_changed_at = now
+        await self.resident_page.goto(self.xauusd_url, wait_until="domcontentloaded", timeout=15000)
+
+    @staticmethod
+    async def _resident_route_filter(route, request):
+        # Uzun süre açık kalan sayfada bellek tasarrufu: ağır kaynakları engelle
+        try:
+            if request.resource_type in ["image", "font", "media"]:
+                await route.abort()
+            else:
+                await route.continue_()
+        except Exception:
+            pass
+
+    def _mark_resident_crashed(self):
+        logger.warning("⚠️ XAUUSD resident sayfası çöktü")
+        self._resident_crashed = True
+
+    def _on_resident_price(self, source, price):
+        """
+        Sayfadaki observer'dan gelen fiyatı hafızaya al (binding callback)
+        """
+        try:
+            price = float(price)
+        except (TypeError, ValueError):
+            return
+        if price <= 0:
+            return
+
+        now = time.monotonic()
+        self.resident_seen_at = now
+        if price != self.resident_price:
+            self.resident_price = price
+            self.resident_changed_at = now
+
+    def _resident_needs_reload(self) -> bool:
+        """
+        Sayfa çöktü, kapandı, heartbeat kesildi veya fiyat uzun süredir değişmiyorsa True
+        """
+        if self.resident_page is None or self.resident_page.is_closed() or self._resident_crashed:
+            return True
+        now = time.monotonic()
+        if now - self.resident_seen_at > RESIDENT_PAGE_STALE_TIMEOUT:
+            return True
+        return now - self.resident_changed_at > RESIDENT_PAGE_MAX_QUIET
+
+    async def _resident_watchdog(self):
+        """
+        Resident sayfayı canlı tut; bayatlarsa veya çökerse yeniden yükle
+        """
+        while True:
+            try:
+                if self._resident_needs_reload():
+                    if self.resident_page is not None:
+                        self.resident_reloads += 1
+                        logger.info(f"🔄 XAUUSD resident sayfası yeniden yükleniyor (#{self.resident_reloads})")
+                    await self._open_resident_page()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Resident sayfa hatası: {e}")
+                # Bir sonraki turda tekrar dene
+                self.resident_page = None
+            await asyncio.sleep(5)
+
+    def get_resident_price(self) -> Optional[float]:
+        """
+        Resident sayfadan gelen son fiyatı döndür (ağ beklemesi yok)
+        Sayfa canlı değilse None döner
+        """
+        if self.resident_price is None:
+            return None
+        if self.resident_page is None or self._resident_crashed:
+            return None
+        if time.monotonic() - self.resident_seen_at > RESIDENT_PAGE_STALE_TIMEOUT:
+            return None
+        return self.resident_price
+
+    async def _close_resident_page(self):
+        try:
+            if self.resident_context:
+                await self.resident_context.close()
+        except Exception:
+            pass
+        self.resident_context = None
+        self.resident_page = None
+
+    async def stop_resident_page(self):
+        """
+        Resident sayfa modunu durdur
+        """
+        if self._resident_task:
+            self._resident_task.cancel()
+            try:
+                await self._resident_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._resident_task = None
+        await self._close_resident_page()
+        logger.info("📌 XAUUSD resident sayfa modu durduruldu")
+
+    async def get_price_javascript_only(self, deadline: Optional[float] = None) -> Optional[float]:
         """
         Sadece JavaScript ile fiyat çek (çok hızlı)
+        deadline verilirse navigasyon ve bekleme ona göre kısaltılır
         """
         try:
             if not self.page:
@@ -443,10 +593,19 @@ class TradingViewChartFetcher:
             logger.info(f"⚡ JavaScript-only fiyat çekme başlatıldı...")
             
             # Önce TradingView sayfasına git ama sadece temel yapıyı yükle
-            await self.page.goto(self.xauusd_url, wait_until="domcontentloaded", timeout=8000)
+            nav_timeout = time_left(deadline, 8.0)
+            if nav_timeout <= 0:
+                logger.warning("⚠️ XAUUSD için süre kalmadı")
+                return None
+            await self.page.goto(self.xauusd_url, wait_until="domcontentloaded", timeout=nav_timeout * 1000)
             
-            # Sayfa tam yüklenmesi için bekle
-            await asyncio.sleep(3)
+            # Sabit bekleme yerine fiyat görünene kadar bekle (deadline'ı aşmadan)
+            ready_timeout = time_left(deadline, 3.0)
+            if ready_timeout > 0:
+                try:
+                    await self.page.wait_for_function(PRICE_READY_PREDICATE, timeout=ready_timeout * 1000)
+                except PlaywrightTimeoutError:
+                    logger.warning("⚠️ XAUUSD fiyatı süre içinde görünmedi, mevcut metin taranıyor")
             
             # Sayfa metnini Python tarafında al
             page_text = await self.page.evaluate("() => document.body.innerText")
@@ -557,6 +716,7 @@ async def test_xauusd_fetcher():
         logger.error(f"❌ Test hatası: {e}")
     finally:
         await fetcher.close_browser()
+        await browser_service.close()
 
 if __name__ == "__main__":
     # Test çalıştır
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Update Processor - Eşzamanlı update işleme, chat bazında sıralı
+- Farklı chat'lerin update'leri paralel işlenir (lane başına üst sınır ile)
+- Aynı chat'in update'leri geliş sırasıyla, birbiri ardına işlenir
+- Sırasını bekleyen update slot tutmaz
+- Öncelik lane'leri: ağ gerektirmeyen update'ler fetch bekleyenlerin
+  slotlarını paylaşmaz, yavaş scrape'lerin arkasında kuyruğa girmez
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class _ChatQueue:
+    """Bir chat'in sıra kilidi ve bekleyen update sayısı"""
+
+    __slots__ = ("lock", "pending")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.pending = 0
+
+
+class _Lane:
+    """Bir öncelik sınıfının slotları ve bekleme metrikleri"""
+
+    def __init__(self, name: str, limit: int, window: int = 200):
+        self.name = name
+        self.limit = max(1, limit)
+        self.slots: Optional[asyncio.Semaphore] = None
+        self.waiting = 0        # Slot bekleyen (kuyruk derinliği)
+        self.max_waiting = 0
+        self.active = 0
+        self.processed = 0
+        self.wait_times: deque = deque(maxlen=window)
+
+    def wait_percentile(self, p: float) -> Optional[float]:
+        if not self.wait_times:
+            return None
+        ordered = sorted(self.wait_times)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+    def get_stats(self) -> Dict[str, Any]:
+        p50 = self.wait_percentile(0.5)
+        p95 = self.wait_percentile(0.95)
+        return {
+            "limit": self.limit,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "active": self.active,
+            "processed": self.processed,
+            "wait_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "wait_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Lane başına eşzamanlılık sınırı + chat bazında sıralama
+
+    max_concurrent_updates: lane verilmezse tek lane'in slot sayısı
+    max_pending_updates: işlenmekte veya sırada bekleyen toplam update sayısı
+    (PTB'nin kendi semaforu bu değerle kurulur)
+    lanes: {lane adı: slot sayısı}; classify(update) update'in lane adını döndürür
+    """
+
+    def __init__(
+        self,
+        max_concurrent_updates: int = 32,
+        max_pending_updates: int = 1024,
+        lanes: Optional[Dict[str, int]] = None,
+        classify: Optional[Callable[[object], str]] = None,
+    ):
+        lanes = lanes or {"default": max_concurrent_updates}
+        super().__init__(max(max_pending_updates, sum(lanes.values())))
+        self.lanes: Dict[str, _Lane] = {name: _Lane(name, limit) for name, limit in lanes.items()}
+        self.default_lane = next(iter(self.lanes))
+        self.classify = classify
+        self._chats: Dict[Hashable, _ChatQueue] = {}
+
+        # İstatistikler
+        self.stats = {"processed": 0, "failed": 0, "active": 0, "max_active": 0}
+
+    @staticmethod
+    def _chat_key(update: object) -> Optional[Hashable]:
+        chat = getattr(update, "effective_chat", None)
+        return chat.id if chat is not None else None
+
+    def _lane_for(self, update: object) -> _Lane:
+        name = self.default_lane
+        if self.classify is not None:
+            try:
+                name = self.classify(update) or self.default_lane
+            except Exception as e:
+                logger.warning(f"⚠️ Update lane sınıflandırma hatası: {e}")
+        return self.lanes.get(name) or self.lanes[self.default_lane]
+
+    async def initialize(self) -> None:
+        for lane in self.lanes.values():
+            if lane.slots is None:
+                lane.slots = asyncio.Semaphore(lane.limit)
+
+    async def shutdown(self) -> None:
+        self._chats.clear()
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        await self.initialize()
+
+        lane = self._lane_for(update)
+        lane.waiting += 1
+        lane.max_waiting = max(lane.max_waiting, lane.waiting)
+        queued_at = time.perf_counter()
+
+        key = self._chat_key(update)
+        if key is None:
+            # Chat'e bağlı olmayan update'ler için sıralama gerekmez
+            await self._run(lane, queued_at, coroutine)
+            return
+
+        queue = self._chats.get(key)
+        if queue is None:
+            queue = self._chats[key] = _ChatQueue()
+        queue.pending += 1
+        try:
+            # asyncio.Lock bekleyenleri geliş sırasıyla uyandırır
+            async with queue.lock:
+                await self._run(lane, queued_at, coroutine)
+        finally:
+            queue.pending -= 1
+            if queue.pending == 0:
+                # Boşta kalan chat kilitleri birikmesin
+                self._chats.pop(key, None)
+
+    async def _run(self, lane: _Lane, queued_at: float, coroutine: Awaitable[Any]):
+        try:
+            await lane.slots.acquire()
+        finally:
+            # Bekleme süresi: geliş → slot (aynı chat'in önceki mesajları dahil)
+            lane.waiting -= 1
+        lane.wait_times.append(time.perf_counter() - queued_at)
+
+        lane.active += 1
+        self.stats["active"] += 1
+        self.stats["max_active"] = max(self.stats["max_active"], self.stats["active"])
+        try:
+            await coroutine
+            lane.processed += 1
+            self.stats["processed"] += 1
+        except Exception:
+            # Hata PTB'nin error handler'ına zaten iletilir
+            self.stats["failed"] += 1
+            raise
+        finally:
+            lane.active -= 1
+            self.stats["active"] -= 1
+            lane.slots.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "chats_waiting": len(self._chats),
+            "lanes": {name: lane.get_stats() for name, lane in self.lanes.items()},
+        }
+
+
+async def _benchmark(chats: int = 50, messages_per_chat: int = 3, fetch_delay: float = 0.2,
+                     concurrency: int = 32):
+    """
+    Sahte update'lerle throughput ölçümü: sıralı işleme vs chat bazında eşzamanlı
+    Her chat'in ilk mesajı fetch (fetch_delay bekler), sonrakiler anında biter
+    """
+
+    class _Chat:
+        def __init__(self, chat_id):
+            self.id = chat_id
+
+    class _Update:
+        def __init__(self, chat_id, seq):
+            self.effective_chat = _Chat(chat_id)
+            self.seq = seq
+
+    async def run(processor: BaseUpdateProcessor) -> Dict[str, Any]:
+        order: Dict[int, List[int]] = {}
+
+        async def handler(update):
+            if update.seq == 0:
+                await asyncio.sleep(fetch_delay)
+            order.setdefault(update.effective_chat.id, []).append(update.seq)
+
+        await processor.initialize()
+        updates = [_Update(c, s) for s in range(messages_per_chat) for c in range(chats)]
+        start = time.perf_counter()
+        await asyncio.gather(*(processor.process_update(u, handler(u)) for u in updates))
+        elapsed = time.perf_counter() - start
+        await processor.shutdown()
+
+        in_order = all(seqs == sorted(seqs) for seqs in order.values())
+        return {"elapsed": elapsed, "throughput": len(updates) / elapsed, "in_order": in_order}
+
+    from telegram.ext import SimpleUpdateProcessor
+
+    results = {
+        "sıralı (1)": await run(SimpleUpdateProcessor(1)),
+        f"chat sıralı ({concurrency})": await run(ChatOrderedUpdateProcessor(concurrency)),
+    }
+    print(f"⏱️ {chats} chat × {messages_per_chat} mesaj, fetch {fetch_delay * 1000:.0f} ms")
+    for name, result in results.items():
+        print(
+            f"   {name:20s} {result['elapsed']:7.2f} sn  "
+            f"{result['throughput']:8.1f} update/sn  sıra korundu: {result['in_order']}"
+        )
+
+
+async def _benchmark_lanes(fetch_updates: int = 64, fast_updates: int = 64, fetch_delay: float = 0.5,
+                           concurrency: int = 16):
+    """
+    Yük altında ağ gerektirmeyen update'lerin bekleme süresi: tek lane vs öncelik lane'leri
+    Önce fetch update'leri (fetch_delay bekler), hemen ardından farklı chat'lerden hızlı update'ler gelir
+    """
+
+    class _Chat:
+        def __init__(self, chat_id):
+            self.id = chat_id
+
+    class _Update:
+        def __init__(self, chat_id, kind):
+            self.effective_chat = _Chat(chat_id)
+            self.kind = kind
+
+    async def run(processor: ChatOrderedUpdateProcessor) -> Dict[str, Any]:
+        async def handler(update):
+            if update.kind == "fetch":
+                await asyncio.sleep(fetch_delay)
+
+        await processor.initialize()
+        updates = [_Update(c, "fetch") for c in range(fetch_updates)]
+        updates += [_Update(fetch_updates + c, "fast") for c in range(fast_updates)]
+        await asyncio.gather(*(processor.process_update(u, handler(u)) for u in updates))
+        await processor.shutdown()
+        return processor.get_stats()["lanes"]
+
+    single = await run(ChatOrderedUpdateProcessor(concurrency))
+    laned = await run(ChatOrderedUpdateProcessor(
+        lanes={"fetch": concurrency, "fast": max(1, concurrency // 4)},
+        classify=lambda update: update.kind,
+    ))
+
+    print(f"⏱️ {fetch_updates} fetch ({fetch_delay * 1000:.0f} ms) + {fast_updates} hızlı update")
+    print(f"   tek lane          bekleme p50: {single['default']['wait_p50_ms']} ms  "
+          f"p95: {single['default']['wait_p95_ms']} ms (tüm update'ler)")
+    for name, stats in laned.items():
+        print(f"   lane {name:12s} bekleme p50: {stats['wait_p50_ms']} ms  "
+              f"p95: {stats['wait_p95_ms']} ms  maks. kuyruk: {stats['max_waiting']}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--lanes" in sys.argv:
+        asyncio.run(_benchmark_lanes())
+    else:
+        asyncio.run(_benchmark())
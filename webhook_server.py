@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Webhook Server - PTB Application için aiohttp webhook sunucusu
+- Telegram update'leri HTTP POST ile gelir (long-poll gecikmesi yok, yük dengelenebilir)
+- Secret token (X-Telegram-Bot-Api-Secret-Token) sabit zamanlı karşılaştırılır
+- Update kuyruğa atılır ve 200 hemen döner; işleme Application'da asenkron yapılır
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+from telegram import Update
+
+logger = logging.getLogger(__name__)
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    """
+    application: PTB Application (start() edilmiş olmalı, update_queue'yu işler)
+    secret_token: setWebhook'a verilen token; boşsa kontrol yapılmaz
+    """
+
+    def __init__(
+        self,
+        application,
+        path: str = "/telegram",
+        secret_token: Optional[str] = None,
+        listen: str = "0.0.0.0",
+        port: int = 8080,
+    ):
+        self.application = application
+        self.path = path
+        self.secret_token = secret_token
+        self.listen = listen
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+        # İstatistikler
+        self.stats = {"received": 0, "rejected": 0, "invalid": 0}
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.path, self._handle_update)
+        app.router.add_get("/healthz", self._handle_health)
+        return app
+
+    async def _handle_update(self, request: web.Request) -> web.Response:
+        if self.secret_token:
+            received = request.headers.get(SECRET_TOKEN_HEADER, "")
+            if not hmac.compare_digest(received.encode(), self.secret_token.encode()):
+                self.stats["rejected"] += 1
+                logger.warning(f"⚠️ Geçersiz secret token ile webhook isteği ({request.remote})")
+                return web.Response(status=403)
+
+        try:
+            data = await request.json()
+            if not isinstance(data, dict):
+                raise TypeError(f"JSON nesnesi bekleniyordu, {type(data).__name__} geldi")
+            update = Update.de_json(data, self.application.bot)
+        except (ValueError, TypeError, KeyError) as e:
+            self.stats["invalid"] += 1
+            logger.warning(f"⚠️ Geçersiz webhook gövdesi: {e}")
+            return web.Response(status=400)
+
+        # İşleme beklenmez: Telegram'a hemen 200, handler'lar update_processor'da çalışır
+        self.stats["received"] += 1
+        self.application.update_queue.put_nowait(update)
+        return web.Response(status=200)
+
+    async def _handle_health(self, request: web.Request) -> web.Response:
+        return web.json_response({"ok": True, "queued": self.application.update_queue.qsize()})
+
+    async def start(self):
+        """HTTP sunucusunu başlat"""
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.listen, self.port)
+        await site.start()
+        logger.info(f"🌐 Webhook sunucusu dinliyor: {self.listen}:{self.port}{self.path}")
+
+    async def stop(self):
+        """HTTP sunucusunu durdur"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+            logger.info("🌐 Webhook sunucusu durduruldu")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "queued": self.application.update_queue.qsize()}
+
+
+def _percentile(values, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))] if ordered else 0.0
+
+
+async def _benchmark(updates: int = 100, fetch_delay: float = 0.2, api_latency: float = 0.05,
+                     spacing: float = 0.01, api_port: int = 18081, hook_port: int = 18080):
+    """
+    Sahte Bot API'ye karşı uçtan uca gecikme: polling vs webhook
+    Update'ler spacing aralıkla gelir; sahte API her cevabı api_latency geciktirir (ağ gidiş-dönüşü)
+    Update'in gelişinden cevabın (sendMessage) sahte API'ye ulaşmasına kadar ölçülür
+    """
+    import aiohttp
+    from telegram.ext import Application, MessageHandler, filters
+
+    from update_processor import ChatOrderedUpdateProcessor
+
+    token = "123456:BENCH"
+    injected: Dict[int, float] = {}
+    replied: Dict[int, float] = {}
+    pending_updates: asyncio.Queue = asyncio.Queue()
+
+    # --- Sahte Bot API ---
+    async def bot_api(request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = dict(await request.post()) if request.can_read_body else {}
+        await asyncio.sleep(api_latency)
+        if method == "getMe":
+            result: Any = {"id": 1, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+        elif method == "getUpdates":
+            # Long-poll: update gelene kadar (en fazla timeout) bekle
+            batch = []
+            try:
+                batch.append(await asyncio.wait_for(pending_updates.get(), float(params.get("timeout", 0)) or 0.01))
+                while not pending_updates.empty():
+                    batch.append(pending_updates.get_nowait())
+            except asyncio.TimeoutError:
+                pass
+            result = batch
+        elif method == "sendMessage":
+            update_id = int(params["text"])
+            replied[update_id] = time.perf_counter()
+            result = {
+                "message_id": update_id, "date": int(time.time()), "text": params["text"],
+                "chat": {"id": int(params["chat_id"]), "type": "private"},
+            }
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    api_app = web.Application()
+    api_app.router.add_post("/bot{token}/{method}", bot_api)
+    api_runner = web.AppRunner(api_app, access_log=None)
+    await api_runner.setup()
+    await web.TCPSite(api_runner, "127.0.0.1", api_port).start()
+
+    def make_update(update_id: int) -> Dict[str, Any]:
+        return {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id, "date": int(time.time()), "text": "+0,01",
+                "chat": {"id": update_id, "type": "private"},
+                "from": {"id": update_id, "is_bot": False, "first_name": "U"},
+            },
+        }
+
+    async def handler(update, context):
+        await asyncio.sleep(fetch_delay)
+        await update.message.reply_text(str(update.update_id))
+
+    def build_application():
+        application = (
+            Application.builder()
+            .token(token)
+            .base_url(f"http://127.0.0.1:{api_port}/bot")
+            .concurrent_updates(ChatOrderedUpdateProcessor(32))
+            .connection_pool_size(64)
+            .build()
+        )
+        application.add_handler(MessageHandler(filters.TEXT, handler))
+        return application
+
+    async def wait_replies(first_id: int):
+        while len([i for i in replied if i >= first_id]) < updates:
+            await asyncio.sleep(0.01)
+
+    results = {}
+
+    # --- Polling ---
+    application = build_application()
+    async with application:
+        await application.start()
+        await application.updater.start_polling(poll_interval=0.0, timeout=10)
+        for update_id in range(updates):
+            injected[update_id] = time.perf_counter()
+            pending_updates.put_nowait(make_update(update_id))
+            await asyncio.sleep(spacing)
+        await wait_replies(0)
+        await application.updater.stop()
+        await application.stop()
+    results["polling"] = {"ack": None, "e2e": [replied[i] - injected[i] for i in range(updates)]}
+
+    # --- Webhook ---
+    first = updates
+    application = build_application()
+    server = WebhookServer(application, "/telegram", "bench-secret", "127.0.0.1", hook_port)
+    ack_times = []
+    async with application:
+        await application.start()
+        await server.start()
+        async with aiohttp.ClientSession() as session:
+            async def post(update_id: int):
+                await asyncio.sleep((update_id - first) * spacing)
+                injected[update_id] = time.perf_counter()
+                async with session.post(
+                    f"http://127.0.0.1:{hook_port}/telegram",
+                    json=make_update(update_id),
+                    headers={SECRET_TOKEN_HEADER: "bench-secret"},
+                ) as response:
+                    assert response.status == 200
+                ack_times.append(time.perf_counter() - injected[update_id])
+
+            await asyncio.gather(*(post(first + i) for i in range(updates)))
+            async with session.post(f"http://127.0.0.1:{hook_port}/telegram", data=json.dumps({})) as response:
+                rejected_status = response.status
+        await wait_replies(first)
+        await server.stop()
+        await application.stop()
+    results["webhook"] = {"ack": ack_times, "e2e": [replied[first + i] - injected[first + i] for i in range(updates)]}
+
+    await api_runner.cleanup()
+
+    print(
+        f"⏱️ {updates} update ({spacing * 1000:.0f} ms arayla), handler {fetch_delay * 1000:.0f} ms, "
+        f"sahte Bot API gecikmesi {api_latency * 1000:.0f} ms"
+    )
+    for name, result in results.items():
+        ack = (
+            f"ack p50: {_percentile(result['ack'], 0.5) * 1000:6.1f} ms  p95: {_percentile(result['ack'], 0.95) * 1000:6.1f} ms  "
+            if result["ack"] else f"{'':36s}"
+        )
+        print(
+            f"   {name:8s} {ack}uçtan uca p50: {_percentile(result['e2e'], 0.5) * 1000:6.1f} ms  "
+            f"p95: {_percentile(result['e2e'], 0.95) * 1000:6.1f} ms"
+        )
+    print(f"   secret token olmadan istek: HTTP {rejected_status}")
+
+
+if __name__ == "__main__":
+    asyncio.run(_benchmark())
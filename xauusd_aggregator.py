@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+XAUUSD Aggregator - Birden fazla XAUUSD kaynağını süre sınırı altında birleştirir
+- Tüm kaynaklar aynı anda sorgulanır
+- Güvenilir bir kaynaktan kabul edilebilir ilk fiyat gelirse hemen döner,
+  yoksa süre dolunca (veya hepsi bitince) ağırlıklı medyan kullanılır
+- Kaynak ağırlıkları konsensüsle uyum geçmişinden öğrenilir
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from config import TVDATAFEED_MAX_WORKERS
+from readiness import time_left
+
+logger = logging.getLogger(__name__)
+
+# Opsiyonel kaynaklar: kütüphane kurulu değilse aggregator onlarsız çalışır
+try:
+    from tradingview_xauusd_fetcher import TradingViewXAUUSDFetcher
+except ImportError:
+    TradingViewXAUUSDFetcher = None
+    logger.warning("⚠️ websockets bulunamadı, TradingView WebSocket kaynağı devre dışı")
+
+try:
+    from tradingview_websocket_fetcher import TradingViewWebSocketFetcher
+except ImportError:
+    TradingViewWebSocketFetcher = None
+    logger.warning("⚠️ tvDatafeed bulunamadı, tvDatafeed kaynağı devre dışı")
+
+from tradingview_simple_fetcher import TradingViewSimpleFetcher
+
+
+class XauusdSource:
+    """
+    Tek bir XAUUSD kaynağı ve öğrenilmiş güvenilirlik ağırlığı
+    fetch(deadline): deadline time.monotonic() cinsinden son an
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fetch: Callable[[Optional[float]], Awaitable[Optional[float]]],
+        weight: float = 0.5,
+        close: Optional[Callable[[], Awaitable[None]]] = None,
+    ):
+        self.name = name
+        self.fetch = fetch
+        self.close = close
+        self.weight = weight
+        self.last_price: Optional[float] = None
+        self.agreements = 0
+        self.disagreements = 0
+        self.failures = 0
+
+
+def weighted_median(values: List[tuple]) -> Optional[float]:
+    """
+    [(fiyat, ağırlık), ...] listesinin ağırlıklı medyanı
+    """
+    values = [(price, weight) for price, weight in values if weight > 0]
+    if not values:
+        return None
+    values.sort()
+    half = sum(weight for _, weight in values) / 2
+    cumulative = 0.0
+    for price, weight in values:
+        cumulative += weight
+        if cumulative >= half:
+            return price
+    return values[-1][0]
+
+
+class XauusdAggregator:
+    """
+    Kaynakları eşzamanlı sorgulayıp tek bir XAUUSD fiyatı üretir
+    """
+
+    def __init__(
+        self,
+        deadline: float = 4.0,
+        tolerance_percent: float = 0.5,
+        trust_weight: float = 0.7,
+        learning_rate: float = 0.1,
+    ):
+        self.deadline = deadline
+        self.tolerance_percent = tolerance_percent
+        self.trust_weight = trust_weight
+        self.learning_rate = learning_rate
+        self.sources: Dict[str, XauusdSource] = {}
+
+        self.last_consensus: Optional[float] = None
+        self._learn_tasks: set = set()
+
+        # İstatistikler
+        self.stats = {"requests": 0, "first": 0, "consensus": 0, "empty": 0}
+
+    def add_source(
+        self,
+        name: str,
+        fetch: Callable[[Optional[float]], Awaitable[Optional[float]]],
+        weight: float = 0.5,
+        close: Optional[Callable[[], Awaitable[None]]] = None,
+    ):
+        """Sorgulanacak yeni bir kaynak ekle (close: kapanışta çağrılır)"""
+        self.sources[name] = XauusdSource(name, fetch, weight, close)
+
+    def _agrees(self, price: float, reference: float) -> bool:
+        return abs(price - reference) / reference * 100 <= self.tolerance_percent
+
+    def _acceptable(self, source: XauusdSource, price: float) -> bool:
+        """Güvenilir kaynak ve (varsa) son konsensüsle uyumlu mu"""
+        if source.weight < self.trust_weight:
+            return False
+        return self.last_consensus is None or self._agrees(price, self.last_consensus)
+
+    async def _query(self, source: XauusdSource, deadline: float) -> Optional[float]:
+        try:
+            price = await source.fetch(deadline)
+        except Exception as e:
+            logger.warning(f"⚠️ XAUUSD kaynağı hatası ({source.name}): {e}")
+            price = None
+        if not price or price <= 0:
+            source.failures += 1
+            return None
+        source.last_price = float(price)
+        return source.last_price
+
+    def _learn(self, quotes: Dict[str, float], consensus: float):
+        """Konsensüse uyan kaynağın ağırlığı artar, uymayanınki azalır (EWMA)"""
+        for name, price in quotes.items():
+            source = self.sources[name]
+            agreed = self._agrees(price, consensus)
+            if agreed:
+                source.agreements += 1
+            else:
+                source.disagreements += 1
+            source.weight += self.learning_rate * ((1.0 if agreed else 0.0) - source.weight)
+
+    def _consensus(self, quotes: Dict[str, float]) -> Optional[float]:
+        return weighted_median([(price, self.sources[name].weight) for name, price in quotes.items()])
+
+    async def get_price(self, deadline: Optional[float] = None) -> Optional[Dict]:
+        """
+        Tüm kaynakları sorgula
+        deadline: time.monotonic() cinsinden son an (aggregator süresinden kısaysa o kullanılır)
+        Dönüş: {"price", "method": "first" | "consensus", "quotes", "elapsed"} veya None
+        """
+        self.stats["requests"] += 1
+        start = time.monotonic()
+        end = start + time_left(deadline, self.deadline)
+
+        tasks = {asyncio.create_task(self._query(source, end)): source for source in self.sources.values()}
+        quotes: Dict[str, float] = {}
+        result = None
+
+        pending = set(tasks)
+        while pending:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                source = tasks[task]
+                price = task.result()
+                if price is None:
+                    continue
+                quotes[source.name] = price
+                if result is None and self._acceptable(source, price):
+                    result = {"price": price, "method": "first", "source": source.name}
+            if result:
+                break
+
+        if result is None and quotes:
+            result = {"price": self._consensus(quotes), "method": "consensus", "source": None}
+
+        if pending:
+            # Geç kalan kaynaklar arka planda bitsin, ağırlıklar tam veriyle öğrenilsin
+            learn_task = asyncio.create_task(self._finish_and_learn(tasks, pending, dict(quotes)))
+            self._learn_tasks.add(learn_task)
+            learn_task.add_done_callback(self._learn_tasks.discard)
+        elif quotes:
+            self._record_consensus(quotes)
+
+        if result is None:
+            self.stats["empty"] += 1
+            logger.warning("⚠️ Hiçbir XAUUSD kaynağı süre içinde fiyat döndürmedi")
+            return None
+
+        self.stats[result["method"]] += 1
+        result["quotes"] = quotes
+        result["elapsed"] = time.monotonic() - start
+        logger.info(
+            f"💎 XAUUSD ({result['method']}{', ' + result['source'] if result['source'] else ''}): "
+            f"${result['price']:.2f} [{len(quotes)}/{len(self.sources)} kaynak, {result['elapsed']:.2f}s]"
+        )
+        return result
+
+    def _record_consensus(self, quotes: Dict[str, float]):
+        consensus = self._consensus(quotes)
+        if consensus:
+            # Tek kaynakla uyum ölçülemez, ağırlıklar değişmez
+            if len(quotes) >= 2:
+                self._learn(quotes, consensus)
+            self.last_consensus = consensus
+
+    async def _finish_and_learn(self, tasks: Dict, pending: set, quotes: Dict[str, float]):
+        done, still_pending = await asyncio.wait(pending, timeout=self.deadline)
+        for task in still_pending:
+            task.cancel()
+        for task in done:
+            price = task.result()
+            if price is not None:
+                quotes[tasks[task].name] = price
+        if quotes:
+            self._record_consensus(quotes)
+
+    async def get_price_value(self, deadline: Optional[float] = None) -> Optional[float]:
+        """
+        Sadece fiyatı döndür (PricePoller kaynağı olarak)
+        deadline: time.monotonic() cinsinden son an (aggregator süresinden kısaysa o kullanılır)
+        """
+        result = await self.get_price(deadline)
+        return result["price"] if result else None
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "last_consensus": self.last_consensus,
+            "sources": {
+                name: {
+                    "weight": round(source.weight, 3),
+                    "last_price": source.last_price,
+                    "agreements": source.agreements,
+                    "disagreements": source.disagreements,
+                    "failures": source.failures,
+                }
+                for name, source in self.sources.items()
+            },
+        }
+
+    async def close(self):
+        """Arka plan öğrenme görevlerini durdur ve kaynakları kapat"""
+        for task in list(self._learn_tasks):
+            task.cancel()
+        for source in self.sources.values():
+            if source.close:
+                try:
+                    await source.close()
+                except Exception as e:
+                    logger.error(f"❌ XAUUSD kaynağı kapatma hatası ({source.name}): {e}")
+
+
+def build_default_aggregator(chart_fetcher, enabled_sources: List[str], **options) -> XauusdAggregator:
+    """
+    Repodaki spot XAUUSD fetcher'larından aggregator kur
+    chart_fetcher: TradingViewChartFetcher (resident sayfa dahil)
+    yfinance (GC=F) vadeli fiyattır, konsensüse oy vermez; geniş toleranslı
+    güvenlik kontrolünde kullanılır
+    """
+    aggregator = XauusdAggregator(**options)
+
+    if "tradingview_chart" in enabled_sources:
+        # Bugüne kadar üretimde kullanılan kaynak: başlangıçta güvenilir
+        aggregator.add_source("tradingview_chart", chart_fetcher.fetch_price, weight=0.8)
+
+    if "tradingview_simple" in enabled_sources:
+        simple = TradingViewSimpleFetcher()
+
+        async def fetch_simple(deadline=None):
+            if simple.session is None or simple.session.closed:
+                await simple.start_session()
+            return await simple.get_best_price()
+
+        aggregator.add_source("tradingview_simple", fetch_simple, close=simple.close_session)
+
+    if "tradingview_ws" in enabled_sources and TradingViewXAUUSDFetcher is not None:
+        streamer = TradingViewXAUUSDFetcher()
+        listener: Dict[str, Optional[asyncio.Task]] = {"task": None}
+
+        async def fetch_stream(deadline=None):
+            # Akış kaynağı: bağlantı yoksa kur, son 60 saniyedeki fiyatı ver
+            if not streamer.is_connected and await streamer.connect():
+                listener["task"] = asyncio.create_task(streamer.listen_for_prices())
+            if streamer.last_update and time.time() - streamer.last_update.timestamp() <= 60:
+                return streamer.get_current_price()
+            return None
+
+        async def close_stream():
+            if listener["task"]:
+                listener["task"].cancel()
+            await streamer.disconnect()
+
+        aggregator.add_source("tradingview_ws", fetch_stream, close=close_stream)
+
+    if "tvdatafeed" in enabled_sources and TradingViewWebSocketFetcher is not None:
+        # Senkron kütüphane: ayrı, sınırlı thread havuzu; takılan çağrılar varsayılan havuzu doldurmaz
+        executor = ThreadPoolExecutor(max_workers=TVDATAFEED_MAX_WORKERS, thread_name_prefix="tvdatafeed")
+        holder: Dict[str, Optional[object]] = {"fetcher": None, "future": None}
+        holder_lock = threading.Lock()
+
+        def fetch_tvdatafeed_sync():
+            # TvDatafeed bağlantısı ilk kullanımda kurulur (senkron, thread'de)
+            with holder_lock:
+                if holder["fetcher"] is None:
+                    holder["fetcher"] = TradingViewWebSocketFetcher()
+            return holder["fetcher"].get_current_price()
+
+        async def fetch_tvdatafeed(deadline=None):
+            previous: Optional[Future] = holder["future"]
+            if previous is not None and not previous.done():
+                # Önceki çağrı hâlâ thread'de: üst üste yığmak yerine bu tur atlanır
+                logger.debug("⏭️ tvDatafeed önceki çağrı sürüyor, atlandı")
+                return None
+            future = executor.submit(fetch_tvdatafeed_sync)
+            holder["future"] = future
+            # Thread kesilemez; deadline dolunca sadece beklemeyi bırakırız
+            return await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)), time_left(deadline, aggregator.deadline)
+            )
+
+        async def close_tvdatafeed():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        aggregator.add_source("tvdatafeed", fetch_tvdatafeed, close=close_tvdatafeed)
+
+    return aggregator
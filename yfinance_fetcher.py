@@ -1,8 +1,16 @@
 import yfinance as yf
+import asyncio
 import logging
 import os
-from typing import Dict, Optional
-from config import PRICE_VALIDATION_TOLERANCE
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+from config import (
+    PRICE_VALIDATION_TOLERANCE, YF_MAX_WORKERS, YF_DOWNLOAD_TIMEOUT,
+    YF_CACHE_TTL, YF_CACHE_MAX_STALE, YF_NEGATIVE_CACHE_TTL,
+)
+from readiness import time_left
+from single_flight import SingleFlight
 
 # Railway'de cache sorunu için cache dizinini /tmp'ye yönlendir
 try:
@@ -15,6 +23,25 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+
+class _CachedQuote:
+    """Bir ticker'ın cache'teki son başarılı değeri ve son hata zamanı"""
+
+    def __init__(self):
+        self.value: Optional[float] = None
+        self.updated_at: float = 0.0   # Son başarılı değer (monotonic)
+        self.failed_at: float = 0.0    # Son başarısız indirme (monotonic)
+
+    @property
+    def age(self) -> Optional[float]:
+        if self.value is None:
+            return None
+        return time.monotonic() - self.updated_at
+
+    def failed_recently(self) -> bool:
+        return self.failed_at > 0 and time.monotonic() - self.failed_at < YF_NEGATIVE_CACHE_TTL
+
+
 class YFinanceFetcher:
     """yfinance ile fiyat çekme ve doğrulama"""
     
@@ -22,6 +49,20 @@ class YFinanceFetcher:
         # Ticker sembolleri
         self.gold_ticker = "GC=F"  # XAUUSD (Altın)
         self.usd_rub_ticker = "USDRUB=X"  # USD/RUB döviz kuru
+
+        # yfinance senkron çalışır: sınırlı thread havuzunda, event loop dışında
+        self.executor = ThreadPoolExecutor(max_workers=YF_MAX_WORKERS, thread_name_prefix="yfinance")
+        # Eşzamanlı istekler tek toplu indirmeyi paylaşır
+        self.single_flight = SingleFlight("yfinance")
+        self.stats = {"downloads": 0, "fallbacks": 0, "failures": 0}
+
+        # Stale-while-revalidate cache (ticker başına TTL)
+        self.cache: Dict[str, _CachedQuote] = {
+            self.gold_ticker: _CachedQuote(),
+            self.usd_rub_ticker: _CachedQuote(),
+        }
+        self.cache_stats = {"hits": 0, "misses": 0, "stale": 0, "negative_hits": 0}
+        self._revalidate_task: Optional[asyncio.Task] = None
         
     def get_xauusd_price(self) -> Optional[float]:
         """XAUUSD (Altın) fiyatını çeker"""
@@ -122,9 +163,7 @@ class YFinanceFetcher:
             usd_rub = self.get_usd_rub_rate()
             
             if xauusd and usd_rub:
-                # XAUUSD × USD/RUB ÷ 31.1034768 = Gram fiyatı
-                calculated_xaurub = xauusd * usd_rub
-                gram_price = calculated_xaurub / 31.1034768
+                gram_price = self.compute_gram_price(xauusd, usd_rub)
                 logger.info(f"✅ Hesaplanan XAURUB gram fiyatı: {gram_price:.4f} RUB/gram")
                 return gram_price
             else:
@@ -135,6 +174,150 @@ class YFinanceFetcher:
             logger.error(f"❌ XAURUB gram fiyatı hesaplama hatası: {e}")
             return None
     
+    def fetch_quotes(self) -> Dict[str, Optional[float]]:
+        """
+        GC=F ve USDRUB=X'i tek toplu indirmede çeker (senkron, thread'de çalışır)
+        Dönüş: {ticker: son kapanış fiyatı veya None}
+        """
+        tickers = [self.gold_ticker, self.usd_rub_ticker]
+        quotes: Dict[str, Optional[float]] = {ticker: None for ticker in tickers}
+        self.stats["downloads"] += 1
+
+        try:
+            # 5 günlük pencere: hafta sonu / tatilde de son işlem günü bulunur
+            data = yf.download(
+                tickers, period="5d", interval="1d",
+                progress=False, threads=False, auto_adjust=False,
+            )
+            closes = data["Close"]
+            for ticker in tickers:
+                if ticker in closes:
+                    series = closes[ticker].dropna()
+                    if not series.empty:
+                        quotes[ticker] = float(series.iloc[-1])
+        except Exception as e:
+            logger.warning(f"⚠️ yfinance toplu indirme hatası: {e}")
+
+        # Toplu indirmede eksik kalan ticker'lar için tekil history dene
+        for ticker, price in quotes.items():
+            if price is None:
+                self.stats["fallbacks"] += 1
+                try:
+                    hist = yf.Ticker(ticker).history(period="5d")
+                    if not hist.empty:
+                        quotes[ticker] = float(hist['Close'].dropna().iloc[-1])
+                except Exception as e:
+                    logger.warning(f"⚠️ yfinance {ticker} history hatası: {e}")
+
+        logger.info(f"✅ yfinance toplu veri: {quotes}")
+        return quotes
+
+    async def fetch_quotes_async(self) -> Dict[str, Optional[float]]:
+        """
+        Toplu indirmeyi thread havuzunda çalıştır
+        Aynı anda gelen çağrılar (aynı istek içindeki tekrarlar dahil) tek indirmeyi bekler
+        """
+        return await self.single_flight.do("quotes", self._download_in_executor)
+
+    async def _download_in_executor(self) -> Dict[str, Optional[float]]:
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self.executor, self.fetch_quotes),
+                timeout=YF_DOWNLOAD_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            self.stats["failures"] += 1
+            logger.warning(f"⚠️ yfinance toplu indirme timeout ({YF_DOWNLOAD_TIMEOUT}s)")
+            return {self.gold_ticker: None, self.usd_rub_ticker: None}
+
+    async def refresh_cache(self) -> Dict[str, Optional[float]]:
+        """Toplu indirme yap ve sonuçları cache'e yaz"""
+        quotes = await self.fetch_quotes_async()
+        now = time.monotonic()
+        for ticker, price in quotes.items():
+            entry = self.cache.setdefault(ticker, _CachedQuote())
+            if price:
+                entry.value = price
+                entry.updated_at = now
+                entry.failed_at = 0.0
+            else:
+                # Negatif cache: kısa süre yeniden deneme yapılmaz
+                entry.failed_at = now
+        return quotes
+
+    def _revalidate_in_background(self):
+        if self._revalidate_task is None or self._revalidate_task.done():
+            self._revalidate_task = asyncio.create_task(self._revalidate())
+
+    async def _revalidate(self):
+        try:
+            await self.refresh_cache()
+        except Exception as e:
+            logger.warning(f"⚠️ yfinance arka plan yenileme hatası: {e}")
+
+    async def get_cached_quotes(
+        self, deadline: Optional[float] = None
+    ) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+        """
+        Cache'ten {ticker: (değer, yaş saniye)} döndür
+        - Taze değer: hemen
+        - Bayat değer (MAX_STALE içinde): hemen, yenileme arka planda
+        - Değer yok veya çok eski: indirme beklenir (son hata yakınsa beklenmez)
+        deadline: indirme en fazla bu ana kadar beklenir; dolarsa asyncio.TimeoutError yükselir
+        (indirme arka planda sürer ve cache'i doldurur)
+        """
+        must_wait = False
+        revalidate = False
+        for ticker, entry in self.cache.items():
+            age = entry.age
+            ttl = YF_CACHE_TTL.get(ticker, 60)
+            if age is not None and age <= ttl:
+                self.cache_stats["hits"] += 1
+            elif entry.failed_recently():
+                self.cache_stats["negative_hits"] += 1
+            elif age is not None and age <= YF_CACHE_MAX_STALE:
+                self.cache_stats["stale"] += 1
+                revalidate = True
+            else:
+                self.cache_stats["misses"] += 1
+                must_wait = True
+
+        if must_wait:
+            self._revalidate_in_background()
+            try:
+                await asyncio.wait_for(
+                    asyncio.shield(self._revalidate_task), time_left(deadline, YF_DOWNLOAD_TIMEOUT)
+                )
+            except asyncio.TimeoutError:
+                # Çağıran zaman aşımını "veri yok"tan ayırt edebilsin
+                logger.warning("⚠️ yfinance verisi süre içinde gelmedi")
+                raise
+        elif revalidate:
+            self._revalidate_in_background()
+
+        return {ticker: (entry.value, entry.age) for ticker, entry in self.cache.items()}
+
+    def get_cache_stats(self) -> Dict:
+        return {
+            **self.cache_stats,
+            "ages": {
+                ticker: round(entry.age, 1) if entry.age is not None else None
+                for ticker, entry in self.cache.items()
+            },
+        }
+
+    def close(self):
+        """Arka plan yenilemeyi ve thread havuzunu kapat"""
+        if self._revalidate_task and not self._revalidate_task.done():
+            self._revalidate_task.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def compute_gram_price(xauusd: float, usd_rub: float) -> float:
+        """XAUUSD × USD/RUB ÷ 31.1034768 = Gram fiyatı"""
+        return xauusd * usd_rub / 31.1034768
+    
     def validate_xaurub_price(self, direct_xaurub: float, tolerance_percent: float = None) -> Dict:
         """Direkt XAURUB ile hesaplanan XAURUB'yi karşılaştırır"""
         try: